@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from EventStore import (
+    EventStore, MatchEvents, EVENT_COLUMNS, CACHE_VERSION, PASS_TYPE,
+    SHOT_TYPE, SUBSTITUTION_TYPE, nameSnapshot
+)
+from Heatmap import eventHistogram
+from PitchTransform import STATSBOMB_LENGTH, STATSBOMB_WIDTH
+
+# Bump whenever the content of the partial results changes, so that stale
+# partials are recomputed instead of being merged.
+AGGREGATE_VERSION = 3
+
+# Directory under cache_path holding the partial results.
+AGGREGATE_DIRECTORY = "aggregates"
+
+# Event types kept as event lists in the partial results; substitutions
+# bound the time windows of pass networks.
+KEPT_TYPES = (PASS_TYPE, SHOT_TYPE, SUBSTITUTION_TYPE)
+
+def zoneOf(x, y, zones):
+    """Return the zone ids of locations on the StatsBomb pitch.
+
+    Args:
+        x (numpy.ndarray): x-coordinates of the locations.
+        y (numpy.ndarray): y-coordinates of the locations.
+        zones ((int,int)): Number of zones along the length and width.
+
+    Returns:
+        numpy.ndarray: Zone ids, numbered row by row along the length.
+    """
+    zx = np.clip((x*(zones[0]/STATSBOMB_LENGTH)).astype(np.int64),
+                 0, zones[0]-1)
+    zy = np.clip((y*(zones[1]/STATSBOMB_WIDTH)).astype(np.int64),
+                 0, zones[1]-1)
+    return zy*zones[0]+zx
+
+def passZoneCounts(events, zones):
+    """Count the passes between each pair of zones.
+
+    Args:
+        events (MatchEvents): The events.
+        zones ((int,int)): Number of zones along the length and width.
+
+    Returns:
+        numpy.ndarray: A square matrix of counts, from the zone of the start
+        location in the rows to the zone of the end location in the columns.
+    """
+    n = zones[0]*zones[1]
+    passes = ((events['type'] == PASS_TYPE) & np.isfinite(events['x'])
+              & np.isfinite(events['end_x']))
+    start = zoneOf(events['x'][passes], events['y'][passes], zones)
+    end = zoneOf(events['end_x'][passes], events['end_y'][passes], zones)
+    return np.bincount(start*n+end, minlength=n*n).reshape(n, n)
+
+def passFlow(events, zones):
+    """Sum the passes starting in each zone.
+
+    The sums of several matches add up to the sums of all their passes, so
+    the mean direction of a zone is only computed when it is drawn.
+
+    Args:
+        events (MatchEvents): The events.
+        zones ((int,int)): Number of zones along the length and width.
+
+    Returns:
+        numpy.ndarray: For every zone, numbered as by zoneOf, the number of
+        passes and the sums of their x and y displacements, as an array of
+        shape (n, 3).
+    """
+    n = zones[0]*zones[1]
+    passes = ((events['type'] == PASS_TYPE) & np.isfinite(events['x'])
+              & np.isfinite(events['end_x']))
+    x, y = events['x'][passes], events['y'][passes]
+    start = zoneOf(x, y, zones)
+    return np.stack([
+        np.bincount(start, minlength=n),
+        np.bincount(start, weights=events['end_x'][passes]-x, minlength=n),
+        np.bincount(start, weights=events['end_y'][passes]-y, minlength=n)],
+        axis=1)
+
+class Aggregate:
+    """Results over one or more matches which can be merged by summing and
+    concatenating.
+
+    Attributes:
+        histogram (numpy.ndarray): Unsmoothed counts of the event locations.
+        pass_zones (numpy.ndarray): Pass counts between zones.
+        pass_flow (numpy.ndarray): Pass sums per zone, see passFlow.
+        flow_zones ((int,int)): The zones of pass_flow.
+        events (MatchEvents): The passes, shots and substitutions.
+        matches (list): Ids of the aggregated matches.
+        offsets (numpy.ndarray): Bounds of the events of each match, the
+        events of matches[i] being events[offsets[i]:offsets[i+1]].
+    """
+    def __init__(self, histogram, pass_zones, pass_flow, flow_zones, events,
+                 matches, offsets=None):
+        self.histogram = histogram
+        self.pass_zones = pass_zones
+        self.pass_flow = pass_flow
+        self.flow_zones = flow_zones
+        self.events = events
+        self.matches = matches
+        self.offsets = (np.array([0, len(events)]) if offsets is None
+                        else offsets)
+
+    def matchEvents(self):
+        """Yield the id and the events of every aggregated match."""
+        for i, match_id in enumerate(self.matches):
+            events = self.events.select(slice(self.offsets[i],
+                                              self.offsets[i+1]))
+            events.key = match_id
+            yield match_id, events
+
+    @property
+    def shots(self):
+        """The shots of the aggregated matches."""
+        return self.events.select(self.events['type'] == SHOT_TYPE)
+
+    @classmethod
+    def merge(cls, parts, key=None):
+        """Merge the results of several matches.
+
+        Args:
+            parts (list): The Aggregates to merge, at least one.
+            key (hashable, optional): Identifies the merged events.
+            Defaults to None.
+
+        Returns:
+            Aggregate: The merged results.
+        """
+        if not parts:
+            raise ValueError("No results to merge")
+        lengths = [ np.diff(p.offsets) for p in parts ]
+        offsets = np.concatenate([[0], np.cumsum(np.concatenate(lengths))])
+        return cls(sum(p.histogram for p in parts),
+                   sum(p.pass_zones for p in parts),
+                   sum(p.pass_flow for p in parts), parts[0].flow_zones,
+                   MatchEvents.concatenate([p.events for p in parts], key),
+                   [m for p in parts for m in p.matches], offsets)
+
+class Aggregator:
+    """Computes per-match partial results in a process pool and merges them.
+
+    The partial result of each match is cached on disk under cache_path, so
+    only matches which are new, changed or not yet aggregated with the same
+    parameters are computed.
+    """
+    def __init__(self, config):
+        """Construct an Aggregator.
+
+        Args:
+            config (dict): The StatsBomb configuration dictionary.
+        """
+        self.config = config
+        self.store = EventStore(config)
+        self.zones = tuple(config["aggregate_zones"])
+        self.workers = config["aggregate_workers"]
+
+    def partialFile(self, match_id, query):
+        """The path of the cached partial result of a match.
+
+        Args:
+            match_id (int): The match id.
+            query (dict): The parameters of the aggregation.
+
+        Returns:
+            str: The path.
+        """
+        digest = hashlib.sha1(json.dumps(
+            [AGGREGATE_VERSION, CACHE_VERSION, query],
+            sort_keys=True).encode()).hexdigest()[:16]
+        return os.path.join(self.config["cache_path"], AGGREGATE_DIRECTORY,
+                            str(match_id), digest + ".npz")
+
+    def query(self, bins, team=None, player=None, flow_zones=None):
+        """Collect the parameters of an aggregation."""
+        return { "bins" : list(bins), "zones" : list(self.zones),
+                 "flow_zones" : list(flow_zones or self.zones),
+                 "team" : team, "player" : player }
+
+    def aggregate(self, match_ids, bins, team=None, player=None,
+                  flow_zones=None):
+        """Aggregate the events of a team or player over several matches.
+
+        Args:
+            match_ids (list): The matches to aggregate.
+            bins ((int,int)): Number of histogram bins along the length and
+            width of the pitch.
+            team (int, optional): Only events of this team.
+            player (int, optional): Only events of this player.
+            flow_zones ((int,int), optional): Number of zones of the pass
+            flow along the length and width. Defaults to aggregate_zones.
+
+        Returns:
+            Aggregate: The merged results.
+        """
+        query = self.query(bins, team, player, flow_zones)
+        partials = {}
+        missing = []
+        for match_id in match_ids:
+            partial = self.readPartial(match_id, query)
+            if partial is None:
+                missing.append(match_id)
+            else:
+                partials[match_id] = partial
+
+        if len(missing) > 1 and self.workers != 1:
+            # spawn, so the workers do not inherit the Qt state of the caller
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.workers,
+                                     mp_context=context) as pool:
+                results = pool.map(computePartial, [self.config]*len(missing),
+                                   missing, [query]*len(missing))
+                partials.update(zip(missing, results))
+        else:
+            for match_id in missing:
+                partials[match_id] = computePartial(self.config, match_id,
+                                                    query)
+
+        key = ('aggregate', tuple(match_ids), team, player)
+        return Aggregate.merge([partials[m] for m in match_ids], key)
+
+    def readPartial(self, match_id, query):
+        """Read the cached partial result of a match.
+
+        Returns:
+            Aggregate: The partial result, or None if it is missing or stale.
+        """
+        try:
+            with np.load(self.partialFile(match_id, query)) as data:
+                if (tuple(data["source"]) !=
+                        self.store.sourceVersion(match_id)):
+                    return None
+                columns = { k : data["events_" + k] for k in EVENT_COLUMNS }
+                names = { k : { int(c) : n for c,n in v.items() } for k,v
+                          in json.loads(str(data["names"])).items() }
+                return Aggregate(data["histogram"], data["pass_zones"],
+                                 data["pass_flow"], tuple(query["flow_zones"]),
+                                 MatchEvents(columns, names, match_id),
+                                 [match_id])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def writePartial(self, match_id, query, partial, source):
+        """Cache the partial result of a match.
+
+        Args:
+            match_id (int): The match id.
+            query (dict): The parameters of the aggregation.
+            partial (Aggregate): The partial result.
+            source ((int,int)): Version of the events file the result was
+            computed from.
+        """
+        path = self.partialFile(match_id, query)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        arrays = { "events_" + k : v for k,v in partial.events.columns.items() }
+        self.store._replace(path, lambda f: np.savez(
+            f, histogram=partial.histogram, pass_zones=partial.pass_zones,
+            pass_flow=partial.pass_flow,
+            source=np.array(source), names=json.dumps(nameSnapshot(partial.events.names)),
+            **arrays))
+
+def computePartial(config, match_id, query):
+    """Compute and cache the partial result of one match.
+
+    Runs in the worker processes of Aggregator.aggregate.
+
+    Args:
+        config (dict): The StatsBomb configuration dictionary.
+        match_id (int): The match id.
+        query (dict): The parameters of the aggregation.
+
+    Returns:
+        Aggregate: The partial result.
+    """
+    aggregator = Aggregator(config)
+    # taken before loading, so a file modified meanwhile is redone next time
+    source = aggregator.store.sourceVersion(match_id)
+    events = aggregator.store.load(match_id)
+
+    mask = np.ones(len(events), dtype=bool)
+    if query["team"] is not None:
+        mask &= events['team'] == query["team"]
+    if query["player"] is not None:
+        mask &= events['player'] == query["player"]
+    events = events.select(mask)
+
+    partial = Aggregate(
+        eventHistogram(events['x'], events['y'], query["bins"]),
+        passZoneCounts(events, query["zones"]),
+        passFlow(events, query["flow_zones"]), tuple(query["flow_zones"]),
+        events.select(np.isin(events['type'], KEPT_TYPES)),
+        [match_id])
+    aggregator.writePartial(match_id, query, partial, source)
+    return partial
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Render overlays of every match under events_path to image files.
+
+Runs headless on the offscreen Qt platform, spreading the matches over a
+pool of processes. Images that are newer than both their events file and
+the configuration are skipped, so an interrupted run can be resumed.
+
+Usage: python BatchExport.py OUTPUT_DIR [--format png|svg] [--size WxH]
+       [--overlays passes,shots,heatmap] [--workers N] [--force]
+"""
+
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import json
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from EventStore import EventStore
+
+OVERLAYS = ('passes', 'shots', 'heatmap')
+
+# State of a worker process, created once by initWorker.
+_worker = {}
+
+def outputFile(output, match_id, overlay, fmt):
+    """The path of the image of one overlay of a match."""
+    return os.path.join(output, "{}_{}.{}".format(match_id, overlay, fmt))
+
+def isUpToDate(path, sources_mtime):
+    """Check whether an output file is newer than its sources.
+
+    Args:
+        path (str): The output file.
+        sources_mtime (int): Latest modification time of the sources, in
+        nanoseconds.
+
+    Returns:
+        bool: True if the file exists and is up to date.
+    """
+    try:
+        return os.stat(path).st_mtime_ns >= sources_mtime
+    except OSError:
+        return False
+
+def initWorker(config, size):
+    """Create the application and the pitch of a worker process.
+
+    Args:
+        config (dict): The configuration dictionary.
+        size ((int,int)): Width and height of the images.
+    """
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import Qt
+    from PitchWidget import PitchWidget
+
+    # PitchWidget is a QWidget, so a QApplication rather than a
+    # QGuiApplication is needed
+    app = QApplication([])
+    pitch = PitchWidget(config["Visualiser"]["Pitch"])
+    pitch.setAttribute(Qt.WA_DontShowOnScreen)
+    # every image is rendered at once at its size
+    pitch.progressive_resize = False
+    pitch.resize(*size)
+    pitch.show()
+
+    _worker["app"] = app
+    _worker["pitch"] = pitch
+    _worker["store"] = EventStore(config["StatsBomb"])
+
+def renderMatch(match_id, jobs, fmt):
+    """Render overlays of a match in a worker process.
+
+    Args:
+        match_id (int): The match id.
+        jobs (list): Pairs of overlay name and output file.
+        fmt (str): 'png' or 'svg'.
+
+    Returns:
+        int: The match id.
+    """
+    pitch = _worker["pitch"]
+    pitch.vector_output = fmt == 'svg'
+    pitch.setEvents(_worker["store"].load(match_id))
+    for overlay, path in jobs:
+        pitch.showPasses = overlay == 'passes'
+        pitch.showShots = overlay == 'shots'
+        pitch.showHeatmap = overlay == 'heatmap'
+        renderWidget(pitch, path, fmt)
+    return match_id
+
+def renderWidget(widget, path, fmt):
+    """Render a widget to an image file, replacing it atomically.
+
+    Args:
+        widget (QWidget): The widget to render.
+        path (str): The image file.
+        fmt (str): 'png' or 'svg'.
+    """
+    from PyQt5.QtGui import QImage, QPainter
+
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    if fmt == 'svg':
+        from PyQt5.QtSvg import QSvgGenerator
+        generator = QSvgGenerator()
+        generator.setFileName(tmp)
+        generator.setSize(widget.size())
+        generator.setViewBox(widget.rect())
+        painter = QPainter(generator)
+        widget.render(painter)
+        painter.end()
+    else:
+        image = QImage(widget.size(), QImage.Format_ARGB32_Premultiplied)
+        widget.render(image)
+        if not image.save(tmp, "PNG"):
+            raise OSError("Could not write {}".format(path))
+    os.replace(tmp, path)
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Render overlays of all matches to image files.")
+    parser.add_argument("output", help="directory for the images")
+    parser.add_argument("--config", default="./config.json")
+    parser.add_argument("--format", choices=('png', 'svg'), default='png')
+    parser.add_argument("--size", default="1050x680",
+                        help="image size as WIDTHxHEIGHT")
+    parser.add_argument("--overlays", default=",".join(OVERLAYS),
+                        help="comma separated overlays to render")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--force", action="store_true",
+                        help="render images which are up to date")
+    args = parser.parse_args(argv[1:])
+
+    with open(args.config) as f:
+        config = json.load(f)
+    size = tuple(int(v) for v in args.size.split("x"))
+    overlays = args.overlays.split(",")
+    for overlay in overlays:
+        if overlay not in OVERLAYS:
+            parser.error("unknown overlay {}".format(overlay))
+    os.makedirs(args.output, exist_ok=True)
+
+    # collect the images which are missing or older than their sources
+    store = EventStore(config["StatsBomb"])
+    config_mtime = os.stat(args.config).st_mtime_ns
+    tasks = []
+    for match_id in store.matchIds():
+        sources_mtime = max(store.sourceVersion(match_id)[0], config_mtime)
+        jobs = [ (o, outputFile(args.output, match_id, o, args.format))
+                 for o in overlays ]
+        if not args.force:
+            jobs = [ (o, p) for o,p in jobs
+                     if not isUpToDate(p, sources_mtime) ]
+        if jobs:
+            tasks.append((match_id, jobs))
+    print("{} matches to render".format(len(tasks)))
+
+    # spawn, so the workers do not inherit any state of this process
+    context = multiprocessing.get_context("spawn")
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context,
+                             initializer=initWorker,
+                             initargs=(config, size)) as pool:
+        futures = { pool.submit(renderMatch, m, jobs, args.format) : m
+                    for m,jobs in tasks }
+        for i, future in enumerate(as_completed(futures), 1):
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                print("Match {} failed: {}".format(futures[future], e))
+            else:
+                print("[{}/{}] {}".format(i, len(tasks), futures[future]))
+    return 1 if failed else 0
+
+if __name__=='__main__':
+    sys.exit(main(sys.argv))
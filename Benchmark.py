@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Time the drawing code of PitchWidget on synthetic events.
+
+Runs on the offscreen Qt platform. Results are written as JSON, and can be
+compared against a stored baseline to catch regressions in paint time or
+memory.
+
+Usage: python Benchmark.py [--output FILE] [--baseline FILE]
+       [--events 1000,10000,...] [--sizes 500x500,...] [--repeat N]
+"""
+
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import numpy as np
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage, QPainter, QColor
+from PyQt5.QtCore import QT_VERSION_STR
+from EventStore import (
+    MatchEvents, EVENT_COLUMNS, CATEGORICAL_COLUMNS, PASS_TYPE, SHOT_TYPE
+)
+from PaintingUtilities import drawArrow, drawArrows
+from PitchWidget import PitchWidget
+
+EVENT_COUNTS = (1000, 10000, 100000, 1000000)
+WIDGET_SIZES = ((500, 500), (1050, 680), (1920, 1080))
+
+# drawArrow is called once per arrow, so it is only timed up to this count.
+MAX_SINGLE_ARROWS = 10000
+
+# Share of each event type in the synthetic events.
+TYPE_SHARES = { PASS_TYPE : 0.5, SHOT_TYPE : 0.02, 43 : 0.3, 42 : 0.18 }
+
+# Regressions are reported when a result exceeds the baseline by more than
+# this fraction.
+TOLERANCE = 0.2
+
+def syntheticEvents(n, seed = 0):
+    """Generate random events in columnar form.
+
+    Args:
+        n (int): Number of events.
+        seed (int, optional): Seed of the random generator. Defaults to 0.
+
+    Returns:
+        MatchEvents: The events.
+    """
+    rng = np.random.default_rng(seed)
+    types = np.array(list(TYPE_SHARES))
+    type_column = rng.choice(types, n, p=list(TYPE_SHARES.values()))
+    shots = type_column == SHOT_TYPE
+    values = {
+        'x' : rng.uniform(0, 120, n),
+        'y' : rng.uniform(0, 80, n),
+        'end_x' : rng.uniform(0, 120, n),
+        'end_y' : rng.uniform(0, 80, n),
+        'minute' : np.sort(rng.integers(0, 95, n)),
+        'second' : rng.integers(0, 60, n),
+        'period' : np.where(np.arange(n) < n//2, 1, 2),
+        'type' : type_column,
+        'team' : rng.choice([1, 2], n),
+        'player' : rng.integers(1, 23, n),
+        'outcome' : np.where(shots, rng.choice([96, 97, 98, 100], n), -1),
+        'body_part' : np.where(shots, rng.choice([37, 38, 40, 70], n), -1),
+        'xg' : np.where(shots, rng.beta(1, 8, n), np.nan),
+        'recipient' : np.where(type_column == PASS_TYPE,
+                               rng.integers(1, 23, n), -1),
+        'position' : rng.integers(1, 26, n),
+    }
+    columns = { k : np.asarray(values[k], dtype=EVENT_COLUMNS[k][0])
+                for k in EVENT_COLUMNS }
+    names = { k : {} for k in CATEGORICAL_COLUMNS }
+    names['type'] = { PASS_TYPE : "Pass", SHOT_TYPE : "Shot",
+                      43 : "Carry", 42 : "Ball Receipt*" }
+    return MatchEvents(columns, names, ('synthetic', n, seed))
+
+def measure(function, repeat):
+    """Time a function and record its peak memory.
+
+    Args:
+        function (callable): The function to time.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        dict: Median and minimum time in ms, and peak memory in KiB.
+    """
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        function()
+        times.append((time.perf_counter()-t)*1000)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return { "median_ms" : statistics.median(times), "min_ms" : min(times),
+             "peak_kib" : peak/1024 }
+
+class ImagePainter:
+    """An image of the widget size and a painter on it."""
+    def __init__(self, pitch):
+        self.image = QImage(pitch.size(), QImage.Format_ARGB32_Premultiplied)
+        self.image.fill(QColor(0, 0, 0, 0))
+        self.painter = QPainter(self.image)
+        self.painter.setRenderHint(QPainter.Antialiasing)
+
+    def end(self):
+        self.painter.end()
+
+def benchmarks(pitch, events):
+    """Return the benchmarks for a pitch showing events.
+
+    Args:
+        pitch (PitchWidget): The pitch, resized to the benchmarked size.
+        events (MatchEvents): The events to draw.
+
+    Returns:
+        list: Pairs of benchmark name and function.
+    """
+    def paintEvent():
+        pitch.invalidatePitch()
+        pitch.compositor.invalidate()
+        image = QImage(pitch.size(), QImage.Format_ARGB32_Premultiplied)
+        pitch.render(image)
+
+    def paintEventCached():
+        image = QImage(pitch.size(), QImage.Format_ARGB32_Premultiplied)
+        pitch.render(image)
+
+    def onImage(draw):
+        def run():
+            target = ImagePainter(pitch)
+            draw(target.painter)
+            target.end()
+        return run
+
+    def heatmap(painter):
+        pitch.heatmaps.heatmaps.clear()
+        pitch.drawHeatmap(painter)
+
+    def network(painter):
+        pitch.networks.networks.clear()
+        pitch.drawNetwork(painter)
+
+    def stripes(painter):
+        t = pitch.pitch_transform
+        pitch.drawStripes(t.padding, t.abs_meas, painter)
+
+    passes = events['type'] == PASS_TYPE
+    x0, y0 = pitch.pitch_transform.map(events['x'][passes],
+                                       events['y'][passes])
+    x1, y1 = pitch.pitch_transform.map(events['end_x'][passes],
+                                       events['end_y'][passes])
+    m = min(len(x0), MAX_SINGLE_ARROWS)
+    single = list(zip(x0[:m].tolist(), y0[:m].tolist(),
+                      x1[:m].tolist(), y1[:m].tolist()))
+
+    def arrow(painter):
+        for a,b,c,d in single:
+            drawArrow(painter, a, b, c, d, pitch.pass_arrow_size)
+
+    def arrows(painter):
+        drawArrows(painter, x0, y0, x1, y1, pitch.pass_arrow_size)
+
+    return [("paintEvent", paintEvent),
+            ("paintEvent_cached_pitch", paintEventCached),
+            ("drawPitch", onImage(pitch.drawPitch)),
+            ("drawStripes", onImage(stripes)),
+            ("drawArrow[{}]".format(m), onImage(arrow)),
+            ("drawArrows", onImage(arrows)),
+            ("drawPasses", onImage(pitch.drawPasses)),
+            ("drawShots", onImage(pitch.drawShots)),
+            ("drawNetwork", onImage(network)),
+            ("drawHeatmap", onImage(heatmap))]
+
+def compare(results, baseline, tolerance):
+    """Compare results against a baseline.
+
+    Args:
+        results (list): The results of this run.
+        baseline (list): The results of the baseline run.
+        tolerance (float): Allowed relative increase.
+
+    Returns:
+        list: Descriptions of the regressions.
+    """
+    base = { (r["name"], r["events"], tuple(r["size"])) : r for r in baseline }
+    regressions = []
+    for r in results:
+        b = base.get((r["name"], r["events"], tuple(r["size"])))
+        if b is None:
+            continue
+        for metric in ("median_ms", "peak_kib"):
+            if r[metric] > b[metric]*(1+tolerance) and r[metric]-b[metric] > 1:
+                regressions.append("{} with {} events at {}x{}: {} {:.1f} "
+                                   "-> {:.1f}".format(r["name"], r["events"],
+                                   *r["size"], metric, b[metric], r[metric]))
+    return regressions
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the drawing code of PitchWidget.")
+    parser.add_argument("--config", default="./config.json")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--baseline", help="results to compare against")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--events",
+                        default=",".join(str(n) for n in EVENT_COUNTS))
+    parser.add_argument("--sizes",
+                        default=",".join("{}x{}".format(*s)
+                                         for s in WIDGET_SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv[1:])
+
+    with open(args.config) as f:
+        config = json.load(f)
+    counts = [int(n) for n in args.events.split(",")]
+    sizes = [tuple(int(v) for v in s.split("x")) for s in args.sizes.split(",")]
+
+    app = QApplication(argv)
+    pitch = PitchWidget(config["Visualiser"]["Pitch"])
+    pitch.showPasses = pitch.showShots = pitch.showHeatmap = True
+    pitch.showNetwork = True
+
+    results = []
+    for n in counts:
+        events = syntheticEvents(n)
+        pitch.setEvents(events)
+        for size in sizes:
+            pitch.resize(*size)
+            pitch.invalidateGeometry()
+            for name, function in benchmarks(pitch, events):
+                result = measure(function, args.repeat)
+                result.update(name=name, events=n, size=list(size))
+                results.append(result)
+                print("{:<24} {:>8} {:>4}x{:<4} {:>10.2f} ms {:>10.0f} KiB"
+                      .format(name, n, *size, result["median_ms"],
+                              result["peak_kib"]))
+
+    with open(args.output, "w") as f:
+        json.dump({ "python" : platform.python_version(),
+                    "qt" : QT_VERSION_STR,
+                    "numpy" : np.__version__,
+                    "machine" : platform.machine(),
+                    "repeat" : args.repeat,
+                    "results" : results }, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"],
+                                  args.tolerance)
+        for r in regressions:
+            print("REGRESSION", r)
+        return 1 if regressions else 0
+    return 0
+
+if __name__=='__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+from PyQt5.QtGui import QPixmap, QPainter
+from PyQt5.QtCore import Qt
+
+# Default number of widget sizes whose pixmaps are kept.
+SIZE_CACHE_ENTRIES = 3
+
+def sizeKey(size, ratio):
+    """Return the key of a widget size and device pixel ratio."""
+    return (size.width(), size.height(), ratio)
+
+class SizeCache:
+    """Keeps what was rendered for the few most recently used widget sizes,
+    so resizing back and forth does not render again."""
+    def __init__(self, entries = SIZE_CACHE_ENTRIES):
+        """Construct an empty cache.
+
+        Args:
+            entries (int, optional): Maximum number of sizes.
+            Defaults to SIZE_CACHE_ENTRIES.
+        """
+        self.entries = entries
+        self.items = OrderedDict()
+
+    def get(self, key):
+        """Return the item of a size key, or None if it is not cached."""
+        item = self.items.get(key)
+        if item is not None:
+            self.items.move_to_end(key)
+        return item
+
+    def put(self, key, item):
+        """Cache the item of a size key, evicting the least recently used."""
+        self.items[key] = item
+        self.items.move_to_end(key)
+        while len(self.items) > self.entries:
+            self.items.popitem(last=False)
+
+    def clear(self):
+        self.items.clear()
+
+class Layer:
+    """One overlay, cached in transparent pixmaps of the recent widget sizes
+    until it is invalidated."""
+    def __init__(self, name, draw, order, opacity, entries = SIZE_CACHE_ENTRIES):
+        """Construct a Layer.
+
+        Args:
+            name (str): Name of the layer, e.g. 'passes'.
+            draw (callable): Called with a painter to draw the overlay.
+            order (int): Layers with a lower order are drawn first.
+            opacity (float): Opacity of the layer, from 0 to 1.
+            entries (int, optional): Number of sizes kept.
+            Defaults to SIZE_CACHE_ENTRIES.
+        """
+        self.name = name
+        self.draw = draw
+        self.order = order
+        self.opacity = opacity
+        self.pixmaps = SizeCache(entries)
+
+    def render(self, size, ratio):
+        """Draw the overlay into a new pixmap and cache it.
+
+        Args:
+            size (QSize): Size of the pixmap in device independent pixels.
+            ratio (float): The device pixel ratio.
+
+        Returns:
+            QPixmap: The pixmap.
+        """
+        pixmap = QPixmap(size*ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        self.draw(painter)
+        painter.end()
+        self.pixmaps.put(sizeKey(size, ratio), pixmap)
+        return pixmap
+
+class Compositor:
+    """Composites cached overlay layers in a configurable order.
+
+    Only visible layers which are not cached at the current size are drawn
+    again, so showing or hiding a layer costs one composite pass.
+    """
+    def __init__(self, config, draws, entries = SIZE_CACHE_ENTRIES):
+        """Construct a Compositor.
+
+        Args:
+            config (dict): Mapping from layer name to a dictionary with the
+            order and opacity of the layer.
+            draws (dict): Mapping from layer name to its draw function.
+            entries (int, optional): Number of sizes kept per layer.
+            Defaults to SIZE_CACHE_ENTRIES.
+        """
+        self.layers = { name : Layer(name, draw, config[name]["order"],
+                                     config[name]["opacity"], entries)
+                        for name, draw in draws.items() }
+        self.ordered = sorted(self.layers.values(), key=lambda l: l.order)
+
+    def invalidate(self, *names):
+        """Discard the pixmaps of layers, or of all layers if no name is
+        given."""
+        for name in names or self.layers:
+            self.layers[name].pixmaps.clear()
+
+    def setOpacity(self, name, opacity):
+        """Set the opacity of a layer, which needs no redraw."""
+        self.layers[name].opacity = opacity
+
+    def cached(self, size, ratio, visible):
+        """Return the cached pixmaps of the visible layers at a size, in
+        order with their opacities, or None if any is missing."""
+        key = sizeKey(size, ratio)
+        pixmaps = []
+        for layer in self.ordered:
+            if layer.name in visible:
+                pixmap = layer.pixmaps.get(key)
+                if pixmap is None:
+                    return None
+                pixmaps.append((pixmap, layer.opacity))
+        return pixmaps
+
+    def composite(self, painter, size, ratio, visible, profiler):
+        """Draw the visible layers, rendering the missing ones first.
+
+        Args:
+            painter (QPainter): The painter of the target.
+            size (QSize): Size of the target in device independent pixels.
+            ratio (float): The device pixel ratio.
+            visible (set): Names of the visible layers.
+            profiler (PaintProfiler): Times the rendered layers.
+        """
+        key = sizeKey(size, ratio)
+        for layer in self.ordered:
+            if layer.name not in visible:
+                continue
+            pixmap = layer.pixmaps.get(key)
+            if pixmap is None:
+                with profiler.layer(layer.name):
+                    pixmap = layer.render(size, ratio)
+            with profiler.layer("composite"):
+                painter.setOpacity(layer.opacity)
+                painter.drawPixmap(0, 0, pixmap)
+        painter.setOpacity(1.0)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# Columns filtered by a set of codes.
+CODE_FILTERS = ('team', 'player', 'period', 'type', 'outcome')
+
+# Name of the filter on a range of minutes.
+MINUTE_FILTER = 'minute'
+
+class EventFilter:
+    """Filters events by team, player, period, type, outcome and a range of
+    minutes.
+
+    Every filter is evaluated as a boolean mask over the event columns. The
+    masks are cached per filter, and the combination of the code filters is
+    cached separately from the minute range, so changing the range only
+    computes the range mask and one bitwise and.
+    """
+    def __init__(self):
+        self.values = {}
+        self.setEvents(None)
+
+    def setEvents(self, events):
+        """Set the events to filter, dropping the cached masks.
+
+        Args:
+            events (MatchEvents): The events, or None.
+        """
+        self.events = events
+        self.masks = {}
+        self._codes_mask = None
+        self._minute_order = None
+
+    def set(self, name, value):
+        """Set or clear a filter.
+
+        Args:
+            name (str): One of CODE_FILTERS or MINUTE_FILTER.
+            value: For code filters a code or a collection of codes, for the
+            minute filter a pair of first and last minute. None clears the
+            filter.
+        """
+        if name not in CODE_FILTERS and name != MINUTE_FILTER:
+            raise ValueError("Unknown filter {}".format(name))
+        if value is not None:
+            value = (tuple(value) if name == MINUTE_FILTER else
+                     tuple(sorted(np.atleast_1d(value).tolist())))
+        if self.values.get(name) == value:
+            return
+        if value is None:
+            self.values.pop(name, None)
+        else:
+            self.values[name] = value
+        self.masks.pop(name, None)
+        if name != MINUTE_FILTER:
+            self._codes_mask = None
+
+    def get(self, name):
+        """Return the value of a filter, or None if it is not set."""
+        return self.values.get(name)
+
+    def isActive(self):
+        """Whether any filter is set."""
+        return bool(self.values)
+
+    def key(self):
+        """Return a hashable description of the set filters."""
+        return tuple(sorted(self.values.items()))
+
+    def codeMask(self, name):
+        """Return the mask of a code filter."""
+        if name not in self.masks:
+            codes = self.values[name]
+            column = self.events[name]
+            self.masks[name] = (column == codes[0] if len(codes) == 1
+                                else np.isin(column, codes))
+        return self.masks[name]
+
+    def minuteMask(self):
+        """Return the mask of the minute range.
+
+        The minutes are sorted once per set of events, after which the
+        range is found by binary search.
+        """
+        if MINUTE_FILTER not in self.masks:
+            minutes = self.events['minute']
+            if self._minute_order is None:
+                if np.all(minutes[1:] >= minutes[:-1]):
+                    self._minute_order = (None, minutes)
+                else:
+                    order = np.argsort(minutes, kind='stable')
+                    self._minute_order = (order, minutes[order])
+            order, sorted_minutes = self._minute_order
+            first, last = self.values[MINUTE_FILTER]
+            i0 = np.searchsorted(sorted_minutes, first, side='left')
+            i1 = np.searchsorted(sorted_minutes, last, side='right')
+            mask = np.zeros(len(minutes), dtype=bool)
+            if order is None:
+                mask[i0:i1] = True
+            else:
+                mask[order[i0:i1]] = True
+            self.masks[MINUTE_FILTER] = mask
+        return self.masks[MINUTE_FILTER]
+
+    def mask(self):
+        """Return the mask of the events passing all filters.
+
+        Returns:
+            numpy.ndarray: Boolean mask, or None if no filter is set.
+        """
+        if self.events is None or not self.values:
+            return None
+        if self._codes_mask is None:
+            mask = None
+            for name in CODE_FILTERS:
+                if name in self.values:
+                    m = self.codeMask(name)
+                    mask = m.copy() if mask is None else np.logical_and(
+                        mask, m, out=mask)
+            self._codes_mask = (mask,)
+        mask = self._codes_mask[0]
+        if MINUTE_FILTER in self.values:
+            minutes = self.minuteMask()
+            mask = minutes if mask is None else mask & minutes
+        return mask
+
+    def apply(self, events):
+        """Return the events passing all filters.
+
+        Args:
+            events (MatchEvents): The events, which become the filtered
+            events if they are not already.
+
+        Returns:
+            MatchEvents: The filtered events, keyed by the key of the events
+            and the filters, or the events themselves if no filter is set.
+        """
+        if events is not self.events:
+            self.setEvents(events)
+        mask = self.mask()
+        if mask is None:
+            return events
+        filtered = events.select(mask)
+        filtered.key = (events.key, self.key())
+        return filtered
@@ -0,0 +1,896 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import struct
+import sys
+import threading
+import numpy as np
+
+# Bump whenever the layout of the cached columns changes, so that stale
+# caches are rebuilt instead of being misread.
+CACHE_VERSION = 5
+
+# Columns stored in the cache, with their dtype and the value used when an
+# event does not carry the field.
+EVENT_COLUMNS = {
+    'x' : (np.float32, np.nan),
+    'y' : (np.float32, np.nan),
+    'end_x' : (np.float32, np.nan),
+    'end_y' : (np.float32, np.nan),
+    'minute' : (np.int16, -1),
+    'second' : (np.int8, -1),
+    'period' : (np.int8, -1),
+    'type' : (np.int16, -1),
+    'team' : (np.int32, -1),
+    'player' : (np.int32, -1),
+    'outcome' : (np.int16, -1),
+    'body_part' : (np.int16, -1),
+    'xg' : (np.float32, np.nan),
+    'recipient' : (np.int32, -1),
+    'position' : (np.int8, -1),
+}
+
+# Categorical columns are coded by their StatsBomb id, which keeps the codes
+# consistent between matches. The names are kept in a lookup table. The
+# pass recipient is coded like the player and shares its names.
+CATEGORICAL_COLUMNS = ('type', 'team', 'player', 'outcome', 'body_part',
+                       'position')
+
+# Categorical columns nested in the field of the event type.
+NESTED_COLUMNS = ('outcome', 'body_part')
+
+# Nested event fields which may carry an end location.
+END_LOCATION_FIELDS = ('pass', 'carry', 'shot', 'goalkeeper')
+
+# StatsBomb ids of event types
+PASS_TYPE = 30
+SHOT_TYPE = 16
+SUBSTITUTION_TYPE = 19
+
+META_FILE = "meta.json"
+
+# Bytes reserved for the header of the cached columns while they are written
+# batch by batch; the header is rewritten with the length at the end.
+NPY_HEADER_SIZE = 128
+
+# Initial capacity of an EventBuffer, in events.
+BUFFER_CAPACITY = 4096
+
+# Default number of events per batch when streaming an events file.
+BATCH_SIZE = 2000
+
+# Number of characters read from an events file at a time.
+CHUNK_SIZE = 1 << 16
+
+# Longest undecodable text, in characters, before an events file is taken
+# to be invalid rather than not read far enough. StatsBomb events are a few
+# thousand characters at most.
+MAX_EVENT_SIZE = CHUNK_SIZE
+
+def iterEventBatches(path, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE,
+                     max_event_size=MAX_EVENT_SIZE):
+    """Incrementally parse a StatsBomb events file.
+
+    The file is read in chunks and decoded one event at a time, so memory
+    use is bounded by the batch size rather than by the size of the file.
+
+    Args:
+        path (str): Path of the events file, a JSON array of events.
+        batch_size (int, optional): Maximum number of events per batch.
+        Defaults to BATCH_SIZE.
+        chunk_size (int, optional): Number of characters read at a time.
+        Defaults to CHUNK_SIZE.
+        max_event_size (int, optional): Number of characters an event may
+        span. Defaults to MAX_EVENT_SIZE.
+
+    Yields:
+        list: The next batch of events, as dictionaries.
+
+    Raises:
+        ValueError: If the file is not a JSON array of objects.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        # number of characters of the file before buf
+        offset = 0
+        eof = False
+        # the next token: '[', an event or ']', ',' or ']', or an event
+        expect = "["
+        batch = []
+
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos == len(buf):
+                if eof:
+                    raise ValueError("Unexpected end of events file.")
+                offset += len(buf)
+                buf = f.read(chunk_size)
+                pos = 0
+                eof = not buf
+                continue
+
+            c = buf[pos]
+            if expect == "[":
+                if c != "[":
+                    raise ValueError("Events file must contain a JSON array.")
+                expect = "first"
+                pos += 1
+                continue
+            if c == "]" and expect in ("first", "separator"):
+                break
+            if expect == "separator":
+                if c != ",":
+                    raise ValueError("Expected ',' or ']' at character {} of "
+                                     "the events file.".format(offset+pos))
+                expect = "event"
+                pos += 1
+                continue
+
+            try:
+                event, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as e:
+                # The event may be incomplete, read another chunk unless
+                # the buffer already holds more than any event.
+                chunk = ("" if len(buf)-pos >= max_event_size
+                         else f.read(chunk_size))
+                if not chunk:
+                    raise ValueError("Invalid event at character {} of the "
+                                     "events file: {}".format(offset+e.pos,
+                                                              e.msg)) from e
+                offset += pos
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+
+            if not isinstance(event, dict):
+                raise ValueError("Expected an event at character {} of the "
+                                 "events file.".format(offset+pos))
+            batch.append(event)
+            expect = "separator"
+            pos = end
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+def endLocation(event):
+    """Return the end location of an event, if it has one.
+
+    Args:
+        event (dict): A StatsBomb event.
+
+    Returns:
+        list: The end location, or None if the event has none.
+    """
+    for field in END_LOCATION_FIELDS:
+        sub = event.get(field)
+        if sub and 'end_location' in sub:
+            return sub['end_location']
+    return None
+
+def nestedField(event, field):
+    """Return a field nested in the field of the event type.
+
+    E.g. a shot carries its outcome in event['shot']['outcome'].
+
+    Args:
+        event (dict): A StatsBomb event.
+        field (str): Name of the nested field.
+
+    Returns:
+        The value of the field, or None if the event has none.
+    """
+    for v in event.values():
+        if isinstance(v, dict) and field in v:
+            return v[field]
+    return None
+
+class NameTable(dict):
+    """Names of the categorical codes, shared by all events of a store.
+
+    Maps every categorical column to a dictionary from code to name, like
+    the names of MatchEvents. The names are interned, so a name read from
+    many matches is held once.
+
+    The loader threads of a store add names while others read them, so
+    names are added under a lock, and anything iterating over the table
+    should iterate over a snapshot.
+    """
+    def __init__(self, names=None):
+        """Construct a NameTable.
+
+        Args:
+            names (dict, optional): Names to add, as in MatchEvents.
+            Defaults to None.
+        """
+        super().__init__({ k : {} for k in CATEGORICAL_COLUMNS })
+        self.lock = threading.Lock()
+        if names is not None:
+            self.merge(names)
+
+    def __reduce__(self):
+        # the lock can not be pickled, e.g. when events are returned from
+        # a worker process
+        return (NameTable, (self.snapshot(),))
+
+    def _intern(self, column, code, name):
+        codes = self[column]
+        code = int(code)
+        if code not in codes and name is not None:
+            codes[code] = sys.intern(name)
+
+    def intern(self, column, code, name):
+        """Add the name of a code, unless the code is already known."""
+        with self.lock:
+            self._intern(column, code, name)
+
+    def merge(self, names):
+        """Add the names of another name table or MatchEvents."""
+        names = nameSnapshot(names)
+        with self.lock:
+            for k,v in names.items():
+                for code, name in v.items():
+                    self._intern(k, code, name)
+
+    def addLineups(self, lineups):
+        """Add the team, player and position names of a lineups file.
+
+        Args:
+            lineups (list): The teams of a StatsBomb lineups file, as parsed
+            from JSON.
+        """
+        with self.lock:
+            for team in lineups:
+                self._intern('team', team['team_id'], team.get('team_name'))
+                for player in team.get('lineup', []):
+                    self._intern('player', player['player_id'],
+                                 player.get('player_name'))
+                    for position in player.get('positions', []):
+                        self._intern('position', position['position_id'],
+                                     position.get('position'))
+
+    def snapshot(self):
+        """Return a copy of the names which is safe to iterate over.
+
+        Returns:
+            dict: Mapping from column to a dictionary from code to name.
+        """
+        with self.lock:
+            return { k : dict(v) for k,v in self.items() }
+
+def nameSnapshot(names):
+    """Return names which are safe to iterate over.
+
+    Args:
+        names (dict): A NameTable, or the names of MatchEvents which are
+        not shared.
+
+    Returns:
+        dict: A snapshot of a NameTable, otherwise the names themselves.
+    """
+    return names.snapshot() if isinstance(names, NameTable) else names
+
+def npyHeader(dtype, length):
+    """Return the .npy header of a one-dimensional array.
+
+    The header is padded to NPY_HEADER_SIZE bytes, so a header written
+    before the length is known can be overwritten in place.
+
+    Args:
+        dtype (numpy.dtype): The dtype of the array.
+        length (int): The length of the array.
+
+    Returns:
+        bytes: The header, in version 1.0 of the format.
+    """
+    magic = np.lib.format.magic(1, 0)
+    header = "{{'descr': {!r}, 'fortran_order': False, 'shape': ({},), }}".format(
+        np.lib.format.dtype_to_descr(np.dtype(dtype)), length)
+    pad = NPY_HEADER_SIZE - len(magic) - 2 - len(header) - 1
+    if pad < 0:
+        raise ValueError("Header of {} events does not fit".format(length))
+    header = (header + " "*pad + "\n").encode("latin1")
+    return magic + struct.pack("<H", len(header)) + header
+
+def namesSize(names):
+    """Estimate the memory held by name tables in bytes.
+
+    Args:
+        names (dict): Mapping from column to a dictionary from code to name.
+
+    Returns:
+        int: The size of the dictionaries, codes and names, counting every
+        object once.
+    """
+    seen = set()
+    size = sys.getsizeof(names)
+    for codes in nameSnapshot(names).values():
+        size += sys.getsizeof(codes)
+        for code, name in codes.items():
+            for item in (code, name):
+                if id(item) not in seen:
+                    seen.add(id(item))
+                    size += sys.getsizeof(item)
+    return size
+
+class EventView:
+    """One event, reading its fields from the columns of MatchEvents.
+
+    Views hold no event data of their own, so iterating over a match costs
+    no dictionary per event. The columns are read as attributes, e.g.
+    view.minute.
+    """
+    __slots__ = ('events', 'index')
+
+    def __init__(self, events, index):
+        """Construct an EventView.
+
+        Args:
+            events (MatchEvents): The events.
+            index (int): Index of the event.
+
+        Raises:
+            IndexError: If there is no event at the index.
+        """
+        n = len(events)
+        if not -n <= index < n:
+            raise IndexError("Event index {} out of range for {} events"
+                             .format(index, n))
+        self.events = events
+        self.index = index % n
+
+    def __getattr__(self, column):
+        # unset slots end up here too, e.g. while copying or unpickling,
+        # and reading them again would recurse
+        if column in EventView.__slots__:
+            raise AttributeError(column)
+        try:
+            return self.events.columns[column][self.index].item()
+        except KeyError:
+            raise AttributeError(column) from None
+
+    def name(self, column):
+        """Look up the name of a categorical field of the event.
+
+        Args:
+            column (str): Name of a categorical column.
+
+        Returns:
+            str: The name, or None if the code is unknown.
+        """
+        return self.events.name(column, self.events.columns[column][self.index])
+
+    def __repr__(self):
+        return "EventView({})".format(", ".join(
+            "{}={}".format(k, v[self.index])
+            for k,v in self.events.columns.items()))
+
+class MatchEvents:
+    """Columnar event data, with one NumPy array per column."""
+    def __init__(self, columns, names, key=None):
+        """Construct MatchEvents from columns.
+
+        Args:
+            columns (dict): Mapping from column name to NumPy array.
+            names (dict): Mapping from categorical column name to a
+            dictionary from code to name.
+            key (hashable, optional): Identifies the data, e.g. the
+            match id. Defaults to None.
+        """
+        self.columns = columns
+        self.names = names
+        self.key = key
+
+    def __len__(self):
+        return len(self.columns['x'])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield EventView(self, i)
+
+    def event(self, i):
+        """Return a view of the event at index i."""
+        return EventView(self, i)
+
+    def memoryUsage(self):
+        """Report the memory held by the events.
+
+        Memory-mapped columns are counted at their full size, although only
+        the pages which have been read are resident.
+
+        Returns:
+            dict: Bytes used by each column, by the name tables under
+            'names', and in total under 'total'.
+        """
+        report = { k : v.nbytes for k,v in self.columns.items() }
+        report['names'] = namesSize(self.names)
+        report['total'] = sum(report.values())
+        return report
+
+    def name(self, column, code):
+        """Look up the name of a categorical code.
+
+        Args:
+            column (str): Name of a categorical column.
+            code (int): The code to look up.
+
+        Returns:
+            str: The name, or None if the code is unknown.
+        """
+        return self.names[column].get(int(code))
+
+    def select(self, mask):
+        """Return the events selected by a boolean mask or index array.
+
+        Args:
+            mask (numpy.ndarray): Boolean mask or array of indices.
+
+        Returns:
+            MatchEvents: The selected events.
+        """
+        return MatchEvents({ k : v[mask] for k,v in self.columns.items()},
+                           self.names, self.key)
+
+    @classmethod
+    def fromEvents(cls, events, key=None):
+        """Convert a list of StatsBomb events into columns.
+
+        Args:
+            events (list): StatsBomb events as parsed from JSON.
+            key (hashable, optional): Identifies the data. Defaults to None.
+
+        Returns:
+            MatchEvents: The events in columnar form.
+        """
+        values = { k : [] for k in EVENT_COLUMNS }
+        names = { k : {} for k in CATEGORICAL_COLUMNS }
+        nan = float('nan')
+
+        for event in events:
+            location = event.get('location') or (nan, nan)
+            end = endLocation(event) or (nan, nan)
+            values['x'].append(location[0])
+            values['y'].append(location[1])
+            values['end_x'].append(end[0])
+            values['end_y'].append(end[1])
+            values['minute'].append(event.get('minute', -1))
+            values['second'].append(event.get('second', -1))
+            values['period'].append(event.get('period', -1))
+            xg = event['shot'].get('statsbomb_xg') if 'shot' in event else None
+            values['xg'].append(nan if xg is None else xg)
+            recipient = (event['pass'].get('recipient') if 'pass' in event
+                         else None)
+            if recipient is None:
+                values['recipient'].append(-1)
+            else:
+                values['recipient'].append(recipient['id'])
+                names['player'][recipient['id']] = recipient['name']
+            for k in CATEGORICAL_COLUMNS:
+                item = (nestedField(event, k) if k in NESTED_COLUMNS
+                        else event.get(k))
+                if item is None:
+                    values[k].append(-1)
+                else:
+                    values[k].append(item['id'])
+                    names[k][item['id']] = item['name']
+
+        columns = { k : np.asarray(values[k], dtype=EVENT_COLUMNS[k][0])
+                    for k in EVENT_COLUMNS }
+        return cls(columns, names, key)
+
+    @classmethod
+    def concatenate(cls, parts, key=None):
+        """Concatenate several MatchEvents into one.
+
+        Args:
+            parts (list): The MatchEvents to concatenate.
+            key (hashable, optional): Identifies the data. Defaults to None.
+
+        Returns:
+            MatchEvents: The concatenated events.
+        """
+        columns = { k : np.concatenate([p.columns[k] for p in parts])
+                    if parts else np.empty(0, dtype=v[0])
+                    for k,v in EVENT_COLUMNS.items() }
+        if parts and all(p.names is parts[0].names for p in parts):
+            # events of one store share its name table
+            return cls(columns, parts[0].names, key)
+        names = { k : {} for k in CATEGORICAL_COLUMNS }
+        for p in parts:
+            part_names = nameSnapshot(p.names)
+            for k in CATEGORICAL_COLUMNS:
+                names[k].update(part_names[k])
+        return cls(columns, names, key)
+
+class EventBuffer:
+    """Events grown by appending batches.
+
+    The columns are allocated with spare capacity, which is doubled when it
+    runs out, so appending the batches of a match copies every event a
+    constant number of times on average. The events appended so far are
+    views of the columns.
+    """
+    def __init__(self, key=None):
+        """Construct an empty EventBuffer.
+
+        Args:
+            key (hashable, optional): Identifies the data. Defaults to None.
+        """
+        self.key = key
+        self.columns = { k : np.empty(BUFFER_CAPACITY, dtype=v[0])
+                         for k,v in EVENT_COLUMNS.items() }
+        self.names = None
+        self._own_names = False
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def append(self, batch):
+        """Append a batch of events.
+
+        Args:
+            batch (MatchEvents): The events to append.
+        """
+        n = self.length + len(batch)
+        capacity = len(self.columns['x'])
+        if n > capacity:
+            capacity = max(n, 2*capacity)
+            for k,v in self.columns.items():
+                grown = np.empty(capacity, dtype=v.dtype)
+                grown[:self.length] = v[:self.length]
+                self.columns[k] = grown
+        for k,v in self.columns.items():
+            v[self.length:n] = batch.columns[k]
+        self.length = n
+
+        if self.names is None:
+            # batches of one store share its name table
+            self.names = batch.names
+        elif batch.names is not self.names:
+            if not self._own_names:
+                self.names = { k : dict(v) for k,v in
+                               nameSnapshot(self.names).items() }
+                self._own_names = True
+            for k,v in nameSnapshot(batch.names).items():
+                self.names[k].update(v)
+
+    def events(self):
+        """Return the events appended so far.
+
+        Returns:
+            MatchEvents: Views of the columns, which later appends leave
+            unchanged.
+        """
+        names = (self.names if self.names is not None else
+                 { k : {} for k in CATEGORICAL_COLUMNS })
+        return MatchEvents({ k : v[:self.length]
+                             for k,v in self.columns.items() },
+                           names, self.key)
+
+class CacheWriter:
+    """Writes the cache of a match batch by batch, while its events file is
+    parsed.
+
+    The columns are appended to temporary files, which replace the cache
+    once the last batch has been written, so no more than a batch is held
+    in memory.
+    """
+    def __init__(self, store, match_id, mtime, size):
+        """Open the temporary files of the cache.
+
+        Args:
+            store (EventStore): The store owning the cache.
+            match_id (int): The match id.
+            mtime (int): Modification time of the events file.
+            size (int): Size of the events file.
+        """
+        self.store = store
+        self.directory = store.cacheDirectory(match_id)
+        self.mtime = mtime
+        self.size = size
+        self.length = 0
+        self.names = { k : {} for k in CATEGORICAL_COLUMNS }
+        self.files = {}
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            for k,v in EVENT_COLUMNS.items():
+                path = "{}.{}.{}.tmp".format(
+                    os.path.join(self.directory, k + ".npy"), os.getpid(),
+                    threading.get_ident())
+                self.files[k] = (path, open(path, "wb"))
+                self.files[k][1].write(npyHeader(v[0], 0))
+        except OSError:
+            self.abort()
+            raise
+
+    def append(self, events):
+        """Write a batch of events.
+
+        Args:
+            events (MatchEvents): The batch, whose names are those of the
+            batch only.
+        """
+        for k,(_,f) in self.files.items():
+            f.write(np.ascontiguousarray(
+                events.columns[k], dtype=EVENT_COLUMNS[k][0]).tobytes())
+        for k in CATEGORICAL_COLUMNS:
+            self.names[k].update(events.names[k])
+        self.length += len(events)
+
+    def commit(self):
+        """Replace the cache with the written batches."""
+        for k,(_,f) in self.files.items():
+            f.seek(0)
+            f.write(npyHeader(EVENT_COLUMNS[k][0], self.length))
+            f.close()
+
+        # Invalidate the old cache first; the metadata is written last, so
+        # an interrupted build is never mistaken for a valid cache.
+        meta_file = os.path.join(self.directory, META_FILE)
+        if os.path.exists(meta_file):
+            os.remove(meta_file)
+
+        for k,(path,_) in list(self.files.items()):
+            os.replace(path, os.path.join(self.directory, k + ".npy"))
+            del self.files[k]
+
+        meta = {
+            "version" : CACHE_VERSION,
+            "source_mtime_ns" : self.mtime,
+            "source_size" : self.size,
+            "length" : self.length,
+            "names" : self.names,
+        }
+        self.store._replace(meta_file,
+                            lambda f: f.write(json.dumps(meta).encode()))
+
+    def abort(self):
+        """Remove the temporary files which have not replaced the cache."""
+        for path, f in self.files.values():
+            f.close()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.files = {}
+
+class EventStore:
+    """Loads StatsBomb events through a columnar, memory-mapped cache.
+
+    Each events file is converted once into one .npy file per column. Later
+    loads memory-map those files instead of parsing the JSON again. The
+    cache of a match is rebuilt when the modification time or size of its
+    events file changes.
+
+    The names of the categorical codes of all loaded matches are interned
+    in one NameTable, together with the names in their lineups files.
+    """
+    def __init__(self, config):
+        """Construct an EventStore.
+
+        Args:
+            config (dict): The StatsBomb configuration dictionary.
+        """
+        self.events_path = config["events_path"]
+        self.lineups_path = config["lineups_path"]
+        self.cache_path = config["cache_path"]
+        self.names = NameTable()
+        self._lineups_read = set()
+
+    def eventsFile(self, match_id):
+        """The path of the events file of a match."""
+        return os.path.join(self.events_path, "{}.json".format(match_id))
+
+    def cacheDirectory(self, match_id):
+        """The path of the cache directory of a match."""
+        return os.path.join(self.cache_path, str(match_id))
+
+    def lineupsFile(self, match_id):
+        """The path of the lineups file of a match."""
+        return os.path.join(self.lineups_path, "{}.json".format(match_id))
+
+    def readLineups(self, match_id):
+        """Add the names in the lineups file of a match to the name table.
+
+        Each file is read once; a missing file is skipped.
+        """
+        if match_id in self._lineups_read:
+            return
+        self._lineups_read.add(match_id)
+        try:
+            with open(self.lineupsFile(match_id), encoding="utf-8") as f:
+                self.names.addLineups(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    def matchIds(self):
+        """Return the ids of all matches with an events file.
+
+        Returns:
+            list: Sorted list of match ids.
+        """
+        ids = []
+        for entry in os.scandir(self.events_path):
+            name, ext = os.path.splitext(entry.name)
+            if ext == ".json" and name.isdigit():
+                ids.append(int(name))
+        return sorted(ids)
+
+    def sourceVersion(self, match_id):
+        """Return the version of the events file of a match.
+
+        Args:
+            match_id (int): The match id.
+
+        Returns:
+            (int,int): Modification time in nanoseconds and size in bytes.
+        """
+        st = os.stat(self.eventsFile(match_id))
+        return st.st_mtime_ns, st.st_size
+
+    def readMeta(self, match_id):
+        """Read the cache metadata of a match.
+
+        Returns:
+            dict: The metadata, or None if there is no readable cache.
+        """
+        try:
+            with open(os.path.join(self.cacheDirectory(match_id),
+                                   META_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def isCached(self, match_id, meta=None):
+        """Check whether the cache of a match is up to date.
+
+        Args:
+            match_id (int): The match id.
+            meta (dict, optional): Already read metadata. Defaults to None.
+
+        Returns:
+            bool: True if the cache can be used.
+        """
+        meta = self.readMeta(match_id) if meta is None else meta
+        if meta is None or meta.get("version") != CACHE_VERSION:
+            return False
+        mtime, size = self.sourceVersion(match_id)
+        return (meta["source_mtime_ns"] == mtime and
+                meta["source_size"] == size)
+
+    def load(self, match_id):
+        """Load the events of a match, building the cache if needed.
+
+        Args:
+            match_id (int): The match id.
+
+        Returns:
+            MatchEvents: The events, memory-mapped from the cache.
+        """
+        meta = self.readMeta(match_id)
+        if not self.isCached(match_id, meta):
+            meta = self.build(match_id)
+        return self._open(match_id, meta)
+
+    def loadMatches(self, match_ids):
+        """Load the events of several matches into memory.
+
+        Args:
+            match_ids (list): The match ids.
+
+        Returns:
+            MatchEvents: The events of the matches in order, sharing the
+            name table of the store.
+        """
+        return MatchEvents.concatenate([ self.load(m) for m in match_ids ],
+                                       tuple(match_ids))
+
+    def stream(self, match_id, batch_size=BATCH_SIZE):
+        """Load the events of a match in batches.
+
+        A cached match is sliced from the memory-mapped cache. Otherwise the
+        events file is parsed incrementally and each batch is written to the
+        cache, which replaces the old cache after the last batch.
+
+        Args:
+            match_id (int): The match id.
+            batch_size (int, optional): Maximum number of events per batch.
+            Defaults to BATCH_SIZE.
+
+        Yields:
+            MatchEvents: The next batch of events.
+        """
+        meta = self.readMeta(match_id)
+        if self.isCached(match_id, meta):
+            events = self._open(match_id, meta)
+            for i in range(0, len(events), batch_size):
+                yield events.select(slice(i, i+batch_size))
+        else:
+            yield from self._parse(match_id, batch_size)
+
+    def build(self, match_id):
+        """Parse the events file of a match and write its cache.
+
+        Args:
+            match_id (int): The match id.
+
+        Returns:
+            dict: The metadata of the new cache.
+        """
+        for _ in self._parse(match_id, BATCH_SIZE):
+            pass
+        return self.readMeta(match_id)
+
+    def _open(self, match_id, meta):
+        """Memory-map the cache of a match.
+
+        Args:
+            match_id (int): The match id.
+            meta (dict): The cache metadata.
+
+        Returns:
+            MatchEvents: The cached events.
+        """
+        directory = self.cacheDirectory(match_id)
+        # Empty arrays can not be memory-mapped.
+        mmap_mode = 'r' if meta["length"] > 0 else None
+        columns = { k : np.load(os.path.join(directory, k + ".npy"),
+                                mmap_mode=mmap_mode)
+                    for k in EVENT_COLUMNS }
+        self.names.merge(meta["names"])
+        self.readLineups(match_id)
+        return MatchEvents(columns, self.names, match_id)
+
+    def _parse(self, match_id, batch_size):
+        """Incrementally parse the events file of a match, writing its cache
+        batch by batch.
+
+        Args:
+            match_id (int): The match id.
+            batch_size (int): Maximum number of events per batch.
+
+        Yields:
+            MatchEvents: The next batch of parsed events.
+        """
+        # The version is taken before parsing, so a file modified while it
+        # is parsed will be parsed again on the next load.
+        mtime, size = self.sourceVersion(match_id)
+        writer = CacheWriter(self, match_id, mtime, size)
+        try:
+            for batch in iterEventBatches(self.eventsFile(match_id),
+                                          batch_size):
+                part = MatchEvents.fromEvents(batch, match_id)
+                # the cache keeps the names of the match only
+                writer.append(part)
+                self.names.merge(part.names)
+                yield MatchEvents(part.columns, self.names, match_id)
+            self.readLineups(match_id)
+            writer.commit()
+        finally:
+            # a parse which failed or was not consumed to the end leaves
+            # the cache as it was
+            writer.abort()
+
+    def _replace(self, path, write):
+        """Atomically replace a file, so memory-mapped readers of the old
+        file are not disturbed.
+
+        Args:
+            path (str): The file to replace.
+            write (callable): Called with a binary file object to write to.
+        """
+        tmp = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+        with open(tmp, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
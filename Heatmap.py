@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+import numpy as np
+from PyQt5.QtGui import QImage
+from PitchTransform import STATSBOMB_LENGTH, STATSBOMB_WIDTH
+
+# Colormaps as control points (position, (r, g, b, a)), interpolated into
+# lookup tables of 256 colors.
+COLORMAPS = {
+    'hot' : [(0.0, (255, 255, 178, 0)),
+             (0.25, (254, 204, 92, 140)),
+             (0.5, (253, 141, 60, 180)),
+             (0.75, (240, 59, 32, 210)),
+             (1.0, (189, 0, 38, 235))],
+    'blues' : [(0.0, (239, 243, 255, 0)),
+               (0.33, (189, 215, 231, 150)),
+               (0.66, (107, 174, 214, 200)),
+               (1.0, (33, 113, 181, 235))],
+}
+
+# Number of heatmaps kept in the cache.
+HEATMAP_CACHE_SIZE = 16
+
+def colormapTable(name):
+    """Build the lookup table of a colormap.
+
+    Args:
+        name (str): Name of a colormap in COLORMAPS.
+
+    Returns:
+        numpy.ndarray: A 256x4 array of RGBA values.
+    """
+    points = COLORMAPS[name]
+    pos = np.array([p for p,_ in points])
+    colors = np.array([c for _,c in points], dtype=np.float64)
+    t = np.linspace(0.0, 1.0, 256)
+    table = np.stack([np.interp(t, pos, colors[:,i]) for i in range(4)],
+                     axis=1)
+    return np.round(table).astype(np.uint8)
+
+def gaussianMatrix(n, sigma):
+    """Return the matrix applying a Gaussian blur to a vector of length n.
+
+    Args:
+        n (int): Length of the vector.
+        sigma (float): Standard deviation of the Gaussian in bins.
+
+    Returns:
+        numpy.ndarray: An nxn matrix with rows summing to one.
+    """
+    i = np.arange(n)
+    d = i[:,None]-i[None,:]
+    k = np.exp(-0.5*(d/sigma)**2)
+    k[np.abs(d) > 3*sigma] = 0.0
+    return k/k.sum(axis=1, keepdims=True)
+
+def eventHistogram(x, y, bins, sigma=0.0):
+    """Bin event locations into a grid over the StatsBomb pitch.
+
+    Args:
+        x (numpy.ndarray): x-coordinates of the events.
+        y (numpy.ndarray): y-coordinates of the events.
+        bins ((int,int)): Number of bins along the length and width.
+        sigma (float, optional): Standard deviation in bins of the Gaussian
+        smoothing. No smoothing if zero. Defaults to 0.0.
+
+    Returns:
+        numpy.ndarray: The counts, with rows along the width of the pitch.
+    """
+    valid = np.isfinite(x) & np.isfinite(y)
+    counts, _, _ = np.histogram2d(y[valid], x[valid], bins=(bins[1],bins[0]),
+                                  range=[[0, STATSBOMB_WIDTH],
+                                         [0, STATSBOMB_LENGTH]])
+    return smoothHistogram(counts, sigma)
+
+def smoothHistogram(counts, sigma):
+    """Smooth a histogram with a Gaussian blur.
+
+    Args:
+        counts (numpy.ndarray): The histogram.
+        sigma (float): Standard deviation in bins of the Gaussian. No
+        smoothing if zero.
+
+    Returns:
+        numpy.ndarray: The smoothed histogram.
+    """
+    if sigma <= 0:
+        return counts
+    # a separable blur, applied as one matrix product per axis
+    ny, nx = counts.shape
+    return gaussianMatrix(ny, sigma) @ counts @ gaussianMatrix(nx, sigma).T
+
+class Heatmap:
+    """A histogram of event locations together with its image.
+
+    The image shares its memory with the RGBA array, which is why both
+    are kept together.
+    """
+    def __init__(self, values, colormap):
+        """Colorize a histogram.
+
+        Args:
+            values (numpy.ndarray): The histogram.
+            colormap (str): Name of a colormap in COLORMAPS.
+        """
+        self.values = values
+        vmax = values.max() if values.size else 0.0
+        scaled = values*(255.0/vmax) if vmax > 0 else np.zeros_like(values)
+        self.rgba = np.ascontiguousarray(
+            colormapTable(colormap)[scaled.astype(np.uint8)])
+        h, w = values.shape
+        self.image = QImage(self.rgba.data, w, h, self.rgba.strides[0],
+                            QImage.Format_RGBA8888)
+
+class HeatmapCache:
+    """A least recently used cache of heatmaps."""
+    def __init__(self, size = HEATMAP_CACHE_SIZE):
+        """Construct an empty cache.
+
+        Args:
+            size (int, optional): Maximum number of heatmaps.
+            Defaults to HEATMAP_CACHE_SIZE.
+        """
+        self.size = size
+        self.heatmaps = OrderedDict()
+
+    def heatmap(self, key, compute):
+        """Return the heatmap for a key, computing it if it is not cached.
+
+        Args:
+            key (hashable): Identifies the events, filter and parameters.
+            compute (callable): Returns the Heatmap when it is not cached.
+
+        Returns:
+            Heatmap: The heatmap.
+        """
+        if key in self.heatmaps:
+            self.heatmaps.move_to_end(key)
+            return self.heatmaps[key]
+        heatmap = compute()
+        self.heatmaps[key] = heatmap
+        while len(self.heatmaps) > self.size:
+            self.heatmaps.popitem(last=False)
+        return heatmap
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import OrderedDict
+import numpy as np
+from PyQt5.QtWidgets import QAbstractScrollArea
+from PyQt5.QtGui import QPainter, QImage, QPen, QColor, QBrush
+from PyQt5.QtCore import (
+    Qt, QRect, QPointF, QRunnable, QThreadPool, pyqtSignal
+)
+from EventStore import EventStore, PASS_TYPE, SHOT_TYPE
+from Heatmap import Heatmap, eventHistogram
+from PaintingUtilities import drawArrows
+from PitchWidget import PitchWidget
+from ShotMap import (
+    ShotAtlas, OUTCOME_COLORS, SHAPES, markerRadii, outcomeClass,
+    shapeClass, sizeStep, shotOrder
+)
+
+# Height in pixels of the title strip below each cell.
+TITLE_HEIGHT = 18
+
+OVERLAYS = ('passes', 'shots', 'heatmap')
+
+# Ctrl+wheel scales the cells by CELL_ZOOM_STEP per notch, keeping their
+# width between the bounds in pixels.
+CELL_ZOOM_STEP = 1.25
+MIN_CELL_WIDTH = 120
+MAX_CELL_WIDTH = 960
+
+class CellRenderer:
+    """Draws an overlay of a match into a QImage.
+
+    Holds copies of the style and transform of the template pitch, so it
+    can be used from the threads of the pool.
+    """
+    def __init__(self, pitch, ratio):
+        """Copy the style and transform of a pitch.
+
+        Args:
+            pitch (PitchWidget): The template pitch, sized as a cell.
+            ratio (float): The device pixel ratio of the images.
+        """
+        self.size = pitch.size()
+        self.ratio = ratio
+        self.transform = pitch.pitch_transform
+        self.pass_pen = QPen(pitch.pass_pen)
+        self.pass_arrow_size = pitch.pass_arrow_size
+        self.heatmap_bins = pitch.heatmap_bins
+        self.heatmap_sigma = pitch.heatmap_sigma
+        self.heatmap_colormap = pitch.heatmap_colormap
+        scale = self.transform.matrix[0,0]
+        self.radii = markerRadii(pitch.shot_radius[0]*scale,
+                                 pitch.shot_radius[1]*scale)
+
+    def render(self, events, overlay):
+        """Draw an overlay of events.
+
+        Args:
+            events (MatchEvents): The events of the match.
+            overlay (str): One of OVERLAYS.
+
+        Returns:
+            QImage: The transparent overlay.
+        """
+        image = QImage(self.size*self.ratio, QImage.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(self.ratio)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        if overlay == 'passes':
+            self.drawPasses(painter, events)
+        elif overlay == 'shots':
+            self.drawShots(painter, events)
+        else:
+            self.drawHeatmap(painter, events)
+        painter.end()
+        return image
+
+    def drawPasses(self, painter, events):
+        passes = ((events['type'] == PASS_TYPE) & np.isfinite(events['x'])
+                  & np.isfinite(events['end_x']))
+        x0, y0 = self.transform.map(events['x'][passes], events['y'][passes])
+        x1, y1 = self.transform.map(events['end_x'][passes],
+                                    events['end_y'][passes])
+        painter.setPen(self.pass_pen)
+        painter.setBrush(QBrush(self.pass_pen.color()))
+        drawArrows(painter, x0, y0, x1, y1, self.pass_arrow_size)
+
+    def drawShots(self, painter, events):
+        # the few shots of a match are drawn directly; pixmaps, and so the
+        # atlas, can not be used outside the GUI thread
+        shots = np.flatnonzero((events['type'] == SHOT_TYPE)
+                               & np.isfinite(events['x']))
+        shots = shots[shotOrder(events['xg'][shots])]
+        x, y = self.transform.map(events['x'][shots], events['y'][shots])
+        shape = shapeClass(events['body_part'][shots])
+        color = outcomeClass(events['outcome'][shots])
+        step = sizeStep(events['xg'][shots])
+        painter.setPen(QPen(QColor("#000000"), 1.0))
+        for i in range(len(shots)):
+            painter.setBrush(QColor(OUTCOME_COLORS[color[i]]))
+            ShotAtlas.drawMarker(painter, SHAPES[shape[i]],
+                                 QPointF(x[i], y[i]), self.radii[step[i]])
+
+    def drawHeatmap(self, painter, events):
+        heatmap = Heatmap(eventHistogram(events['x'], events['y'],
+                                         self.heatmap_bins,
+                                         self.heatmap_sigma),
+                          self.heatmap_colormap)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.drawImage(self.transform.rect, heatmap.image)
+
+class CellTask(QRunnable):
+    """Loads a match and renders the overlay of its cell on the pool."""
+    def __init__(self, grid, key, request, renderer):
+        """Construct a CellTask.
+
+        Args:
+            grid (MatchGrid): The grid to report to.
+            key (tuple): Match id, overlay, cell size and pixel ratio.
+            request (int): Id of the render request, used to tell the
+            results of cancelled renders of the cell from the current one.
+            renderer (CellRenderer): Draws the overlay.
+        """
+        super().__init__()
+        self.setAutoDelete(False)
+        self.grid = grid
+        self.key = key
+        self.request = request
+        self.renderer = renderer
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+
+    def run(self):
+        try:
+            if self.cancelled.is_set():
+                return
+            events = self.grid.store.load(self.key[0])
+            if self.cancelled.is_set():
+                return
+            image = self.renderer.render(events, self.key[1])
+            self.grid._rendered.emit(self.request, self.key, image)
+        except Exception as e:
+            self.grid._failed.emit(self.request, self.key, str(e))
+        finally:
+            self.done.set()
+
+class MatchGrid(QAbstractScrollArea):
+    """Small multiples of many matches, each a mini pitch with the same
+    overlay.
+
+    All cells share the cached pitch of one template PitchWidget. The
+    overlays are rendered into images on a thread pool, and only for the
+    cells in view; scrolling cancels the renders of cells scrolled away.
+    """
+    # match id of a clicked cell
+    matchActivated = pyqtSignal(int)
+    # request id, key of a cell, its overlay image
+    _rendered = pyqtSignal(int, object, object)
+    # request id, key of a cell, error message
+    _failed = pyqtSignal(int, object, str)
+
+    def __init__(self, config, pitch_config, data_config, parent = None):
+        """Construct an empty MatchGrid.
+
+        Args:
+            config (dict): The Grid configuration dictionary.
+            pitch_config (dict): The Pitch configuration dictionary.
+            data_config (dict): The StatsBomb configuration dictionary.
+            parent (PyQt5.QWidgets.QWidget, optional): Parent widget.
+            Defaults to None.
+        """
+        super().__init__(parent)
+        self.spacing = config["spacing"]
+        self.cache_size = config["cache_size"]
+        self.store = EventStore(data_config)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(config["workers"])
+
+        # the template pitch is never shown; its cached pitch is blitted
+        # into every cell
+        self.template = PitchWidget(pitch_config)
+        self.template.resize(config["cell_width"], config["cell_height"])
+        self.cell_aspect = config["cell_height"]/config["cell_width"]
+        self._renderer = None
+
+        self.match_ids = []
+        self.titles = {}
+        self.overlay = OVERLAYS[0]
+        self.images = OrderedDict()
+        self.failed = set()
+        self.pending = {}
+        self.request_id = 0
+        # The pool does not own the tasks, so they are kept alive here
+        # until they have finished, even when cancelled.
+        self.tasks = set()
+
+        self._rendered.connect(self.cellRendered)
+        self._failed.connect(self.cellFailed)
+
+    def setMatches(self, match_ids, titles = None):
+        """Show a list of matches.
+
+        Args:
+            match_ids (list): The match ids in the order of the cells.
+            titles (dict, optional): Title of each match. Defaults to the
+            match ids.
+        """
+        self.match_ids = list(match_ids)
+        self.titles = titles or {}
+        self.updateScrollBar()
+        self.viewport().update()
+
+    def setOverlay(self, overlay):
+        """Select the overlay drawn in every cell.
+
+        Args:
+            overlay (str): One of OVERLAYS.
+        """
+        if overlay not in OVERLAYS:
+            raise ValueError("Unknown overlay {}".format(overlay))
+        self.overlay = overlay
+        # try the cells which could not be loaded again
+        self.failed.clear()
+        self.viewport().update()
+
+    def setCellSize(self, width, height):
+        """Resize the cells, which renders the pitch and overlays again."""
+        self.template.resize(width, height)
+        # the template is never shown, so it gets no resize event
+        self.template.invalidateGeometry()
+        self._renderer = None
+        self.failed.clear()
+        self.updateScrollBar()
+        self.viewport().update()
+
+    def renderer(self):
+        """Return the renderer of the current cell size and pixel ratio."""
+        ratio = self.devicePixelRatioF()
+        if (self._renderer is None or self._renderer.ratio != ratio or
+                self._renderer.size != self.template.size()):
+            self._renderer = CellRenderer(self.template, ratio)
+        return self._renderer
+
+    def columns(self):
+        """Number of cells per row at the current width."""
+        cell = self.template.size().width() + self.spacing
+        return max(1, (self.viewport().width() - self.spacing) // cell)
+
+    def rowHeight(self):
+        return self.template.size().height() + TITLE_HEIGHT + self.spacing
+
+    def cellRect(self, i):
+        """Return the rectangle of a cell in content coordinates."""
+        columns = self.columns()
+        size = self.template.size()
+        return QRect(self.spacing + (i % columns)*(size.width()+self.spacing),
+                     self.spacing + (i // columns)*self.rowHeight(),
+                     size.width(), size.height())
+
+    def visibleCells(self):
+        """Return the range of the indices of the cells in view."""
+        top = self.verticalScrollBar().value()
+        columns = self.columns()
+        first = max(0, (top - self.spacing) // self.rowHeight())*columns
+        last = ((top + self.viewport().height()) // self.rowHeight() + 1)*columns
+        return range(first, min(last, len(self.match_ids)))
+
+    def updateScrollBar(self):
+        rows = -(-len(self.match_ids) // self.columns())
+        height = rows*self.rowHeight() + self.spacing
+        bar = self.verticalScrollBar()
+        bar.setRange(0, max(0, height - self.viewport().height()))
+        bar.setPageStep(self.viewport().height())
+        bar.setSingleStep(self.rowHeight() // 4)
+
+    def resizeEvent(self, event):
+        self.updateScrollBar()
+        return super().resizeEvent(event)
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def cellKey(self, match_id):
+        size = self.template.size()
+        return (match_id, self.overlay, (size.width(), size.height()),
+                self.devicePixelRatioF())
+
+    def paintEvent(self, event):
+        """Overloaded function, painting the cells in view and requesting
+        the overlays which are missing."""
+        painter = QPainter(self.viewport())
+        painter.fillRect(self.viewport().rect(),
+                         self.palette().color(self.backgroundRole()))
+        # the template is never shown, so its own ratio may not be the
+        # ratio of the screen of the grid
+        pitch = self.template.pitchPixmap(self.devicePixelRatioF())
+        top = self.verticalScrollBar().value()
+        visible = self.visibleCells()
+        wanted = set()
+
+        for i in visible:
+            match_id = self.match_ids[i]
+            rect = self.cellRect(i).translated(0, -top)
+            painter.drawPixmap(rect.topLeft(), pitch)
+            key = self.cellKey(match_id)
+            wanted.add(key)
+            if key in self.images:
+                self.images.move_to_end(key)
+                painter.drawImage(rect.topLeft(), self.images[key])
+            elif key in self.failed:
+                painter.drawText(rect, Qt.AlignCenter, "Could not load")
+            else:
+                self.request(key)
+            painter.drawText(QRect(rect.left(), rect.bottom(), rect.width(),
+                                   TITLE_HEIGHT),
+                             Qt.AlignLeft | Qt.AlignVCenter,
+                             self.titles.get(match_id, str(match_id)))
+        painter.end()
+        self.cancelExcept(wanted)
+
+    def request(self, key):
+        """Start rendering a cell, unless it is already being rendered."""
+        if key in self.pending:
+            return
+        self.request_id += 1
+        task = CellTask(self, key, self.request_id, self.renderer())
+        self.pending[key] = task
+        self.tasks = { t for t in self.tasks if not t.done.is_set() }
+        self.tasks.add(task)
+        self.pool.start(task)
+
+    def cancelExcept(self, wanted):
+        """Cancel the renders of the cells which are no longer in view."""
+        for key in [ k for k in self.pending if k not in wanted ]:
+            task = self.pending.pop(key)
+            task.cancelled.set()
+            if self.pool.tryTake(task):
+                task.done.set()
+
+    def isPending(self, request, key):
+        """Whether a result is of the current render of a cell, rather than
+        of a cancelled one."""
+        task = self.pending.get(key)
+        return task is not None and task.request == request
+
+    def cellRendered(self, request, key, image):
+        """Store a rendered overlay and repaint its cell."""
+        if self.isPending(request, key):
+            del self.pending[key]
+        # the overlay of a cancelled render is still the right one
+        self.images[key] = image
+        while len(self.images) > self.cache_size:
+            self.images.popitem(last=False)
+        self.viewport().update()
+
+    def cellFailed(self, request, key, message):
+        """Mark a cell whose match could not be loaded."""
+        if not self.isPending(request, key):
+            return
+        del self.pending[key]
+        self.failed.add(key)
+        self.viewport().update()
+
+    def mousePressEvent(self, event):
+        """Overloaded function, activating the match of a clicked cell."""
+        top = self.verticalScrollBar().value()
+        for i in self.visibleCells():
+            if self.cellRect(i).translated(0, -top).contains(event.pos()):
+                self.matchActivated.emit(self.match_ids[i])
+                return
+        return super().mousePressEvent(event)
+
+    def wheelEvent(self, event):
+        """Overloaded function, scaling the cells with Ctrl+wheel."""
+        if not event.modifiers() & Qt.ControlModifier:
+            return super().wheelEvent(event)
+        steps = event.angleDelta().y()/120
+        size = self.template.size()
+        width = min(max(size.width()*CELL_ZOOM_STEP**steps, MIN_CELL_WIDTH),
+                    MAX_CELL_WIDTH)
+        height = width*self.cell_aspect
+        if round(width) != size.width():
+            self.setCellSize(round(width), round(height))
+        event.accept()
+
+    def closeEvent(self, event):
+        """Overloaded function, cancelling the pending renders."""
+        self.cancelExcept(set())
+        return super().closeEvent(event)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import OrderedDict
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from EventStore import EventStore
+
+# How many matches on each side of the selected match are prefetched.
+PREFETCH_DISTANCE = 1
+
+# How many loaded matches are kept in memory.
+LOADED_CACHE_SIZE = 8
+
+# Priorities in the thread pool; the selected match goes first.
+LOAD_PRIORITY = 1
+PREFETCH_PRIORITY = 0
+
+class LoadTask(QRunnable):
+    """Loads one match on a thread of the pool."""
+    def __init__(self, loader, match_id, request, prefetch):
+        """Construct a LoadTask.
+
+        Args:
+            loader (MatchLoader): The loader to report to.
+            match_id (int): The match to load.
+            request (int): Id of the load request, used to drop results of
+            cancelled requests.
+            prefetch (bool): If True, the match is only loaded into the
+            cache and no batches are reported.
+        """
+        super().__init__()
+        self.setAutoDelete(False)
+        self.loader = loader
+        self.match_id = match_id
+        self.request = request
+        self.prefetch = prefetch
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+
+    def run(self):
+        """Load the match, checking for cancellation between batches."""
+        try:
+            self.loadMatch()
+        finally:
+            self.done.set()
+
+    def loadMatch(self):
+        """Load the match and report the results to the loader."""
+        if self.prefetch:
+            try:
+                events = self.loader.store.load(self.match_id)
+            except Exception:
+                # a neighbour the user has not opened; it is loaded again,
+                # and the error reported, when it is selected
+                if not self.cancelled.is_set():
+                    self.loader._prefetchFailed.emit(self)
+                return
+            if not self.cancelled.is_set():
+                self.loader._prefetched.emit(self.match_id, events)
+            return
+
+        try:
+            for batch in self.loader.store.stream(self.match_id,
+                                                  self.loader.batch_size):
+                if self.cancelled.is_set():
+                    return
+                self.loader.batchLoaded.emit(self.request, batch)
+            if self.cancelled.is_set():
+                return
+            # The stream has written the cache, so this is a cheap mmap.
+            events = self.loader.store.load(self.match_id)
+            self.loader._prefetched.emit(self.match_id, events)
+            self.loader.matchLoaded.emit(self.request, events)
+        except Exception as e:
+            if not self.cancelled.is_set():
+                self.loader.loadFailed.emit(self.request, self.match_id,
+                                            str(e))
+
+class MatchLoader(QObject):
+    """Loads matches on a thread pool and delivers them through signals.
+
+    Loading a match cancels the previous load and speculatively prefetches
+    its neighbours in the match list, so stepping through a season finds
+    the next match already in memory.
+    """
+    # request id, batch of events
+    batchLoaded = pyqtSignal(int, object)
+    # request id, events of the whole match
+    matchLoaded = pyqtSignal(int, object)
+    # request id, match id, error message
+    loadFailed = pyqtSignal(int, int, str)
+
+    # match id, events; emitted by the workers to fill the cache
+    _prefetched = pyqtSignal(int, object)
+    # task; emitted by the workers when a prefetch fails
+    _prefetchFailed = pyqtSignal(object)
+
+    def __init__(self, config, parent = None, pool = None):
+        """Construct a MatchLoader.
+
+        Args:
+            config (dict): The StatsBomb configuration dictionary.
+            parent (PyQt5.QtCore.QObject, optional): Parent object.
+            Defaults to None.
+            pool (PyQt5.QtCore.QThreadPool, optional): The pool to run on.
+            Defaults to the global thread pool.
+        """
+        super().__init__(parent)
+        self.config = config
+        self.store = EventStore(config)
+        self.batch_size = config["batch_size"]
+        self.pool = pool if pool is not None else QThreadPool.globalInstance()
+
+        self.match_ids = []
+        self.loaded = OrderedDict()
+        self.request = 0
+        self.task = None
+        self.prefetching = {}
+        # The pool does not own the tasks, so they are kept alive here
+        # until they have finished.
+        self.tasks = set()
+
+        self._prefetched.connect(self.storeLoaded)
+        self._prefetchFailed.connect(self.prefetchFailed)
+
+    def setMatchList(self, match_ids):
+        """Set the ordered list of matches used for prefetching.
+
+        Args:
+            match_ids (list): The match ids, e.g. of a competition season.
+        """
+        self.match_ids = list(match_ids)
+
+    def load(self, match_id):
+        """Start loading a match, cancelling the previous load.
+
+        A match which is already in memory is delivered immediately through
+        matchLoaded. Otherwise batchLoaded is emitted for every batch before
+        matchLoaded.
+
+        Args:
+            match_id (int): The match to load.
+
+        Returns:
+            int: The request id passed with the signals.
+        """
+        self.cancel()
+
+        if match_id in self.loaded:
+            self.loaded.move_to_end(match_id)
+            self.matchLoaded.emit(self.request, self.loaded[match_id])
+        else:
+            self.task = LoadTask(self, match_id, self.request, False)
+            self.start(self.task, LOAD_PRIORITY)
+
+        self.prefetch(match_id)
+        return self.request
+
+    def cancel(self):
+        """Cancel the current load, if any.
+
+        Signals of the load which are already queued are ignored by
+        receivers comparing the request id, as a new id is taken.
+        """
+        self.request += 1
+        if self.task is not None:
+            self.task.cancelled.set()
+            self.pool.tryTake(self.task)
+            self.task = None
+
+    def prefetch(self, match_id):
+        """Prefetch the neighbours of a match, cancelling other prefetches.
+
+        Args:
+            match_id (int): The match whose neighbours are prefetched.
+        """
+        try:
+            i = self.match_ids.index(match_id)
+        except ValueError:
+            neighbours = []
+        else:
+            neighbours = [ self.match_ids[j] for j in
+                           range(i-PREFETCH_DISTANCE, i+PREFETCH_DISTANCE+1)
+                           if j != i and 0 <= j < len(self.match_ids) ]
+
+        for m in list(self.prefetching):
+            if m not in neighbours:
+                task = self.prefetching.pop(m)
+                task.cancelled.set()
+                self.pool.tryTake(task)
+
+        for m in neighbours:
+            if m in self.loaded or m in self.prefetching:
+                continue
+            task = LoadTask(self, m, self.request, True)
+            self.prefetching[m] = task
+            self.start(task, PREFETCH_PRIORITY)
+
+    def start(self, task, priority):
+        """Start a task on the pool and forget finished tasks.
+
+        Args:
+            task (LoadTask): The task to start.
+            priority (int): Its priority in the pool.
+        """
+        self.tasks = { t for t in self.tasks if not t.done.is_set() }
+        self.tasks.add(task)
+        self.pool.start(task, priority)
+
+    def storeLoaded(self, match_id, events):
+        """Keep a loaded match in memory, evicting the least recently used.
+
+        Args:
+            match_id (int): The match id.
+            events (MatchEvents): The events of the match.
+        """
+        self.prefetching.pop(match_id, None)
+        self.loaded[match_id] = events
+        self.loaded.move_to_end(match_id)
+        while len(self.loaded) > LOADED_CACHE_SIZE:
+            self.loaded.popitem(last=False)
+
+    def prefetchFailed(self, task):
+        """Forget a failed prefetch, so the match can be prefetched again.
+
+        Args:
+            task (LoadTask): The failed task.
+        """
+        if self.prefetching.get(task.match_id) is task:
+            del self.prefetching[task.match_id]
+
+    def adjacentMatch(self, match_id, step):
+        """Return the match step places from match_id in the match list.
+
+        Args:
+            match_id (int): The current match.
+            step (int): Offset in the match list, e.g. 1 or -1.
+
+        Returns:
+            int: The match id, or None if there is no such match.
+        """
+        try:
+            i = self.match_ids.index(match_id) + step
+        except ValueError:
+            return None
+        return self.match_ids[i] if 0 <= i < len(self.match_ids) else None
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import sqlite3
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS competitions (
+    competition_id INTEGER NOT NULL,
+    season_id INTEGER NOT NULL,
+    competition_name TEXT,
+    country_name TEXT,
+    season_name TEXT,
+    gender TEXT,
+    PRIMARY KEY (competition_id, season_id)
+);
+CREATE TABLE IF NOT EXISTS matches (
+    match_id INTEGER PRIMARY KEY,
+    competition_id INTEGER NOT NULL,
+    season_id INTEGER NOT NULL,
+    match_date TEXT,
+    kick_off TEXT,
+    home_team_id INTEGER,
+    away_team_id INTEGER,
+    home_score INTEGER,
+    away_score INTEGER
+);
+CREATE TABLE IF NOT EXISTS teams (
+    team_id INTEGER PRIMARY KEY,
+    team_name TEXT
+);
+CREATE TABLE IF NOT EXISTS players (
+    player_id INTEGER PRIMARY KEY,
+    player_name TEXT,
+    player_nickname TEXT
+);
+CREATE TABLE IF NOT EXISTS appearances (
+    match_id INTEGER NOT NULL,
+    team_id INTEGER NOT NULL,
+    player_id INTEGER NOT NULL,
+    jersey_number INTEGER,
+    PRIMARY KEY (match_id, player_id)
+);
+CREATE INDEX IF NOT EXISTS matches_season
+    ON matches (competition_id, season_id, match_date);
+CREATE INDEX IF NOT EXISTS matches_home ON matches (home_team_id);
+CREATE INDEX IF NOT EXISTS matches_away ON matches (away_team_id);
+CREATE INDEX IF NOT EXISTS appearances_player ON appearances (player_id);
+CREATE INDEX IF NOT EXISTS appearances_team ON appearances (team_id);
+CREATE INDEX IF NOT EXISTS players_name ON players (player_name);
+"""
+
+MATCH_COLUMNS = ("m.match_id, m.competition_id, m.season_id, m.match_date, "
+                 "m.kick_off, m.home_team_id, h.team_name, m.away_team_id, "
+                 "a.team_name, m.home_score, m.away_score")
+
+MATCH_JOINS = ("FROM matches m LEFT JOIN teams h ON h.team_id = m.home_team_id "
+               "LEFT JOIN teams a ON a.team_id = m.away_team_id")
+
+logger = logging.getLogger(__name__)
+
+class MetadataIndex:
+    """A persistent SQLite index over the StatsBomb competitions, matches
+    and lineups.
+
+    The index remembers the modification time and size of every file it
+    has read, so updating it only reads new and changed files.
+    """
+    def __init__(self, config):
+        """Open the index, creating it if needed.
+
+        Args:
+            config (dict): The StatsBomb configuration dictionary.
+        """
+        self.competitions_path = config["competitions_path"]
+        self.matches_path = config["matches_path"]
+        self.lineups_path = config["lineups_path"]
+
+        os.makedirs(os.path.dirname(config["index_path"]) or ".",
+                    exist_ok=True)
+        self.db = sqlite3.connect(config["index_path"])
+        # let the GUI read while a worker updates the index
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        # paths and messages of the files the last update skipped
+        self.errors = []
+
+    def close(self):
+        """Close the database connection."""
+        self.db.close()
+
+    def sourceFiles(self):
+        """List the files the index is built from.
+
+        Returns:
+            dict: Mapping from path to (mtime_ns, size).
+        """
+        files = {}
+        if os.path.exists(self.competitions_path):
+            st = os.stat(self.competitions_path)
+            files[self.competitions_path] = (st.st_mtime_ns, st.st_size)
+        for path in (self.matches_path, self.lineups_path):
+            if not os.path.isdir(path):
+                continue
+            for entry in os.scandir(path):
+                entries = (os.scandir(entry.path) if entry.is_dir()
+                           else [entry])
+                for e in entries:
+                    if e.name.endswith(".json"):
+                        st = e.stat()
+                        files[e.path] = (st.st_mtime_ns, st.st_size)
+        return files
+
+    def update(self):
+        """Read new and changed files and forget removed ones.
+
+        A file which can not be read is skipped and listed in self.errors,
+        without rolling back the other files. It is not recorded as read,
+        so the next update tries it again.
+
+        Returns:
+            int: Number of files read or removed.
+        """
+        known = { p : (m, s) for p,m,s in
+                  self.db.execute("SELECT path, mtime_ns, size FROM files") }
+        files = self.sourceFiles()
+        changed = [ p for p,v in files.items() if known.get(p) != v ]
+        removed = [ p for p in known if p not in files ]
+        self.errors = []
+
+        with self.db:
+            for path in removed:
+                self.removeFile(path)
+                self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+            for path in changed:
+                # a savepoint per file undoes the rows of a bad file only
+                self.db.execute("SAVEPOINT file")
+                try:
+                    self.readFile(path)
+                except (OSError, ValueError, KeyError, TypeError,
+                        sqlite3.IntegrityError) as e:
+                    self.db.execute("ROLLBACK TO file")
+                    logger.warning("Could not index %s: %s", path, e)
+                    self.errors.append((path, str(e)))
+                else:
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO files VALUES (?,?,?)",
+                        (path,) + files[path])
+                self.db.execute("RELEASE file")
+        return len(changed) + len(removed) - len(self.errors)
+
+    def fileKind(self, path):
+        """Classify a source file.
+
+        Returns:
+            (str, tuple): 'competitions', 'matches' or 'lineups', and the
+            ids encoded in the path.
+        """
+        if path == self.competitions_path:
+            return 'competitions', ()
+        name = os.path.splitext(os.path.basename(path))[0]
+        if os.path.commonpath([path, self.lineups_path]) == \
+                os.path.normpath(self.lineups_path):
+            return 'lineups', (int(name),)
+        competition = os.path.basename(os.path.dirname(path))
+        return 'matches', (int(competition), int(name))
+
+    def removeFile(self, path):
+        """Delete the rows read from a file."""
+        kind, ids = self.fileKind(path)
+        if kind == 'competitions':
+            self.db.execute("DELETE FROM competitions")
+        elif kind == 'matches':
+            self.db.execute("DELETE FROM matches WHERE competition_id = ? "
+                            "AND season_id = ?", ids)
+        else:
+            self.db.execute("DELETE FROM appearances WHERE match_id = ?", ids)
+
+    def readFile(self, path):
+        """Replace the rows read from a file with its current contents."""
+        self.removeFile(path)
+        kind, ids = self.fileKind(path)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        if kind == 'competitions':
+            self.db.executemany(
+                "INSERT OR REPLACE INTO competitions VALUES (?,?,?,?,?,?)",
+                [ (c["competition_id"], c["season_id"],
+                   c.get("competition_name"), c.get("country_name"),
+                   c.get("season_name"), c.get("competition_gender"))
+                  for c in data ])
+        elif kind == 'matches':
+            teams = {}
+            rows = []
+            for m in data:
+                home, away = m["home_team"], m["away_team"]
+                teams[home["home_team_id"]] = home["home_team_name"]
+                teams[away["away_team_id"]] = away["away_team_name"]
+                rows.append((m["match_id"], ids[0], ids[1],
+                             m.get("match_date"), m.get("kick_off"),
+                             home["home_team_id"], away["away_team_id"],
+                             m.get("home_score"), m.get("away_score")))
+            self.db.executemany(
+                "INSERT OR REPLACE INTO matches VALUES (?,?,?,?,?,?,?,?,?)",
+                rows)
+            self.db.executemany("INSERT OR REPLACE INTO teams VALUES (?,?)",
+                                teams.items())
+        else:
+            players = []
+            appearances = []
+            for team in data:
+                self.db.execute("INSERT OR REPLACE INTO teams VALUES (?,?)",
+                                (team["team_id"], team["team_name"]))
+                for p in team["lineup"]:
+                    players.append((p["player_id"], p["player_name"],
+                                    p.get("player_nickname")))
+                    appearances.append((ids[0], team["team_id"],
+                                        p["player_id"],
+                                        p.get("jersey_number")))
+            self.db.executemany(
+                "INSERT OR REPLACE INTO players VALUES (?,?,?)", players)
+            self.db.executemany(
+                "INSERT OR REPLACE INTO appearances VALUES (?,?,?,?)",
+                appearances)
+
+    def competitions(self):
+        """Return all competition seasons.
+
+        Returns:
+            list: Tuples of competition id, season id, competition name
+            and season name.
+        """
+        return self.db.execute(
+            "SELECT competition_id, season_id, competition_name, season_name "
+            "FROM competitions ORDER BY competition_name, season_name DESC"
+            ).fetchall()
+
+    def matches(self, competition_id = None, season_id = None,
+                team_id = None, player_id = None):
+        """Return matches in chronological order.
+
+        Args:
+            competition_id (int, optional): Only this competition.
+            season_id (int, optional): Only this season.
+            team_id (int, optional): Only matches of this team.
+            player_id (int, optional): Only matches this player was in the
+            squad of.
+
+        Returns:
+            list: Tuples of match id, competition id, season id, date, kick
+            off, home team id and name, away team id and name, and score.
+        """
+        where, args = [], []
+        if competition_id is not None:
+            where.append("m.competition_id = ?")
+            args.append(competition_id)
+        if season_id is not None:
+            where.append("m.season_id = ?")
+            args.append(season_id)
+        if team_id is not None:
+            where.append("(m.home_team_id = ? OR m.away_team_id = ?)")
+            args += [team_id, team_id]
+        if player_id is not None:
+            where.append("m.match_id IN (SELECT match_id FROM appearances "
+                         "WHERE player_id = ?)")
+            args.append(player_id)
+        query = "SELECT {} {}".format(MATCH_COLUMNS, MATCH_JOINS)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY m.match_date, m.kick_off, m.match_id"
+        return self.db.execute(query, args).fetchall()
+
+    def teams(self, competition_id = None, season_id = None):
+        """Return the teams, optionally only those playing in a season.
+
+        Returns:
+            list: Tuples of team id and name.
+        """
+        if competition_id is None:
+            return self.db.execute(
+                "SELECT team_id, team_name FROM teams ORDER BY team_name"
+                ).fetchall()
+        return self.db.execute(
+            "SELECT team_id, team_name FROM teams WHERE team_id IN "
+            "(SELECT home_team_id FROM matches WHERE competition_id = ?1 "
+            "AND season_id = ?2 UNION SELECT away_team_id FROM matches "
+            "WHERE competition_id = ?1 AND season_id = ?2) ORDER BY team_name",
+            (competition_id, season_id)).fetchall()
+
+    def players(self, competition_id = None, season_id = None,
+                team_id = None):
+        """Return the players who appeared in the given matches.
+
+        Returns:
+            list: Tuples of player id and name.
+        """
+        query = ("SELECT DISTINCT p.player_id, p.player_name FROM players p "
+                 "JOIN appearances a ON a.player_id = p.player_id "
+                 "JOIN matches m ON m.match_id = a.match_id")
+        where, args = [], []
+        if competition_id is not None:
+            where.append("m.competition_id = ? AND m.season_id = ?")
+            args += [competition_id, season_id]
+        if team_id is not None:
+            where.append("a.team_id = ?")
+            args.append(team_id)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        return self.db.execute(query + " ORDER BY p.player_name",
+                               args).fetchall()
+
+class UpdateTask(QRunnable):
+    """Updates the index on a thread of the pool."""
+    def __init__(self, updater):
+        super().__init__()
+        self.updater = updater
+
+    def run(self):
+        index = None
+        try:
+            # sqlite connections can not be shared between threads
+            index = MetadataIndex(self.updater.config)
+            changed = index.update()
+        except Exception as e:
+            self.updater.failed.emit(str(e))
+        else:
+            self.updater.updated.emit(changed)
+            if index.errors:
+                path, message = index.errors[0]
+                self.updater.failed.emit(
+                    "{} files skipped, e.g. {}: {}".format(
+                        len(index.errors), path, message))
+        finally:
+            if index is not None:
+                index.close()
+
+class IndexUpdater(QObject):
+    """Updates the metadata index in the background."""
+    # number of files read or removed
+    updated = pyqtSignal(int)
+    # error message
+    failed = pyqtSignal(str)
+
+    def __init__(self, config, parent = None):
+        """Construct an IndexUpdater.
+
+        Args:
+            config (dict): The StatsBomb configuration dictionary.
+            parent (PyQt5.QtCore.QObject, optional): Parent object.
+            Defaults to None.
+        """
+        super().__init__(parent)
+        self.config = config
+
+    def start(self):
+        """Start updating the index on the global thread pool."""
+        QThreadPool.globalInstance().start(UpdateTask(self))
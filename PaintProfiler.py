@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import atexit
+import json
+import os
+from collections import deque
+from time import perf_counter
+import numpy as np
+from PyQt5.QtGui import QColor, QFont
+from PyQt5.QtCore import Qt, QRectF
+
+# Environment variables enabling the profiler and naming its output file,
+# overriding the profile_paint and profile_output settings.
+PROFILE_ENV = "STATSBOMB_PROFILE"
+PROFILE_OUTPUT_ENV = "STATSBOMB_PROFILE_OUTPUT"
+
+# Number of recent frames the statistics are computed over.
+PROFILE_WINDOW = 300
+
+# Minimum time in seconds between updates of the readout, whose statistics
+# would otherwise be computed again for every frame.
+READOUT_INTERVAL = 0.25
+
+# Profilers dumping their statistics on exit, per output file.
+_dumped = {}
+
+class NullLayer:
+    """A context manager doing nothing, used when profiling is disabled."""
+    __slots__ = ()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+NULL_LAYER = NullLayer()
+
+class NullProfiler:
+    """A profiler recording nothing, so disabled profiling costs a method
+    call per layer."""
+    enabled = False
+
+    def layer(self, name):
+        return NULL_LAYER
+
+    def frame(self):
+        return NULL_LAYER
+
+    def drawReadout(self, painter, rect):
+        pass
+
+NULL_PROFILER = NullProfiler()
+
+class Layer:
+    """Times one layer of a frame."""
+    __slots__ = ('samples', 'start')
+    def __init__(self, samples):
+        self.samples = samples
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+    def __exit__(self, *exc):
+        self.samples.append((perf_counter()-self.start)*1000)
+        return False
+
+class PaintProfiler:
+    """Records the duration of each layer of the painted frames.
+
+    Keeps the durations of the most recent frames per layer, and the whole
+    frame under the name 'frame'.
+    """
+    enabled = True
+
+    def __init__(self, window = PROFILE_WINDOW):
+        """Construct a PaintProfiler.
+
+        Args:
+            window (int, optional): Number of samples kept per layer.
+            Defaults to PROFILE_WINDOW.
+        """
+        self.window = window
+        self.samples = {}
+        self.frames = 0
+        # lines of the readout, the frame count and time they were made at
+        self._readout = None
+        self._readout_frames = 0
+        self._readout_time = 0.0
+
+    def layer(self, name):
+        """Return a context manager timing a layer.
+
+        Args:
+            name (str): Name of the layer, e.g. 'passes'.
+
+        Returns:
+            Layer: The context manager.
+        """
+        if name not in self.samples:
+            self.samples[name] = deque(maxlen=self.window)
+        return Layer(self.samples[name])
+
+    def frame(self):
+        """Return a context manager timing a whole frame."""
+        self.frames += 1
+        return self.layer('frame')
+
+    def stats(self):
+        """Compute rolling statistics of the layers.
+
+        Returns:
+            dict: For each layer the number of samples, the last duration and
+            the p50, p95 and maximum durations, in ms.
+        """
+        stats = {}
+        for name, samples in self.samples.items():
+            if not samples:
+                continue
+            a = np.fromiter(samples, dtype=np.float64, count=len(samples))
+            p50, p95 = np.percentile(a, [50, 95])
+            stats[name] = { "count" : len(a), "last_ms" : a[-1],
+                            "p50_ms" : p50, "p95_ms" : p95, "max_ms" : a.max() }
+        return stats
+
+    def dump(self, path):
+        """Write the rolling statistics to a JSON file.
+
+        Args:
+            path (str): The output file.
+        """
+        with open(path, "w") as f:
+            json.dump(self.stats(), f, indent=1)
+
+    def readout(self):
+        """Return the lines of the readout.
+
+        The statistics are only computed again when frames were recorded
+        since the last readout, at most every READOUT_INTERVAL seconds.
+
+        Returns:
+            list: The lines, empty before the first frame.
+        """
+        now = perf_counter()
+        if self._readout is not None and (
+                self._readout_frames == self.frames or
+                now - self._readout_time < READOUT_INTERVAL):
+            return self._readout
+        stats = self.stats()
+        frame = stats.get('frame')
+        if frame is None:
+            return []
+        lines = ["{:.1f} ms  {:.0f} fps".format(frame["p50_ms"],
+                                                1000/max(frame["p50_ms"], 1e-3))]
+        lines += [ "{} {:.1f}".format(name, s["last_ms"])
+                   for name, s in stats.items() if name != 'frame' ]
+        self._readout = lines
+        self._readout_frames = self.frames
+        self._readout_time = now
+        return lines
+
+    def drawReadout(self, painter, rect):
+        """Draw the frame time, FPS and layer times in a corner.
+
+        Args:
+            painter (QPainter): The painter used for drawing.
+            rect (QRect): The rectangle of the widget.
+        """
+        lines = self.readout()
+        if not lines:
+            return
+
+        painter.save()
+        painter.setFont(QFont("monospace", 8))
+        height = painter.fontMetrics().height()
+        box = QRectF(rect.right()-140, rect.top()+4, 136, height*len(lines)+4)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 160))
+        painter.drawRect(box)
+        painter.setPen(QColor("#ffffff"))
+        painter.drawText(box.adjusted(4, 2, -4, -2), Qt.AlignLeft,
+                         "\n".join(lines))
+        painter.restore()
+
+def outputPath(output, i):
+    """Return the output file of the i-th profiler of the process.
+
+    The first profiler writes to output itself, the next ones to numbered
+    files next to it, e.g. paint_profile.1.json.
+    """
+    if i == 0:
+        return output
+    root, ext = os.path.splitext(output)
+    return "{}.{}{}".format(root, i, ext)
+
+def dumpProfilers():
+    """Write the statistics of every profiler created with an output."""
+    for output, profilers in _dumped.items():
+        for i, profiler in enumerate(profilers):
+            profiler.dump(outputPath(output, i))
+
+def createProfiler(config):
+    """Create the profiler requested by the configuration or environment.
+
+    The profiler is enabled by the profile_paint setting or by setting the
+    environment variable STATSBOMB_PROFILE to 1. Its statistics are dumped
+    on exit to profile_output, or to STATSBOMB_PROFILE_OUTPUT. Each pitch
+    has its own profiler, so the profilers after the first one dump to
+    numbered files, see outputPath.
+
+    Args:
+        config (dict): The Pitch configuration dictionary.
+
+    Returns:
+        PaintProfiler or NullProfiler: The profiler.
+    """
+    env = os.environ.get(PROFILE_ENV)
+    enabled = config["profile_paint"] if env is None else env == "1"
+    if not enabled:
+        return NULL_PROFILER
+
+    profiler = PaintProfiler()
+    output = os.environ.get(PROFILE_OUTPUT_ENV, config["profile_output"])
+    if output:
+        if not _dumped:
+            atexit.register(dumpProfilers)
+        _dumped.setdefault(output, []).append(profiler)
+    return profiler
@@ -1,10 +1,26 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from PyQt5.QtGui import QPolygon
-from PyQt5.QtCore import QLine, QPoint
+import struct
+import numpy as np
+from PyQt5.QtGui import QPolygonF, QPainterPath, QBrush, QPainter
+from PyQt5.QtCore import QLineF, QPointF, QByteArray, QDataStream, Qt
 from math import atan2, pi, sin, cos
 
+# Element types of a QPainterPath, as serialized by QDataStream.
+MOVE_TO = 0
+LINE_TO = 1
+
+# The elements of one arrow: the shaft followed by the closed head.
+ARROW_ELEMENTS = np.array([MOVE_TO, LINE_TO,
+                           MOVE_TO, LINE_TO, LINE_TO, LINE_TO], dtype=np.int32)
+
+# The elements of one filled arrow head.
+HEAD_ELEMENTS = np.array([MOVE_TO, LINE_TO, LINE_TO], dtype=np.int32)
+
+# Number of arrow heads filled per path when the heads are antialiased.
+HEAD_CHUNK = 256
+
 def drawArrow(painter,x0,y0,x1,y1,arrowsize,tip_angle = pi/3):
     """Draws an arrow using the painter.
 
@@ -18,15 +34,196 @@ def drawArrow(painter,x0,y0,x1,y1,arrowsize,tip_angle = pi/3):
         tip_angle (float, optional): Angle of the arrow head. Defaults to pi/3.
     """
     tip_angle = pi/3 if not tip_angle else tip_angle
-    line = QLine(x0,y0,x1,y1)
+    line = QLineF(x0,y0,x1,y1)
     angle = atan2(-line.dy(), line.dx())
-    arrowpoint1 = line.p2()-QPoint(sin(angle+tip_angle)*arrowsize,
+    arrowpoint1 = line.p2()-QPointF(sin(angle+tip_angle)*arrowsize,
                          cos(angle+tip_angle)*arrowsize)
-    arrowpoint2 = line.p2()-QPoint(sin(angle+pi-tip_angle)*arrowsize,
+    arrowpoint2 = line.p2()-QPointF(sin(angle+pi-tip_angle)*arrowsize,
                          cos(angle+pi-tip_angle)*arrowsize)
 
-    arrowhead = QPolygon()
+    arrowhead = QPolygonF()
     arrowhead << line.p2() << arrowpoint1 << arrowpoint2
 
     painter.drawLine(line)
-    painter.drawPolygon(arrowhead)
\ No newline at end of file
+    painter.drawPolygon(arrowhead)
+
+def arrayToPath(x, y, elements, fill_rule = Qt.WindingFill):
+    """Build a QPainterPath from arrays in one step.
+
+    The path is deserialized from a buffer in the QDataStream format, so no
+    Python call is made per element.
+
+    Args:
+        x (numpy.ndarray): x-coordinates of the elements.
+        y (numpy.ndarray): y-coordinates of the elements.
+        elements (numpy.ndarray): Element types, MOVE_TO or LINE_TO.
+        fill_rule (Qt.FillRule, optional): Fill rule of the path.
+        Defaults to Qt.WindingFill.
+
+    Returns:
+        QPainterPath: The path.
+    """
+    path = QPainterPath()
+    n = len(x)
+    if n == 0:
+        return path
+
+    buf = np.empty(n, dtype=[('type','>i4'), ('x','>f8'), ('y','>f8')])
+    buf['type'] = elements
+    buf['x'] = x
+    buf['y'] = y
+    # index of the start of the last subpath
+    c_start = int(np.flatnonzero(np.asarray(elements) == MOVE_TO)[-1])
+
+    data = (struct.pack('>i', n) + buf.tobytes()
+            + struct.pack('>ii', c_start, int(fill_rule)))
+    stream = QDataStream(QByteArray(data))
+    stream >> path
+    return path
+
+def arrowHeads(x0, y0, x1, y1, arrowsize, tip_angle = pi/3):
+    """Calculate the arrow head vertices of many arrows at once.
+
+    Uses the same geometry as drawArrow.
+
+    Args:
+        x0 (numpy.ndarray): x-coordinates of the start points.
+        y0 (numpy.ndarray): y-coordinates of the start points.
+        x1 (numpy.ndarray): x-coordinates of the end points.
+        y1 (numpy.ndarray): y-coordinates of the end points.
+        arrowsize (float or numpy.ndarray): Size of the arrow heads.
+        tip_angle (float, optional): Angle of the arrow heads.
+        Defaults to pi/3.
+
+    Returns:
+        numpy.ndarray: The two base vertices of each head, as an
+        array of shape (n, 2, 2).
+    """
+    angle = np.arctan2(-(y1-y0), x1-x0)
+    a = np.stack([angle+tip_angle, angle+pi-tip_angle], axis=1)
+    s = np.asarray(arrowsize, dtype=np.float64)
+    s = s[:,None] if s.ndim else s
+    return np.stack([x1[:,None]-np.sin(a)*s, y1[:,None]-np.cos(a)*s], axis=2)
+
+def arrowPath(x0, y0, x1, y1, heads):
+    """Build a single path with the outlines of many arrows.
+
+    Args:
+        x0 (numpy.ndarray): x-coordinates of the start points.
+        y0 (numpy.ndarray): y-coordinates of the start points.
+        x1 (numpy.ndarray): x-coordinates of the end points.
+        y1 (numpy.ndarray): y-coordinates of the end points.
+        heads (numpy.ndarray): Arrow head vertices from arrowHeads.
+
+    Returns:
+        QPainterPath: The arrows, each a shaft and a closed head.
+    """
+    x = np.stack([x0, x1, x1, heads[:,0,0], heads[:,1,0], x1], axis=1)
+    y = np.stack([y0, y1, y1, heads[:,0,1], heads[:,1,1], y1], axis=1)
+    elements = np.tile(ARROW_ELEMENTS, len(x0))
+    return arrayToPath(x.ravel(), y.ravel(), elements)
+
+def headPaths(x1, y1, heads, chunk = HEAD_CHUNK):
+    """Build paths for filling the arrow heads.
+
+    Antialiased filling of a path slows down sharply with the number of
+    subpaths, so for antialiased filling the heads are split into chunks.
+
+    Args:
+        x1 (numpy.ndarray): x-coordinates of the end points.
+        y1 (numpy.ndarray): y-coordinates of the end points.
+        heads (numpy.ndarray): Arrow head vertices from arrowHeads.
+        chunk (int, optional): Number of heads per path, or None for a
+        single path. Defaults to HEAD_CHUNK.
+
+    Yields:
+        QPainterPath: The next chunk of arrow heads.
+    """
+    x = np.stack([x1, heads[:,0,0], heads[:,1,0]], axis=1)
+    y = np.stack([y1, heads[:,0,1], heads[:,1,1]], axis=1)
+    chunk = chunk or max(len(x1), 1)
+    for i in range(0, len(x1), chunk):
+        n = len(x[i:i+chunk])
+        yield arrayToPath(x[i:i+chunk].ravel(), y[i:i+chunk].ravel(),
+                          np.tile(HEAD_ELEMENTS, n))
+
+def drawArrowGroup(painter, x0, y0, x1, y1, arrowsize, tip_angle, pen, brush):
+    """Draw arrows sharing a pen and brush with a few bulk calls.
+
+    When the pen draws the outlines, the heads are filled as one path
+    without antialiasing first, and the antialiased outlines smooth their
+    edges. Filling the heads of 50000 arrows this way takes about 100 ms
+    against 150 ms for antialiased chunks of HEAD_CHUNK heads, and 2.6 s
+    for a single antialiased path.
+
+    Args:
+        painter (QPainter): The painter used for drawing.
+        x0 (numpy.ndarray): x-coordinates of the start points.
+        y0 (numpy.ndarray): y-coordinates of the start points.
+        x1 (numpy.ndarray): x-coordinates of the end points.
+        y1 (numpy.ndarray): y-coordinates of the end points.
+        arrowsize (float or numpy.ndarray): Size of the arrow heads.
+        tip_angle (float): Angle of the arrow heads.
+        pen (QPen): Pen for the shafts and the outlines of the heads.
+        brush (QBrush): Brush for filling the heads.
+    """
+    if len(x0) == 0:
+        return
+    heads = arrowHeads(x0, y0, x1, y1, arrowsize, tip_angle)
+    outlined = pen.style() != Qt.NoPen
+
+    painter.setPen(Qt.NoPen)
+    painter.setBrush(brush)
+    antialiased = painter.testRenderHint(QPainter.Antialiasing)
+    if outlined:
+        painter.setRenderHint(QPainter.Antialiasing, False)
+    for path in headPaths(x1, y1, heads, None if outlined else HEAD_CHUNK):
+        painter.drawPath(path)
+    painter.setRenderHint(QPainter.Antialiasing, antialiased)
+
+    if outlined:
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawPath(arrowPath(x0, y0, x1, y1, heads))
+
+def drawArrows(painter, x0, y0, x1, y1, arrowsize, tip_angle = pi/3,
+               groups = None, pens = None):
+    """Draw many arrows with a few bulk calls.
+
+    Drawing 50000 antialiased arrows of 10 to 200 pixels still takes about
+    350 ms, most of it in rasterizing the shafts, so the pitch keeps large
+    numbers of passes at interactive rates through its cached layers and
+    by drawing the pass flow above pass_lod_threshold passes instead.
+
+    Without groups, the arrows are drawn with the current pen and brush of
+    the painter, like drawArrow. Otherwise the arrows of each group are
+    drawn with the pen of the group and a brush of the same color.
+
+    Args:
+        painter (QPainter): The painter used for drawing.
+        x0 (numpy.ndarray): x-coordinates of the start points.
+        y0 (numpy.ndarray): y-coordinates of the start points.
+        x1 (numpy.ndarray): x-coordinates of the end points.
+        y1 (numpy.ndarray): y-coordinates of the end points.
+        arrowsize (float or numpy.ndarray): Size of the arrow heads.
+        tip_angle (float, optional): Angle of the arrow heads.
+        Defaults to pi/3.
+        groups (numpy.ndarray, optional): Index into pens for each arrow.
+        Defaults to None.
+        pens (list, optional): The QPens of the groups. Defaults to None.
+    """
+    x0, y0, x1, y1 = (np.asarray(v, dtype=np.float64)
+                      for v in (x0, y0, x1, y1))
+    sizes = np.asarray(arrowsize, dtype=np.float64)
+
+    painter.save()
+    if groups is None:
+        drawArrowGroup(painter, x0, y0, x1, y1, sizes, tip_angle,
+                       painter.pen(), painter.brush())
+    else:
+        for g in np.unique(groups):
+            m = groups == g
+            drawArrowGroup(painter, x0[m], y0[m], x1[m], y1[m],
+                           sizes[m] if sizes.ndim else sizes, tip_angle,
+                           pens[g], QBrush(pens[g].color()))
+    painter.restore()
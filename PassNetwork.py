@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+import numpy as np
+from EventStore import PASS_TYPE, SUBSTITUTION_TYPE
+
+# Window ending at the first substitution of the team.
+FIRST_SUBSTITUTION = 'first_substitution'
+
+# Default number of cached networks.
+NETWORK_CACHE_SIZE = 256
+
+# Number of edge widths; the pass counts are rounded to one of them, so
+# the edges are drawn with one batch per width.
+NETWORK_WIDTH_STEPS = 5
+
+def completedPasses(events, team):
+    """Return the mask of the completed passes of a team.
+
+    StatsBomb only sets the outcome of a pass when it is not completed.
+    """
+    return ((events['type'] == PASS_TYPE) & (events['team'] == team)
+            & (events['outcome'] == -1) & (events['recipient'] != -1)
+            & np.isfinite(events['x']) & np.isfinite(events['end_x']))
+
+def windowMask(events, team, window):
+    """Return the mask of the events in a time window.
+
+    Args:
+        events (MatchEvents): The events of one match, in match order.
+        team (int): The team, whose substitutions end FIRST_SUBSTITUTION.
+        window: None for the whole match, FIRST_SUBSTITUTION for the events
+        before the first substitution of the team, or a pair of first and
+        last minute.
+
+    Returns:
+        numpy.ndarray: Boolean mask, or None for the whole match.
+    """
+    if window is None:
+        return None
+    if window == FIRST_SUBSTITUTION:
+        subs = np.flatnonzero((events['type'] == SUBSTITUTION_TYPE)
+                              & (events['team'] == team))
+        if len(subs) == 0:
+            return None
+        # the events are in match order, so the window is a prefix
+        mask = np.zeros(len(events), dtype=bool)
+        mask[:subs[0]] = True
+        return mask
+    first, last = window
+    return (events['minute'] >= first) & (events['minute'] <= last)
+
+def dominantTeam(events):
+    """Return the team with the most completed passes, or None."""
+    passes = ((events['type'] == PASS_TYPE) & (events['outcome'] == -1)
+              & (events['team'] != -1))
+    teams, counts = np.unique(events['team'][passes], return_counts=True)
+    return int(teams[np.argmax(counts)]) if len(teams) else None
+
+def widthGroups(count, steps = NETWORK_WIDTH_STEPS):
+    """Round the pass counts of the edges to one of steps widths.
+
+    Args:
+        count (numpy.ndarray): Number of passes of each edge.
+        steps (int, optional): Number of widths.
+        Defaults to NETWORK_WIDTH_STEPS.
+
+    Returns:
+        numpy.ndarray: Index of the width of each edge, 0 for the fewest
+        passes and steps-1 for the most.
+    """
+    if len(count) == 0:
+        return np.empty(0, dtype=np.int64)
+    low, high = count.min(), count.max()
+    return np.round((count-low)/max(high-low, 1)
+                    *(steps-1)).astype(np.int64)
+
+class PassNetwork:
+    """Average positions of the players of a team and the completed passes
+    between them.
+
+    The positions are kept as sums and counts, and the passes as counts, so
+    networks of several matches are merged by adding them up.
+
+    Attributes:
+        players (numpy.ndarray): Sorted player codes.
+        pos_sum (numpy.ndarray): Sum of the locations of each player, of
+        shape (n, 2).
+        pos_count (numpy.ndarray): Number of locations of each player.
+        passes (numpy.ndarray): Completed passes from the player of the row
+        to the player of the column.
+        names (dict): Mapping from player code to name.
+    """
+    def __init__(self, players, pos_sum, pos_count, passes, names):
+        self.players = players
+        self.pos_sum = pos_sum
+        self.pos_count = pos_count
+        self.passes = passes
+        self.names = names
+
+    def __len__(self):
+        return len(self.players)
+
+    @property
+    def positions(self):
+        """The average location of each player, of shape (n, 2)."""
+        return self.pos_sum/np.maximum(self.pos_count, 1)[:,None]
+
+    @property
+    def involvement(self):
+        """The number of completed passes made or received by each player."""
+        return self.passes.sum(axis=0) + self.passes.sum(axis=1)
+
+    def edges(self, min_passes):
+        """Return the pairs of players with at least min_passes passes.
+
+        Args:
+            min_passes (int): The threshold.
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray, numpy.ndarray): Indices of the
+            passers, indices of the recipients and the pass counts.
+        """
+        i, j = np.nonzero(self.passes >= max(min_passes, 1))
+        return i, j, self.passes[i, j]
+
+    @classmethod
+    def fromEvents(cls, events, team, window=None):
+        """Compute the network of a team in one match.
+
+        The players are placed at the average of the start locations of the
+        passes they made and the end locations of the passes they received.
+
+        Args:
+            events (MatchEvents): The events of the match, in match order.
+            team (int): The team.
+            window (optional): The time window, see windowMask. Defaults to
+            the whole match.
+
+        Returns:
+            PassNetwork: The network.
+        """
+        mask = completedPasses(events, team)
+        in_window = windowMask(events, team, window)
+        if in_window is not None:
+            mask &= in_window
+        passer = events['player'][mask]
+        recipient = events['recipient'][mask]
+
+        # dense indices of the players, so the adjacency is one bincount
+        players, codes = np.unique(np.concatenate([passer, recipient]),
+                                   return_inverse=True)
+        n = len(players)
+        m = len(passer)
+        i, j = codes[:m], codes[m:]
+        x = np.concatenate([events['x'][mask], events['end_x'][mask]])
+        y = np.concatenate([events['y'][mask], events['end_y'][mask]])
+        pos_sum = np.stack([np.bincount(codes, weights=x, minlength=n),
+                            np.bincount(codes, weights=y, minlength=n)],
+                           axis=1)
+        pos_count = np.bincount(codes, minlength=n)
+        passes = np.bincount(i*n+j, minlength=n*n).reshape(n, n)
+        names = { int(p) : events.name('player', p) for p in players }
+        return cls(players, pos_sum, pos_count, passes, names)
+
+    @classmethod
+    def merge(cls, parts):
+        """Merge the networks of several matches.
+
+        Args:
+            parts (list): The PassNetworks to merge, at least one.
+
+        Returns:
+            PassNetwork: The merged network over the union of the players.
+        """
+        if not parts:
+            raise ValueError("No networks to merge")
+        players = np.unique(np.concatenate([p.players for p in parts]))
+        n = len(players)
+        pos_sum = np.zeros((n, 2))
+        pos_count = np.zeros(n, dtype=np.int64)
+        passes = np.zeros(n*n, dtype=np.int64)
+        names = {}
+        for p in parts:
+            codes = np.searchsorted(players, p.players)
+            pos_sum[codes] += p.pos_sum
+            pos_count[codes] += p.pos_count
+            passes += np.bincount((codes[:,None]*n+codes[None,:]).ravel(),
+                                  weights=p.passes.ravel(),
+                                  minlength=n*n).astype(np.int64)
+            names.update(p.names)
+        return cls(players, pos_sum, pos_count, passes.reshape(n, n), names)
+
+class NetworkCache:
+    """A least recently used cache of pass networks per match, team and
+    time window."""
+    def __init__(self, size = NETWORK_CACHE_SIZE):
+        """Construct an empty cache.
+
+        Args:
+            size (int, optional): Maximum number of networks.
+            Defaults to NETWORK_CACHE_SIZE.
+        """
+        self.size = size
+        self.networks = OrderedDict()
+
+    def network(self, events, team, window=None):
+        """Return the network of a team in one match, computing it if it is
+        not cached.
+
+        Args:
+            events (MatchEvents): The events of the match, in match order.
+            team (int): The team.
+            window (optional): The time window, see windowMask.
+
+        Returns:
+            PassNetwork: The network.
+        """
+        key = (events.key, len(events), team, window)
+        if key in self.networks:
+            self.networks.move_to_end(key)
+            return self.networks[key]
+        network = PassNetwork.fromEvents(events, team, window)
+        self.networks[key] = network
+        while len(self.networks) > self.size:
+            self.networks.popitem(last=False)
+        return network
+
+    def aggregateNetwork(self, aggregate, team, window=None):
+        """Return the network of a team merged over aggregated matches.
+
+        The window is applied to every match on its own, e.g. each match
+        up to the first substitution of the team in that match.
+
+        Args:
+            aggregate (Aggregate): The aggregated matches.
+            team (int): The team.
+            window (optional): The time window, see windowMask.
+
+        Returns:
+            PassNetwork: The merged network.
+        """
+        return PassNetwork.merge([ self.network(events, team, window)
+                                   for _, events in aggregate.matchEvents() ])
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from PyQt5.QtGui import QTransform
+from PyQt5.QtCore import QRectF
+
+# StatsBomb event coordinates lie on a 120x80 grid.
+STATSBOMB_LENGTH = 120.0
+STATSBOMB_WIDTH = 80.0
+
+class PitchTransform:
+    """Maps pitch measurements and StatsBomb coordinates to pixels.
+
+    Holds the absolute measurements of the pitch in pixels, and the affine
+    map from StatsBomb coordinates onto the drawn pitch, both as a
+    QTransform and as a NumPy matrix for mapping whole arrays at once.
+    """
+    def __init__(self, scale, padding, rel_dim):
+        """Construct a PitchTransform.
+
+        Args:
+            scale (float): Scaling factor from relative dimensions to pixels.
+            padding ((int,int)): Horizontal and vertical padding in pixels.
+            rel_dim (dict): Relative dimensions of the pitch measurements.
+        """
+        self.scale = scale
+        self.padding = padding
+
+        self.abs_meas = { k : v*scale for k,v in rel_dim.items()}
+        # make sure penalty spot is visible
+        if self.abs_meas["PENALTY_SPOT_RADIUS"] < 1:
+            self.abs_meas["PENALTY_SPOT_RADIUS"] = 1
+
+        length = self.abs_meas["PITCH_LENGTH"]
+        width = self.abs_meas["PITCH_WIDTH"]
+        self.rect = QRectF(padding[0], padding[1], length, width)
+
+        sx = length/STATSBOMB_LENGTH
+        sy = width/STATSBOMB_WIDTH
+        self.matrix = np.array([[sx, 0.0, padding[0]],
+                                [0.0, sy, padding[1]]])
+        self.qtransform = QTransform(sx, 0.0, 0.0, sy, padding[0], padding[1])
+
+    def map(self, x, y):
+        """Map StatsBomb coordinates to pixels.
+
+        Args:
+            x (numpy.ndarray): x-coordinates on the StatsBomb pitch.
+            y (numpy.ndarray): y-coordinates on the StatsBomb pitch.
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray): The x- and y-coordinates in pixels.
+        """
+        m = self.matrix
+        return (np.asarray(x, dtype=np.float64)*m[0,0] + m[0,2],
+                np.asarray(y, dtype=np.float64)*m[1,1] + m[1,2])
+
+    def inverseMap(self, px, py):
+        """Map pixels to StatsBomb coordinates.
+
+        Args:
+            px (numpy.ndarray): x-coordinates in pixels.
+            py (numpy.ndarray): y-coordinates in pixels.
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray): The StatsBomb coordinates.
+        """
+        m = self.matrix
+        return ((np.asarray(px, dtype=np.float64) - m[0,2])/m[0,0],
+                (np.asarray(py, dtype=np.float64) - m[1,2])/m[1,1])
@@ -1,9 +1,30 @@
 from PyQt5.QtWidgets import (
-    QWidget
+    QWidget,
+    QRubberBand,
+    QToolTip
+)
+from PyQt5.QtGui import QBrush, QPalette, QPen, QPainter, QColor, QPixmap
+from PyQt5.QtCore import (
+    QRect, QRectF, QLine, QSize, QPointF, QTimer, Qt, pyqtSignal
+)
+import numpy as np
+from PaintingUtilities import drawArrows
+from EventStore import EventBuffer, PASS_TYPE, SHOT_TYPE
+from EventFilter import EventFilter, MINUTE_FILTER
+from Heatmap import Heatmap, HeatmapCache, eventHistogram, smoothHistogram
+from PitchTransform import PitchTransform, STATSBOMB_LENGTH, STATSBOMB_WIDTH
+from SpatialIndex import GridIndex
+from PaintProfiler import createProfiler
+from Playback import AccumulationLayer, matchClock
+from Compositor import Compositor, SizeCache, sizeKey
+from Aggregation import passFlow
+from PassNetwork import (
+    NetworkCache, dominantTeam, widthGroups, NETWORK_WIDTH_STEPS
+)
+from ShotMap import (
+    ShotAtlas, OUTCOME_COLORS, SHAPES, outcomeClass, shapeClass, sizeStep,
+    shotOrder
 )
-from PyQt5.QtGui import QBrush, QPalette, QPen, QPainter, QColor
-from PyQt5.QtCore import QRect, QLine, Qt
-from PaintingUtilities import drawArrow
 
 PITCH_DIMENSION_LIMITS = { 
     'metric' : {
@@ -49,6 +70,17 @@ PITCH_DIMENSIONS = { 'metric' : {
     }
 }
 
+# Number of pass flows kept, per events, filter and zones.
+FLOW_CACHE_SIZE = 64
+
+# Filters of the overlays which are not drawn from the filtered events; the
+# other overlays depend on every filter.
+LAYER_FILTERS = { 'network' : ('team', MINUTE_FILTER) }
+
+# Number of arrow widths of the pass flow; the pass volumes are rounded to
+# one of them, so the arrows are drawn with one batch per width.
+FLOW_WIDTH_STEPS = 8
+
 def getCircleRect(radius,midpoint):
     """Return a QRect corresponding to a circle at midpoint with radius.
 
@@ -64,6 +96,10 @@ def getCircleRect(radius,midpoint):
 
 class PitchWidget(QWidget):
     """A widget representing a football pitch, with a painter for drawing."""
+
+    # indices into events of the events selected with the rubber band
+    eventsSelected = pyqtSignal(object)
+
     def __init__(self,config,parent = None):
         """Construct a PitchWidget for representing the pitch
 
@@ -73,7 +109,34 @@ class PitchWidget(QWidget):
             Defaults to None.
         """
         super().__init__(parent)
-        
+
+        # the static pitch is rendered once per size and blitted on every
+        # repaint; everything rendered for a size is kept for a few recent
+        # sizes
+        size_entries = config["size_cache_entries"]
+        self._pitch_pixmaps = SizeCache(size_entries)
+        self._pitch_transform = None
+
+        # each overlay is cached in its own layer, so toggling an overlay
+        # only composites the layers again
+        self.compositor = Compositor(config["layers"], {
+            'heatmap' : self.drawHeatmap,
+            'passes' : self.drawPasses,
+            'shots' : self.drawShots,
+            'network' : self.drawNetwork }, size_entries)
+        # draw without cached pixmaps, so vector output stays vectors
+        self.vector_output = False
+
+        # while the widget is being resized, a scaled copy of the last
+        # frame is shown; the frame is rendered at the new size once the
+        # size has not changed for resize_debounce_ms
+        self.progressive_resize = config["progressive_resize"]
+        self._resize_frame = None
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(config["resize_debounce_ms"])
+        self._resize_timer.timeout.connect(self.resizeSettled)
+
         self.setGeometry(config["x_origin"],config["y_origin"],
                          config["window_width"],config["window_height"])
 
@@ -95,6 +158,73 @@ class PitchWidget(QWidget):
         self.showPasses = config["show_passes"]
         self.showShots = config["show_shots"]
         self.showHeatmap = config["show_heatmap"]
+        self.showNetwork = config["show_network"]
+
+        self.pass_pen = QPen(QColor(config["pass_color"]))
+        self.pass_pen.setWidth(config["pass_width"])
+        self.pass_arrow_size = config["pass_arrow_size"]
+        # above pass_lod_threshold passes, the passes are drawn as one
+        # arrow per zone, cached per events, filter and zones
+        self.pass_lod_threshold = config["pass_lod_threshold"]
+        self.pass_flow_zones = tuple(config["pass_flow_zones"])
+        self.pass_flow_width = tuple(config["pass_flow_width"])
+        self.flows = SizeCache(FLOW_CACHE_SIZE)
+
+        # shot markers are drawn from an atlas rendered for the current
+        # scale; the radii are in StatsBomb units for an xG of 0 and 1
+        self.shot_radius = tuple(config["shot_radius"])
+        self._shot_atlases = SizeCache(size_entries)
+
+        # pass networks are cached per match, team and time window; the
+        # node radii are in StatsBomb units, the edge widths in pixels
+        self.network_color = QColor(config["network_color"])
+        self.network_width = tuple(config["network_width"])
+        self.network_radius = tuple(config["network_radius"])
+        self.network_min_passes = config["network_min_passes"]
+        self.network_window = config["network_window"]
+        self.networks = NetworkCache()
+
+        self.heatmap_bins = tuple(config["heatmap_bins"])
+        self.heatmap_sigma = config["heatmap_sigma"]
+        self.heatmap_colormap = config["heatmap_colormap"]
+        self.heatmaps = HeatmapCache()
+
+        # all events, and the events passing the filter which are drawn
+        self.all_events = None
+        self.events = None
+        # a match drawn progressively is appended to a buffer, and drawn
+        # at most every stream_redraw_ms
+        self._stream = None
+        self._stream_pending = False
+        self._stream_timer = QTimer(self)
+        self._stream_timer.setSingleShot(True)
+        self._stream_timer.setInterval(config["stream_redraw_ms"])
+        self._stream_timer.timeout.connect(self.streamTimeout)
+        self.filter = EventFilter()
+        # results over several matches, whose histogram replaces the one
+        # computed from the events
+        self.aggregate = None
+
+        # the drawn events are indexed in pixels for hit testing; the index
+        # is rebuilt lazily when the events, overlays or geometry change
+        self.hover_radius = config["hover_radius"]
+        self._hit_index = None
+        self._hit_key = None
+        self._rubber_band = QRubberBand(QRubberBand.Rectangle, self)
+        self._rubber_origin = None
+        self.setMouseTracking(True)
+
+        # opt-in timing of the layers of each frame
+        self.profiler = createProfiler(config)
+
+        # in playback, only the events up to playback_time are drawn, onto
+        # an accumulation layer which is kept between frames
+        self.playback_time = None
+        self.keyframe_interval = config["playback_keyframe_events"]
+        self.max_keyframes = config["playback_max_keyframes"]
+        self._accumulation = None
+        self._accumulation_key = None
+        self._clock = (None, None)
 
     @property
     def length(self):
@@ -175,13 +305,14 @@ class PitchWidget(QWidget):
         if not value == 'metric' and not value == 'imperial':
             raise ValueError("Mode must be \'imperial\' or \'metric\'.")
         self._unit = value
+        self.invalidateGeometry()
 
     @property
-    def stripes(self):
+    def n_stripes(self):
         """The number of stripes on the field."""
-        return self._stripes
-    @stripes.setter
-    def stripes(self, value):
+        return self._n_stripes
+    @n_stripes.setter
+    def n_stripes(self, value):
         """Sets the number of stripes on the field.
 
         Args:
@@ -192,7 +323,8 @@ class PitchWidget(QWidget):
         """
         if value < 0:
             raise ValueError("Number of stripes must not be negative")
-        self._stripes = value
+        self._n_stripes = value
+        self.invalidatePitch()
 
     @property
     def x_pad(self):
@@ -211,6 +343,7 @@ class PitchWidget(QWidget):
         if value < 0:
             raise ValueError("Horizontal padding must not be negative")
         self._x_pad = value
+        self.invalidateGeometry()
 
     @property
     def y_pad(self):
@@ -229,6 +362,7 @@ class PitchWidget(QWidget):
         if value < 0:
             raise ValueError("Vertical padding must not be negative.")
         self._y_pad = value
+        self.invalidateGeometry()
 
     @property
     def marking_pen(self):
@@ -237,6 +371,7 @@ class PitchWidget(QWidget):
     @marking_pen.setter
     def marking_pen(self, value):
         self._marking_pen = value
+        self.invalidatePitch()
 
     @property
     def marking_color(self):
@@ -245,6 +380,7 @@ class PitchWidget(QWidget):
     @marking_color.setter
     def marking_color(self, value):
         self._marking_pen.setColor(value)
+        self.invalidatePitch()
 
     @property
     def marking_width(self):
@@ -253,6 +389,7 @@ class PitchWidget(QWidget):
     @marking_width.setter
     def marking_width(self, value):
         self._marking_pen.setWidth(value)
+        self.invalidatePitch()
 
     @property
     def background_color(self):
@@ -264,7 +401,7 @@ class PitchWidget(QWidget):
         palette.setBrush(QPalette.Window,QBrush(value))
         self.setPalette(palette)
         self.setAutoFillBackground(True)
-        self.update()
+        self.invalidatePitch()
 
     @property
     def even_stripe_color(self):
@@ -273,6 +410,7 @@ class PitchWidget(QWidget):
     @even_stripe_color.setter
     def even_stripe_color(self, value):
         self._even_stripe_color = value
+        self.invalidatePitch()
 
     @property
     def odd_stripe_color(self):
@@ -281,6 +419,211 @@ class PitchWidget(QWidget):
     @odd_stripe_color.setter
     def odd_stripe_color(self, value):
         self._odd_stripe_color = value
+        self.invalidatePitch()
+
+    def setEvents(self, events):
+        """Replace the events shown on the pitch.
+
+        Args:
+            events (MatchEvents): The events, or None to clear the pitch.
+        """
+        self._stream = None
+        self._stream_pending = False
+        self._stream_timer.stop()
+        self.all_events = events
+        self.aggregate = None
+        self.applyFilter()
+
+    def setFilter(self, name, value):
+        """Set or clear a filter on the shown events.
+
+        Args:
+            name (str): The filter, e.g. 'team' or 'minute'.
+            value: The value of the filter, see EventFilter.set.
+        """
+        key = self.filter.key()
+        self.filter.set(name, value)
+        if self.filter.key() != key:
+            self.applyFilter(name)
+
+    def applyFilter(self, name = None):
+        """Filter the events and repaint the overlays.
+
+        Args:
+            name (str, optional): The filter which changed, so only the
+            overlays depending on it are drawn again. Defaults to None, for
+            new events, which all overlays are drawn again for.
+        """
+        self.events = (None if self.all_events is None
+                       else self.filter.apply(self.all_events))
+        if name is None:
+            self.compositor.invalidate()
+        else:
+            layers = [ layer for layer in self.compositor.layers
+                       if name in LAYER_FILTERS.get(layer, (name,)) ]
+            if layers:
+                self.compositor.invalidate(*layers)
+        self.update()
+
+    def setAggregate(self, aggregate):
+        """Show results aggregated over several matches.
+
+        The passes and shots of the matches are drawn as events, and the
+        heatmap is drawn from the merged histogram.
+
+        Args:
+            aggregate (Aggregate): The merged results.
+        """
+        self.setEvents(aggregate.events)
+        self.aggregate = aggregate
+
+    def clearEvents(self):
+        """Remove all events from the pitch."""
+        self.setEvents(None)
+
+    def appendEvents(self, batch):
+        """Add a batch of events and repaint the overlays.
+
+        Used to draw a match progressively while it is being loaded. The
+        batches are appended to a buffer rather than concatenated, and the
+        overlays are drawn again at most every stream_redraw_ms.
+
+        Args:
+            batch (MatchEvents): The events to add.
+        """
+        if self._stream is None:
+            stream = EventBuffer(batch.key)
+            if self.all_events is not None:
+                stream.append(self.all_events)
+            self._stream = stream
+        self._stream.append(batch)
+        if self._stream_timer.isActive():
+            self._stream_pending = True
+        else:
+            self.showStream()
+
+    def showStream(self):
+        """Show the events appended so far."""
+        self._stream_pending = False
+        self._stream_timer.start()
+        self.all_events = self._stream.events()
+        self.aggregate = None
+        self.applyFilter()
+
+    def streamTimeout(self):
+        if self._stream_pending:
+            self.showStream()
+
+    def hitIndex(self):
+        """Return the spatial index over the drawn events.
+
+        Returns:
+            (GridIndex, numpy.ndarray): The index over the pixel positions
+            of the drawn events, and the indices of those events.
+        """
+        # the objects themselves are compared, as ids may be reused
+        key = (self.events, len(self.events), self.showPasses,
+               self.showShots, self.pitch_transform)
+        if key != self._hit_key:
+            events = self.events
+            types = []
+            if self.showPasses:
+                types.append(PASS_TYPE)
+            if self.showShots:
+                types.append(SHOT_TYPE)
+            targets = np.flatnonzero(np.isin(events['type'], types)
+                                     & np.isfinite(events['x'])
+                                     & np.isfinite(events['y']))
+            px, py = self.pitch_transform.map(events['x'][targets],
+                                              events['y'][targets])
+            self._hit_index = (GridIndex(px, py), targets)
+            self._hit_key = key
+        return self._hit_index
+
+    def eventAt(self, pos):
+        """Return the drawn event nearest to a position.
+
+        Args:
+            pos (QPoint): A position in the widget.
+
+        Returns:
+            int: Index of the event, or None if no event is within the
+            hover radius.
+        """
+        if self.events is None:
+            return None
+        index, targets = self.hitIndex()
+        i = index.nearest(pos.x(), pos.y(), self.hover_radius)
+        return None if i is None else int(targets[i])
+
+    def eventsIn(self, rect):
+        """Return the drawn events inside a rectangle.
+
+        Args:
+            rect (QRect): A rectangle in the widget.
+
+        Returns:
+            numpy.ndarray: Indices of the events.
+        """
+        if self.events is None:
+            return np.empty(0, dtype=np.int64)
+        index, targets = self.hitIndex()
+        return targets[index.rect(rect.left(), rect.top(),
+                                  rect.right(), rect.bottom())]
+
+    def describeEvent(self, i):
+        """Describe an event for a tooltip.
+
+        Args:
+            i (int): Index of the event.
+
+        Returns:
+            str: The player, time, type and outcome of the event.
+        """
+        event = self.events.event(i)
+        lines = [event.name('player') or "",
+                 "{}:{:02d} {}".format(event.minute, event.second,
+                                       event.name('type'))]
+        outcome = event.name('outcome')
+        if outcome is None and event.type == PASS_TYPE:
+            outcome = "Complete"
+        if outcome is not None:
+            lines.append(outcome)
+        if event.type == SHOT_TYPE and np.isfinite(event.xg):
+            lines.append("xG {:.2f}".format(event.xg))
+        return "\n".join(lines)
+
+    def mousePressEvent(self, event):
+        """Overloaded function, starting a rubber band selection."""
+        if event.button() == Qt.LeftButton:
+            self._rubber_origin = event.pos()
+            self._rubber_band.setGeometry(QRect(event.pos(), QSize()))
+            self._rubber_band.show()
+        return super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        """Overloaded function, showing the hovered event in a tooltip or
+        growing the rubber band."""
+        if self._rubber_origin is not None:
+            self._rubber_band.setGeometry(
+                QRect(self._rubber_origin, event.pos()).normalized())
+        else:
+            i = self.eventAt(event.pos())
+            if i is None:
+                QToolTip.hideText()
+            else:
+                QToolTip.showText(event.globalPos(), self.describeEvent(i),
+                                  self)
+        return super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        """Overloaded function, finishing a rubber band selection."""
+        if event.button() == Qt.LeftButton and self._rubber_origin is not None:
+            self._rubber_band.hide()
+            rect = QRect(self._rubber_origin, event.pos()).normalized()
+            self._rubber_origin = None
+            self.eventsSelected.emit(self.eventsIn(rect))
+        return super().mouseReleaseEvent(event)
 
     def paintEvent(self, event):
         """Overloaded function for painting the widget.
@@ -291,41 +634,185 @@ class PitchWidget(QWidget):
         Returns:
             [type]: [description]
         """
+        profiler = self.profiler
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        self.drawPitch(painter)
+        with profiler.frame():
+            if self._resize_frame is not None:
+                with profiler.layer("resize"):
+                    self.drawResizeFrame(painter)
+            elif self.vector_output:
+                self.drawDirect(painter)
+            else:
+                with profiler.layer("blit"):
+                    painter.drawPixmap(0, 0, self.pitchPixmap())
+                if self.playback_time is not None:
+                    with profiler.layer("playback"):
+                        painter.setRenderHint(QPainter.Antialiasing)
+                        self.drawPlayback(painter)
+                else:
+                    self.compositor.composite(painter, self.size(),
+                                              self.devicePixelRatioF(),
+                                              self.visibleLayers(), profiler)
+        profiler.drawReadout(painter, self.rect())
+        painter.end()
+        return super().paintEvent(event)
+
+    def visibleLayers(self):
+        """Return the names of the overlays which are switched on."""
+        visible = set()
+        if self.showHeatmap:
+            visible.add('heatmap')
         if self.showPasses:
-            painter.drawText(0,0,75,50,0,"Passes")
-            #TODO: Implement passes
+            visible.add('passes')
         if self.showShots:
-            painter.drawText(100,100,75,50,0,"Shots")
-            #TODO: Implement shots
-        if self.showHeatmap:
-            painter.drawText(200,200,75,100,0,"Heatmap")
-            #TODO: Implement heatmap
+            visible.add('shots')
+        if self.showNetwork:
+            visible.add('network')
+        return visible
+
+    def drawDirect(self, painter):
+        """Draw the pitch and the visible overlays without caching them."""
+        painter.fillRect(self.rect(), self.background_color)
+        painter.setRenderHint(QPainter.Antialiasing)
+        self.drawPitch(painter)
+        visible = self.visibleLayers()
+        for layer in self.compositor.ordered:
+            if layer.name in visible:
+                painter.setOpacity(layer.opacity)
+                layer.draw(painter)
+        painter.setOpacity(1.0)
+
+    def resizeEvent(self, event):
+        """Overloaded function, showing the last frame scaled until the
+        resizing settles.
+
+        The caches are keyed by size, so nothing needs to be discarded.
+
+        Args:
+            event (QtGui.QResizeEvent): A resize event.
+        """
+        if (self.progressive_resize and self.isVisible() and
+                not self.vector_output):
+            if self._resize_frame is None:
+                self._resize_frame = self.lastFrame(event.oldSize())
+            if self._resize_frame is not None:
+                self._resize_timer.start()
+        self.update()
+        return super().resizeEvent(event)
+
+    def resizeSettled(self):
+        """Render the frame at the new size once resizing has stopped."""
+        self._resize_frame = None
+        self.update()
+
+    def lastFrame(self, size):
+        """Compose the frame last shown at a size from the caches.
+
+        Args:
+            size (QSize): The size of the frame.
+
+        Returns:
+            QPixmap: The frame, or None if it is not cached.
+        """
+        ratio = self.devicePixelRatioF()
+        pitch = self._pitch_pixmaps.get(sizeKey(size, ratio))
+        if pitch is None:
+            return None
+        if self.playback_time is not None:
+            if (self._accumulation is None or
+                    self._accumulation.size != size):
+                return None
+            overlays = [ (self._accumulation.pixmap, 1.0) ]
+        else:
+            overlays = self.compositor.cached(size, ratio,
+                                              self.visibleLayers())
+            if overlays is None:
+                return None
+        frame = QPixmap(pitch)
+        painter = QPainter(frame)
+        for pixmap, opacity in overlays:
+            painter.setOpacity(opacity)
+            painter.drawPixmap(0, 0, pixmap)
         painter.end()
-        return super().paintEvent(event)
+        return frame
+
+    def drawResizeFrame(self, painter):
+        """Draw the last frame scaled to the widget, keeping its aspect
+        ratio, without antialiasing or smooth scaling."""
+        frame = self._resize_frame
+        source = QSize(frame.size()/frame.devicePixelRatio())
+        target = source.scaled(self.size(), Qt.KeepAspectRatio)
+        painter.fillRect(self.rect(), self.background_color)
+        painter.drawPixmap(
+            QRectF((self.size().width()-target.width())/2,
+                   (self.size().height()-target.height())/2,
+                   target.width(), target.height()),
+            frame, QRectF(frame.rect()))
+
+    def invalidatePitch(self):
+        """Discard the cached pitch, so it is redrawn on the next repaint."""
+        self._pitch_pixmaps.clear()
+        self.update()
+
+    def invalidateGeometry(self):
+        """Discard the pixel transform, the cached pitch and the layers."""
+        self._pitch_transform = None
+        self.compositor.invalidate()
+        self.invalidatePitch()
+
+    @property
+    def pitch_transform(self):
+        """The transform from pitch measurements and StatsBomb coordinates
+        to pixels, computed when the size or dimensions have changed."""
+        size = self.size()
+        if self._pitch_transform is None or self._pitch_transform[0] != size:
+            f, p = self.calculatePadding()
+            self._pitch_transform = (size, PitchTransform(f, p, self.rel_dim))
+        return self._pitch_transform[1]
+
+    def pitchPixmap(self, ratio = None):
+        """Return the static pitch, rendering it if it is not cached.
+
+        Args:
+            ratio (float, optional): The device pixel ratio of the pixmap.
+            Defaults to the ratio of the widget.
+
+        Returns:
+            QPixmap: The background, stripes and markings of the pitch.
+        """
+        ratio = ratio or self.devicePixelRatioF()
+        key = sizeKey(self.size(), ratio)
+        pixmap = self._pitch_pixmaps.get(key)
+        if pixmap is None:
+            pixmap = QPixmap(self.size()*ratio)
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(self.background_color)
+
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.Antialiasing)
+            self.drawPitch(painter)
+            painter.end()
+            self._pitch_pixmaps.put(key, pixmap)
+        return pixmap
 
     def drawPitch(self,painter):
         """ Draw a football pitch using a painter."""
-        #calculate the absolute measurements in pixels
-        f, p = self.calculatePadding()
-        abs_meas = { k : v*f for k,v in self.rel_dim.items()}
-
-        # make sure penalty spot is visible
-        if abs_meas["PENALTY_SPOT_RADIUS"] < 1:
-            abs_meas["PENALTY_SPOT_RADIUS"] = 1
+        # the absolute measurements in pixels
+        p = self.pitch_transform.padding
+        abs_meas = self.pitch_transform.abs_meas
 
         # draw offside stripes
-        self.drawStripes(p,abs_meas,painter)
+        with self.profiler.layer("stripes"):
+            self.drawStripes(p,abs_meas,painter)
 
         painter.setPen((self.marking_pen))
         painter.setBrush(QBrush(Qt.NoBrush))
 
         # draw field markings
-        self.drawRects(p,abs_meas,painter)
-        self.drawArcs(p,abs_meas,painter)
-        self.drawLines(p,abs_meas,painter)
+        with self.profiler.layer("markings"):
+            self.drawRects(p,abs_meas,painter)
+            self.drawArcs(p,abs_meas,painter)
+            self.drawLines(p,abs_meas,painter)
 
     def drawStripes(self,p,abs_meas,painter):
         """ Draws the stripes on the field
@@ -394,7 +881,7 @@ class PitchWidget(QWidget):
                                int(abs_meas["GOAL_WIDTH"])))
 
         # Draw right penalty box
-        painter.drawRect(QRect(abs_meas["PITCH_LENGTH"]+p[0]
+        painter.drawRect(QRect(int(abs_meas["PITCH_LENGTH"])+p[0]
                                -int(abs_meas["PENALTY_BOX_DEPTH"]),
                                p[1]+int((abs_meas["PITCH_WIDTH"]
                                 -abs_meas["PENALTY_BOX_WIDTH"])/2),
@@ -402,7 +889,7 @@ class PitchWidget(QWidget):
                                int(abs_meas["PENALTY_BOX_WIDTH"])))
 
         # Draw right goal area
-        painter.drawRect(QRect(abs_meas["PITCH_LENGTH"]+p[0]
+        painter.drawRect(QRect(int(abs_meas["PITCH_LENGTH"])+p[0]
                             -int(abs_meas["GOAL_AREA_DEPTH"]),
                              p[1]+int((abs_meas["PITCH_WIDTH"]
                             -abs_meas["GOAL_AREA_WIDTH"])/2),
@@ -410,14 +897,14 @@ class PitchWidget(QWidget):
                              int(abs_meas["GOAL_AREA_WIDTH"])))
 
         # Draw right goal
-        painter.drawRect(QRect(abs_meas["PITCH_LENGTH"]+p[0],
+        painter.drawRect(QRect(int(abs_meas["PITCH_LENGTH"])+p[0],
                              p[1]+int((abs_meas["PITCH_WIDTH"]
                             -abs_meas["GOAL_WIDTH"])/2),
                              int(abs_meas["GOAL_DEPTH"]),
                              int(abs_meas["GOAL_WIDTH"])))
 
     def drawArcs(self,p,abs_meas,painter):
-        frame_width = self.geometry().width()
+        right_spot = p[0]+abs_meas["PITCH_LENGTH"]-abs_meas["PENALTY_SPOT"]
 
         # Draw the centre circle
         painter.drawEllipse(getCircleRect(abs_meas["CENTER_CIRCLE_RADIUS"],
@@ -432,8 +919,7 @@ class PitchWidget(QWidget):
 
         # Draw right penalty box arc
         painter.drawArc(getCircleRect(abs_meas["PENALTY_KICK_CIRCLE"],
-                                        (frame_width-p[0]
-                                        -abs_meas["PENALTY_SPOT"],
+                                        (right_spot,
                                             p[1]+abs_meas["PITCH_WIDTH"]/2)),
                                         2030,1700)
 
@@ -447,8 +933,7 @@ class PitchWidget(QWidget):
 
         # Draw right penalty spot
         painter.drawEllipse(getCircleRect(abs_meas["PENALTY_SPOT_RADIUS"],
-                                        (frame_width-p[0]
-                                        -abs_meas["PENALTY_SPOT"],
+                                        (right_spot,
                                         p[1]+abs_meas["PITCH_WIDTH"]/2)))
         
     def drawLines(self,p,abs_meas,painter):
@@ -458,11 +943,323 @@ class PitchWidget(QWidget):
                              p[0]+int(abs_meas["PITCH_LENGTH"]/2),
                              p[1]+int(abs_meas["PITCH_WIDTH"])))
     
-    def drawPasses(self,p,abs_meas,painter):
-        pass
+    def heatmapAvailable(self):
+        """Whether the heatmap can be drawn.
+
+        The heatmap of aggregated matches is drawn from the merged
+        histogram, which covers the unfiltered events of the bins it was
+        aggregated with only; the aggregated events hold the passes, shots
+        and substitutions only, so they can not stand in for it.
+        """
+        aggregate = self.aggregate
+        return aggregate is None or (
+            not self.filter.isActive() and
+            aggregate.histogram.shape == self.heatmap_bins[::-1])
+
+    def drawHeatmap(self,painter):
+        """Draw a heatmap of the event locations over the pitch.
+
+        Args:
+            painter (QPainter): The painter used for drawing.
+        """
+        if self.events is None or len(self.events) == 0:
+            return
+        if not self.heatmapAvailable():
+            return
+        events = self.events
+        key = (events.key, self.filter.key(), len(events), self.heatmap_bins,
+               self.heatmap_sigma, self.heatmap_colormap)
+        aggregate = self.aggregate
+        if aggregate is not None:
+            heatmap = self.heatmaps.heatmap(key, lambda: Heatmap(
+                smoothHistogram(aggregate.histogram, self.heatmap_sigma),
+                self.heatmap_colormap))
+        else:
+            heatmap = self.heatmaps.heatmap(key, lambda: Heatmap(
+                eventHistogram(events['x'], events['y'], self.heatmap_bins,
+                               self.heatmap_sigma),
+                self.heatmap_colormap))
+
+        painter.save()
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.drawImage(self.pitch_transform.rect, heatmap.image)
+        painter.restore()
+
+    def setPlaybackTime(self, seconds):
+        """Show only the events up to a match time.
+
+        Args:
+            seconds (float): The match time in seconds, or None to show all
+            events.
+        """
+        self.playback_time = seconds
+        self.update()
+
+    def matchClock(self):
+        """Return the match times of the events, see Playback.matchClock."""
+        if self._clock[0] is not self.events:
+            self._clock = (self.events, matchClock(self.events))
+        return self._clock[1]
+
+    def drawPlayback(self, painter):
+        """Draw the events up to the playback time.
 
-    def drawShots(self,p,abs_meas,painter):
-        pass
+        The newly revealed events are drawn onto the accumulation layer,
+        which is then drawn over the pitch.
+
+        Args:
+            painter (QPainter): The painter used for drawing.
+        """
+        if self.events is None:
+            return
+        key = (self.events, self.pitch_transform, self.showPasses,
+               self.showShots)
+        if key != self._accumulation_key:
+            self._accumulation = AccumulationLayer(
+                self.size(), self.devicePixelRatioF(), self.keyframe_interval,
+                self.max_keyframes)
+            self._accumulation_key = key
+        count = int(np.searchsorted(self.matchClock(), self.playback_time,
+                                    side='right'))
+        self._accumulation.advance(count, self.drawEventRange)
+        painter.drawPixmap(0, 0, self._accumulation.pixmap)
+
+    def drawEventRange(self, painter, start, stop):
+        """Draw the shown overlays of a range of the events.
+
+        Args:
+            painter (QPainter): The painter used for drawing.
+            start (int): Index of the first event.
+            stop (int): Index after the last event.
+        """
+        events = self.events.select(slice(start, stop))
+        if self.showPasses:
+            self.drawPasses(painter, events)
+        if self.showShots:
+            self.drawShots(painter, events)
+
+    def drawPasses(self,painter,events=None):
+        """Draw the passes as arrows from their start to end locations.
+
+        When the shown events have more than pass_lod_threshold passes, the
+        pass flow is drawn instead.
+
+        Args:
+            painter (QPainter): The painter used for drawing.
+            events (MatchEvents, optional): The events to draw. Defaults to
+            the shown events.
+        """
+        lod = events is None
+        if events is None:
+            events = self.events
+        if events is None:
+            return
+        passes = ((events['type'] == PASS_TYPE) & np.isfinite(events['x'])
+                  & np.isfinite(events['end_x']))
+        if lod and np.count_nonzero(passes) > self.pass_lod_threshold:
+            self.drawPassFlow(painter)
+            return
+
+        x0, y0 = self.pitch_transform.map(events['x'][passes],
+                                          events['y'][passes])
+        x1, y1 = self.pitch_transform.map(events['end_x'][passes],
+                                          events['end_y'][passes])
+        painter.setPen(self.pass_pen)
+        painter.setBrush(QBrush(self.pass_pen.color()))
+        drawArrows(painter, x0, y0, x1, y1, self.pass_arrow_size)
+
+    def passFlow(self):
+        """Return the pass sums per zone of the shown events.
+
+        Returns:
+            numpy.ndarray: The sums, see Aggregation.passFlow.
+        """
+        aggregate = self.aggregate
+        # the merged sums cover the unfiltered events only
+        if (aggregate is not None and not self.filter.isActive() and
+                aggregate.flow_zones == self.pass_flow_zones):
+            return aggregate.pass_flow
+        events = self.events
+        key = (events.key, self.filter.key(), len(events),
+               self.pass_flow_zones)
+        flow = self.flows.get(key)
+        if flow is None:
+            flow = passFlow(events, self.pass_flow_zones)
+            self.flows.put(key, flow)
+        return flow
+
+    def drawPassFlow(self,painter):
+        """Draw one arrow per zone along the mean direction of the passes
+        starting in it, as wide as the number of passes.
+
+        The cost depends on the number of zones only.
+
+        Args:
+            painter (QPainter): The painter used for drawing.
+        """
+        zones = self.pass_flow_zones
+        flow = self.passFlow()
+        zone = np.flatnonzero(flow[:,0] > 0)
+        count = flow[zone,0]
+        dx, dy = flow[zone,1]/count, flow[zone,2]/count
+        length = np.hypot(dx, dy)
+        keep = length > 0
+        zone, count, length = zone[keep], count[keep], length[keep]
+        if len(zone) == 0:
+            return
+
+        # arrows of a fixed length, centred on the zones
+        zone_length = STATSBOMB_LENGTH/zones[0]
+        zone_width = STATSBOMB_WIDTH/zones[1]
+        half = 0.4*min(zone_length, zone_width)
+        cx = (zone % zones[0] + 0.5)*zone_length
+        cy = (zone // zones[0] + 0.5)*zone_width
+        ux, uy = dx[keep]/length*half, dy[keep]/length*half
+        x0, y0 = self.pitch_transform.map(cx-ux, cy-uy)
+        x1, y1 = self.pitch_transform.map(cx+ux, cy+uy)
+
+        groups = np.ceil(count/count.max()*FLOW_WIDTH_STEPS).astype(np.int64)-1
+        widths = np.linspace(self.pass_flow_width[0], self.pass_flow_width[1],
+                             FLOW_WIDTH_STEPS)
+        pens = [ QPen(self.pass_pen.color(), w) for w in widths ]
+        drawArrows(painter, x0, y0, x1, y1, self.pass_arrow_size+widths[groups],
+                   groups=groups, pens=pens)
+
+    def shotAtlas(self):
+        """Return the sprite atlas of the shot markers, rendering it again
+        when the scale of the pitch or the device pixel ratio has changed.
+
+        Returns:
+            ShotAtlas: The atlas.
+        """
+        scale = self.pitch_transform.matrix[0,0]
+        key = (round(scale, 4), self.devicePixelRatioF())
+        atlas = self._shot_atlases.get(key)
+        if atlas is None:
+            atlas = ShotAtlas(self.shot_radius[0]*scale,
+                              self.shot_radius[1]*scale, key[1])
+            self._shot_atlases.put(key, atlas)
+        return atlas
+
+    def drawShots(self,painter,events=None):
+        """Draw the shots as markers sized by their xG, coloured by their
+        outcome and shaped by the body part.
+
+        Args:
+            painter (QPainter): The painter used for drawing.
+            events (MatchEvents, optional): The events to draw. Defaults to
+            the shown events.
+        """
+        if events is None:
+            events = self.events
+        if events is None:
+            return
+        shots = np.flatnonzero((events['type'] == SHOT_TYPE)
+                               & np.isfinite(events['x']))
+        shots = shots[shotOrder(events['xg'][shots])]
+        x, y = self.pitch_transform.map(events['x'][shots],
+                                        events['y'][shots])
+        shape = shapeClass(events['body_part'][shots])
+        color = outcomeClass(events['outcome'][shots])
+        step = sizeStep(events['xg'][shots])
+
+        atlas = self.shotAtlas()
+        if self.vector_output:
+            # a pixmap would be embedded as an image
+            painter.setPen(QPen(QColor("#000000"), 1.0))
+            for i in range(len(shots)):
+                painter.setBrush(QColor(OUTCOME_COLORS[color[i]]))
+                atlas.drawMarker(painter, SHAPES[shape[i]],
+                                 QPointF(x[i], y[i]), atlas.radii[step[i]])
+            return
+        painter.drawPixmapFragments(atlas.fragments(x, y, shape, color, step),
+                                    atlas.pixmap)
+
+    def setNetworkWindow(self, window):
+        """Set the time window of the pass network.
+
+        Args:
+            window: None for the whole match, or FIRST_SUBSTITUTION for the
+            events before the first substitution of the team.
+        """
+        self.network_window = window
+        self.compositor.invalidate('network')
+        self.update()
+
+    def passNetwork(self):
+        """Return the pass network of the shown events.
+
+        The network is of the filtered team, or else of the team with the
+        most completed passes. A minute range filter takes the place of the
+        time window.
+
+        Returns:
+            PassNetwork: The network, or None if there are no events.
+        """
+        events = self.all_events
+        if events is None:
+            return None
+        team = self.filter.get('team')
+        team = team[0] if team is not None and len(team) == 1 else \
+            dominantTeam(events)
+        if team is None:
+            return None
+        window = self.filter.get(MINUTE_FILTER) or self.network_window
+        if self.aggregate is not None:
+            return self.networks.aggregateNetwork(self.aggregate, team, window)
+        return self.networks.network(events, team, window)
+
+    def drawNetwork(self,painter):
+        """Draw the pass network, with the players at their average
+        positions and arrows between the players who passed to each other
+        at least network_min_passes times.
+
+        Args:
+            painter (QPainter): The painter used for drawing.
+        """
+        network = self.passNetwork()
+        if network is None or len(network) == 0:
+            return
+        transform = self.pitch_transform
+        positions = network.positions
+        x, y = transform.map(positions[:,0], positions[:,1])
+        involvement = network.involvement
+        scale = transform.matrix[0,0]
+        radius = scale*(self.network_radius[0] + (self.network_radius[1]
+                        - self.network_radius[0])*involvement
+                        /max(involvement.max(), 1))
+
+        i, j, count = network.edges(self.network_min_passes)
+        # arrows run between the edges of the nodes, shifted sideways so
+        # the passes in both directions between two players are apart
+        dx, dy = x[j]-x[i], y[j]-y[i]
+        length = np.hypot(dx, dy)
+        keep = length > radius[i]+radius[j]
+        i, j, count = i[keep], j[keep], count[keep]
+        ux, uy = dx[keep]/length[keep], dy[keep]/length[keep]
+        shift = self.network_width[1]/2+1
+        ox, oy = -uy*shift, ux*shift
+        groups = widthGroups(count)
+        widths = np.linspace(self.network_width[0], self.network_width[1],
+                             NETWORK_WIDTH_STEPS)
+        pens = [ QPen(self.network_color, w) for w in widths ]
+        drawArrows(painter, x[i]+ux*radius[i]+ox, y[i]+uy*radius[i]+oy,
+                   x[j]-ux*radius[j]+ox, y[j]-uy*radius[j]+oy,
+                   self.pass_arrow_size+widths[groups],
+                   groups=groups, pens=pens)
+
+        painter.save()
+        painter.setPen(QPen(QColor("#000000"), 1.0))
+        painter.setBrush(self.network_color)
+        for k in range(len(network)):
+            painter.drawEllipse(QPointF(x[k], y[k]), radius[k], radius[k])
+        painter.setPen(self.network_color)
+        for k, code in enumerate(network.players.tolist()):
+            # the last name, or the id of a player without a name
+            words = (network.names.get(code) or "").split()
+            painter.drawText(QPointF(x[k]-radius[k], y[k]+radius[k]+12),
+                             words[-1] if words else str(code))
+        painter.restore()
 
     def calculatePadding(self):
         """Calculate the scaling factor and padding for rendering the pitch.
@@ -494,4 +1291,5 @@ class PitchWidget(QWidget):
         self.rel_dim = { k : v/x for 
                     k,v in PITCH_DIMENSIONS[self.unit].items()}
         self.rel_dim["PITCH_LENGTH"] = self.length/x
-        self.rel_dim["PITCH_WIDTH"] = self.width/x
\ No newline at end of file
+        self.rel_dim["PITCH_WIDTH"] = self.width/x
+        self.invalidateGeometry()
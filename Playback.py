@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from PyQt5.QtGui import QPixmap, QPainter
+from PyQt5.QtCore import QObject, QTimer, QElapsedTimer, Qt, pyqtSignal
+
+# Interval of the playback timer in ms.
+FRAME_INTERVAL = 16
+
+def matchClock(events):
+    """Return the match time of each event in seconds.
+
+    StatsBomb minutes continue over the periods, but the stoppage time of a
+    period overlaps the start of the next, so the times are made monotonic
+    in event order.
+
+    Args:
+        events (MatchEvents): The events, in match order.
+
+    Returns:
+        numpy.ndarray: Non-decreasing times in seconds.
+    """
+    seconds = (events['minute'].astype(np.int32)*60
+               + np.maximum(events['second'], 0))
+    return np.maximum.accumulate(seconds) if len(seconds) else seconds
+
+class AccumulationLayer:
+    """A transparent pixmap on which the events revealed so far are drawn.
+
+    Advancing draws only the newly revealed events. Snapshots are kept every
+    keyframe_interval events, so going back in time restarts from the
+    nearest snapshot rather than from an empty pixmap. Each snapshot is a
+    copy of the whole layer, so at most max_keyframes are kept: when there
+    would be more, the interval is doubled and every other snapshot dropped.
+    """
+    def __init__(self, size, ratio, keyframe_interval, max_keyframes):
+        """Construct an empty layer.
+
+        Args:
+            size (QSize): Size of the layer in device independent pixels.
+            ratio (float): The device pixel ratio.
+            keyframe_interval (int): Number of events between snapshots.
+            max_keyframes (int): Maximum number of snapshots kept.
+        """
+        self.size = size
+        self.ratio = ratio
+        self.interval = keyframe_interval
+        self.max_keyframes = max_keyframes
+        self.keyframes = {}
+        self.restore(0)
+
+    def restore(self, count):
+        """Reset the layer to the snapshot after count events, or to an
+        empty layer if count is zero."""
+        if count == 0:
+            self.pixmap = QPixmap(self.size*self.ratio)
+            self.pixmap.setDevicePixelRatio(self.ratio)
+            self.pixmap.fill(Qt.transparent)
+        else:
+            self.pixmap = self.keyframes[count].copy()
+        self.count = count
+
+    def advance(self, count, draw):
+        """Show the first count events.
+
+        Args:
+            count (int): Number of revealed events.
+            draw (callable): Called with a painter, the first and the stop
+            index to draw a range of events.
+        """
+        keyframe = max((k for k in self.keyframes if k <= count), default=0)
+        if count < self.count or keyframe > self.count:
+            self.restore(keyframe)
+        if count == self.count:
+            return
+
+        painter = QPainter(self.pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        while self.count < count:
+            stop = min(count, (self.count // self.interval + 1)*self.interval)
+            draw(painter, self.count, stop)
+            self.count = stop
+            if stop % self.interval == 0 and stop not in self.keyframes:
+                painter.end()
+                self.keyframes[stop] = self.pixmap.copy()
+                if len(self.keyframes) > self.max_keyframes:
+                    self.thinKeyframes()
+                painter.begin(self.pixmap)
+                painter.setRenderHint(QPainter.Antialiasing)
+        painter.end()
+
+    def thinKeyframes(self):
+        """Double the interval between snapshots, dropping the snapshots
+        which are not on the new interval."""
+        self.interval *= 2
+        self.keyframes = { k : v for k, v in self.keyframes.items()
+                           if k % self.interval == 0 }
+
+class PlaybackController(QObject):
+    """Advances a match clock in real time, multiplied by a speed."""
+    # the match time in seconds
+    timeChanged = pyqtSignal(float)
+    # whether the clock is running
+    playingChanged = pyqtSignal(bool)
+
+    def __init__(self, parent = None):
+        """Construct a stopped PlaybackController at time zero.
+
+        Args:
+            parent (PyQt5.QtCore.QObject, optional): Parent object.
+            Defaults to None.
+        """
+        super().__init__(parent)
+        self.time = 0.0
+        self.end = 0.0
+        self.speed = 1.0
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(FRAME_INTERVAL)
+        self.timer.timeout.connect(self.tick)
+        self.elapsed = QElapsedTimer()
+
+    def isPlaying(self):
+        return self.timer.isActive()
+
+    def setEnd(self, end):
+        """Set the match time at which playback stops."""
+        self.end = end
+        if self.time > end:
+            self.seek(end)
+
+    def setSpeed(self, speed):
+        """Set how many match seconds pass per second."""
+        self.speed = speed
+
+    def play(self):
+        """Start the clock, from the start if it is at the end."""
+        if self.time >= self.end:
+            self.seek(0.0)
+        self.elapsed.start()
+        self.timer.start()
+        self.playingChanged.emit(True)
+
+    def pause(self):
+        """Stop the clock."""
+        self.timer.stop()
+        self.playingChanged.emit(False)
+
+    def toggle(self):
+        """Pause if playing, otherwise play."""
+        if self.isPlaying():
+            self.pause()
+        else:
+            self.play()
+
+    def seek(self, time):
+        """Jump to a match time in seconds."""
+        self.time = min(max(time, 0.0), self.end)
+        self.timeChanged.emit(self.time)
+
+    def tick(self):
+        # advance by the real elapsed time, so late timer events do not
+        # slow down the clock
+        dt = self.elapsed.restart()/1000.0
+        self.seek(self.time + dt*self.speed)
+        if self.time >= self.end:
+            self.pause()
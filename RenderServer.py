@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Serve PNG images of match overlays over HTTP.
+
+Runs headless on the offscreen Qt platform. Images are rendered by
+PitchWidgets in a bounded pool of processes, and cached in memory and on
+disk under cache_path, keyed by the request and the version of the events
+file. Identical requests arriving while an image is rendered share the
+render.
+
+Request: GET /render?match=ID&overlay=passes|shots|heatmap|network
+         [&width=W&height=H] [&team=CODES] [&player=CODES] [&period=CODES]
+         [&type=CODES] [&outcome=CODES] [&minute=FIRST-LAST]
+where CODES are comma separated.
+
+Usage: python RenderServer.py [--config FILE] [--host HOST] [--port PORT]
+       [--workers N]
+"""
+
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from EventStore import EventStore
+from EventFilter import CODE_FILTERS, MINUTE_FILTER
+
+OVERLAYS = ('passes', 'shots', 'heatmap', 'network')
+
+# Directory under cache_path holding the rendered images.
+RENDER_DIRECTORY = "renders"
+
+# Bump whenever the rendering changes, so that stale images are not served.
+RENDER_VERSION = 1
+
+# Longest accepted request head in bytes.
+MAX_HEAD = 8192
+
+HTTP_REASONS = { 200 : "OK", 400 : "Bad Request", 404 : "Not Found",
+                 405 : "Method Not Allowed", 500 : "Internal Server Error" }
+
+# State of a worker process, created once by initWorker.
+_worker = {}
+
+def initWorker(config):
+    """Create the application and the pitch of a worker process.
+
+    Args:
+        config (dict): The configuration dictionary.
+    """
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import Qt
+    from PitchWidget import PitchWidget
+
+    app = QApplication([])
+    pitch = PitchWidget(config["Visualiser"]["Pitch"])
+    pitch.setAttribute(Qt.WA_DontShowOnScreen)
+    # a request of a new size must not get the previous image scaled
+    pitch.progressive_resize = False
+    pitch.show()
+
+    _worker["app"] = app
+    _worker["pitch"] = pitch
+    _worker["store"] = EventStore(config["StatsBomb"])
+
+def renderImage(match_id, overlay, filters, size):
+    """Render an overlay of a match to PNG in a worker process.
+
+    Args:
+        match_id (int): The match id.
+        overlay (str): One of OVERLAYS.
+        filters (dict): Mapping from filter name to its value, see
+        EventFilter.set.
+        size ((int,int)): Width and height of the image.
+
+    Returns:
+        bytes: The PNG data.
+    """
+    from PyQt5.QtGui import QImage
+    from PyQt5.QtCore import QBuffer, QByteArray, QIODevice
+
+    pitch = _worker["pitch"]
+    if (pitch.size().width(), pitch.size().height()) != size:
+        pitch.resize(*size)
+    for name in CODE_FILTERS + (MINUTE_FILTER,):
+        pitch.filter.set(name, filters.get(name))
+    # setEvents applies the filters
+    pitch.setEvents(_worker["store"].load(match_id))
+    pitch.showPasses = overlay == 'passes'
+    pitch.showShots = overlay == 'shots'
+    pitch.showHeatmap = overlay == 'heatmap'
+    pitch.showNetwork = overlay == 'network'
+
+    image = QImage(pitch.size(), QImage.Format_ARGB32_Premultiplied)
+    pitch.render(image)
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.WriteOnly)
+    if not image.save(buffer, "PNG"):
+        raise OSError("Could not encode the image")
+    buffer.close()
+    return bytes(data)
+
+def parseCodes(value):
+    """Parse comma separated codes."""
+    return [ int(v) for v in value.split(",") ]
+
+class RenderServer:
+    """Answers render requests from a two-tier cache, rendering the
+    missing images on a pool of processes."""
+    def __init__(self, config, workers):
+        """Construct a RenderServer.
+
+        Args:
+            config (dict): The configuration dictionary.
+            workers (int): Number of rendering processes.
+        """
+        server_config = config["Server"]
+        self.config = config
+        self.store = EventStore(config["StatsBomb"])
+        self.directory = os.path.join(config["StatsBomb"]["cache_path"],
+                                      RENDER_DIRECTORY)
+        self.default_size = tuple(server_config["default_size"])
+        self.max_size = tuple(server_config["max_size"])
+        self.memory_limit = server_config["memory_cache_mb"]*1024*1024
+        # the look of the images depends on the pitch configuration
+        self.style = hashlib.sha1(json.dumps(
+            config["Visualiser"]["Pitch"], sort_keys=True).encode()
+            ).hexdigest()[:16]
+
+        # spawn, so the workers do not inherit any state of this process
+        context = multiprocessing.get_context("spawn")
+        self.pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=context,
+                                        initializer=initWorker,
+                                        initargs=(config,))
+        self.images = OrderedDict()
+        self.memory_used = 0
+        # renders in progress by key, awaited by identical requests
+        self.pending = {}
+
+    def parseRequest(self, query):
+        """Validate the parameters of a render request.
+
+        Args:
+            query (dict): The parsed query string.
+
+        Returns:
+            (int, str, dict, (int,int)): The match id, overlay, filters and
+            size of the image.
+
+        Raises:
+            ValueError: If a parameter is missing or invalid.
+        """
+        params = { k : v[-1] for k,v in query.items() }
+        if "match" not in params:
+            raise ValueError("No match given")
+        match_id = int(params["match"])
+        overlay = params.get("overlay", OVERLAYS[0])
+        if overlay not in OVERLAYS:
+            raise ValueError("Unknown overlay {}".format(overlay))
+        size = (int(params.get("width", self.default_size[0])),
+                int(params.get("height", self.default_size[1])))
+        if not (0 < size[0] <= self.max_size[0] and
+                0 < size[1] <= self.max_size[1]):
+            raise ValueError("Size must be at most {}x{}".format(
+                *self.max_size))
+
+        filters = {}
+        for name in CODE_FILTERS:
+            if name in params:
+                filters[name] = sorted(parseCodes(params[name]))
+        if MINUTE_FILTER in params:
+            minutes = params[MINUTE_FILTER].split("-")
+            if len(minutes) != 2:
+                raise ValueError("The minute range must be FIRST-LAST")
+            filters[MINUTE_FILTER] = [ int(m) for m in minutes ]
+        return match_id, overlay, filters, size
+
+    def cacheKey(self, match_id, overlay, filters, size):
+        """Return the key of an image, which changes with the events file.
+
+        Raises:
+            OSError: If the events file of the match does not exist.
+        """
+        source = self.store.sourceVersion(match_id)
+        return hashlib.sha1(json.dumps(
+            [RENDER_VERSION, self.style, match_id, overlay, filters,
+             list(size), list(source)], sort_keys=True).encode()).hexdigest()
+
+    def imageFile(self, key):
+        return os.path.join(self.directory, key[:2], key + ".png")
+
+    def remember(self, key, data):
+        """Add an image to the memory cache, evicting the least recently
+        used images above the memory limit."""
+        if key in self.images:
+            return
+        self.images[key] = data
+        self.memory_used += len(data)
+        while self.memory_used > self.memory_limit and len(self.images) > 1:
+            _, old = self.images.popitem(last=False)
+            self.memory_used -= len(old)
+
+    def readImage(self, key):
+        """Read an image from the disk cache, or return None."""
+        try:
+            with open(self.imageFile(key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def writeImage(self, key, data):
+        """Write an image to the disk cache."""
+        path = self.imageFile(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.store._replace(path, lambda f: f.write(data))
+
+    async def image(self, match_id, overlay, filters, size):
+        """Return the PNG of a request, from the caches or rendered.
+
+        Returns:
+            bytes: The PNG data.
+        """
+        key = self.cacheKey(match_id, overlay, filters, size)
+        if key in self.images:
+            self.images.move_to_end(key)
+            return self.images[key]
+        if key not in self.pending:
+            self.pending[key] = asyncio.ensure_future(
+                self.produce(key, match_id, overlay, filters, size))
+        # shielded, so a client hanging up does not cancel the render for
+        # the others
+        return await asyncio.shield(self.pending[key])
+
+    async def produce(self, key, match_id, overlay, filters, size):
+        """Read an image from disk or render it, and cache it."""
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(None, self.readImage, key)
+            if data is None:
+                data = await loop.run_in_executor(
+                    self.pool, renderImage, match_id, overlay, filters, size)
+                await loop.run_in_executor(None, self.writeImage, key, data)
+            self.remember(key, data)
+            return data
+        finally:
+            del self.pending[key]
+
+    async def handle(self, reader, writer):
+        """Answer one HTTP request."""
+        try:
+            status, body, content_type = await self.respond(reader)
+        except Exception as e:
+            status, body, content_type = (500, str(e).encode(),
+                                          "text/plain")
+        head = ("HTTP/1.1 {} {}\r\nContent-Type: {}\r\nContent-Length: {}\r\n"
+                "Connection: close\r\n\r\n").format(
+                    status, HTTP_REASONS[status], content_type, len(body))
+        try:
+            writer.write(head.encode("ascii") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, reader):
+        """Read a request and return the status, body and content type."""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return 400, b"Malformed request", "text/plain"
+        request_line = head.decode("latin-1").split("\r\n", 1)[0].split(" ")
+        if len(request_line) != 3:
+            return 400, b"Malformed request", "text/plain"
+        method, target, _ = request_line
+        if method != "GET":
+            return 405, b"Only GET is supported", "text/plain"
+        url = urlsplit(target)
+        if url.path != "/render":
+            return 404, b"Unknown path", "text/plain"
+        try:
+            request = self.parseRequest(parse_qs(url.query))
+        except ValueError as e:
+            return 400, str(e).encode(), "text/plain"
+        try:
+            return 200, await self.image(*request), "image/png"
+        except FileNotFoundError:
+            return 404, b"Unknown match", "text/plain"
+
+    async def serve(self, host, port):
+        """Serve requests until cancelled."""
+        server = await asyncio.start_server(self.handle, host, port,
+                                            limit=MAX_HEAD)
+        with self.pool:
+            async with server:
+                print("Serving on http://{}:{}/render".format(host, port))
+                await server.serve_forever()
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description="Serve images of match overlays over HTTP.")
+    parser.add_argument("--config", default="./config.json")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv[1:])
+
+    with open(args.config) as f:
+        config = json.load(f)
+    server_config = config["Server"]
+    server = RenderServer(config, args.workers or server_config["workers"])
+    try:
+        asyncio.run(server.serve(args.host or server_config["host"],
+                                 args.port or server_config["port"]))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__=='__main__':
+    sys.exit(main(sys.argv))
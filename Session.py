@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Save the state of the visualiser on exit and warm start from it.
+
+The state of the pickers, filters and overlays is saved as JSON next to an
+image of the window. On the next launch the image is shown at once, while
+the modules of the visualiser, which pull in NumPy and the data layer, are
+imported on a thread. The visualiser then restores the state and replaces
+the image once the last match is loaded.
+
+Only the standard library and PyQt5 are imported here, so that the image is
+shown before anything heavy is loaded.
+"""
+
+import importlib
+import json
+import logging
+import os
+import threading
+from PyQt5.QtWidgets import QApplication, QLabel, QMessageBox
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# Bump whenever the saved state changes, so that stale state is not restored.
+SESSION_VERSION = 1
+
+STATE_FILE = "session.json"
+IMAGE_FILE = "session.png"
+
+# Module of the visualiser, imported in the background.
+VISUALISER_MODULE = "VisualiserWidget"
+
+WINDOW_TITLE = "StatsBomb Visualiser"
+
+logger = logging.getLogger(__name__)
+
+class Session:
+    """The state and the image of the window of the last session."""
+    def __init__(self, config):
+        """Construct a Session.
+
+        Args:
+            config (dict): The session configuration dictionary.
+        """
+        self.path = config["path"]
+        self.warm_start = config["warm_start"]
+
+    def stateFile(self):
+        return os.path.join(self.path, STATE_FILE)
+
+    def imageFile(self):
+        return os.path.join(self.path, IMAGE_FILE)
+
+    def read(self):
+        """Read the state of the last session.
+
+        Returns:
+            dict: The state, or None if there is none or it is stale.
+        """
+        try:
+            with open(self.stateFile()) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (not isinstance(state, dict)
+                or state.get("version") != SESSION_VERSION):
+            return None
+        return state
+
+    def image(self, state):
+        """Read the image of the window of the last session.
+
+        Args:
+            state (dict): The state saved with the image.
+
+        Returns:
+            QPixmap: The image, or None if it cannot be read.
+        """
+        pixmap = QPixmap(self.imageFile())
+        if pixmap.isNull():
+            return None
+        pixmap.setDevicePixelRatio(state["ratio"])
+        return pixmap
+
+    def save(self, state, pixmap):
+        """Save the state and the image of the window.
+
+        Both files are replaced atomically, the image first, so that a state
+        is never read together with an image of another session.
+
+        Args:
+            state (dict): The state, see VisualiserWidget.sessionState.
+            pixmap (QPixmap): The image of the window.
+
+        Raises:
+            OSError: If the files cannot be written.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        state = dict(state, version=SESSION_VERSION,
+                     ratio=pixmap.devicePixelRatio())
+        image_tmp = self.imageFile() + ".tmp"
+        if not pixmap.save(image_tmp, "PNG"):
+            raise OSError("Could not write {}".format(image_tmp))
+        os.replace(image_tmp, self.imageFile())
+        state_tmp = self.stateFile() + ".tmp"
+        with open(state_tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(state_tmp, self.stateFile())
+
+class WarmStart(QObject):
+    """Shows the image of the last session at once, and replaces it with the
+    visualiser once its modules are imported and the last match is loaded.
+
+    The image is only a picture of the window; it can be moved and resized,
+    but the controls only respond once the visualiser replaces it.
+    """
+    # the visualiser modules were imported
+    imported = pyqtSignal()
+    # error message
+    importFailed = pyqtSignal(str)
+
+    def __init__(self, config, parent = None):
+        """Construct a WarmStart.
+
+        Args:
+            config (dict): The configuration dictionary.
+            parent (PyQt5.QtCore.QObject, optional): Parent object.
+            Defaults to None.
+        """
+        super().__init__(parent)
+        self.config = config
+        self.session = Session(config["Visualiser"]["Session"])
+        self.state = self.session.read() if self.session.warm_start else None
+        self.snapshot = None
+        self.widget = None
+        self.imported.connect(self.createWidget)
+        self.importFailed.connect(self.reportImportFailed)
+
+    def start(self):
+        """Show the image of the last session and start importing the
+        visualiser."""
+        pixmap = (self.session.image(self.state) if self.state is not None
+                  else None)
+        if pixmap is not None:
+            self.snapshot = QLabel()
+            self.snapshot.setWindowTitle(WINDOW_TITLE)
+            self.snapshot.setPixmap(pixmap)
+            self.snapshot.setScaledContents(True)
+            self.snapshot.resize(*self.state["size"])
+            self.snapshot.show()
+        threading.Thread(target=self.importVisualiser, daemon=True).start()
+
+    def importVisualiser(self):
+        """Import the visualiser modules. Runs on its own thread."""
+        try:
+            importlib.import_module(VISUALISER_MODULE)
+        except Exception as e:
+            self.importFailed.emit(str(e))
+        else:
+            self.imported.emit()
+
+    def createWidget(self):
+        """Create the visualiser and restore the last session.
+
+        A visualiser which can not be created is reported like a failed
+        import. A session which can not be restored is dropped with its
+        image, and the visualiser is shown as on a cold start.
+        """
+        # exceptions would otherwise escape the slot, leaving the image of
+        # the last session on screen
+        try:
+            module = importlib.import_module(VISUALISER_MODULE)
+            self.widget = module.VisualiserWidget(
+                self.config["Visualiser"],
+                data_config=self.config["StatsBomb"], session=self.session)
+        except Exception as e:
+            self.reportImportFailed(str(e))
+            return
+        self.widget.setWindowTitle(WINDOW_TITLE)
+        loader = self.widget.loader
+        if self.snapshot is not None and loader is not None:
+            # the image stays until the match it shows is on the pitch
+            loader.matchLoaded.connect(self.matchShown)
+            loader.loadFailed.connect(self.matchShown)
+        if self.state is not None:
+            try:
+                self.widget.resize(*self.state["size"])
+                self.widget.restoreSession(self.state)
+            except Exception as e:
+                self.widget.reportError(
+                    "Could not restore the last session: {}".format(e))
+                self.closeSnapshot()
+        if self.snapshot is None or self.widget.match_id is None:
+            self.showWidget()
+
+    def matchShown(self, request, *args):
+        """Show the visualiser once the restored match is loaded or failed."""
+        if (self.snapshot is not None
+                and request == self.widget.loader.request):
+            self.showWidget()
+
+    def showWidget(self):
+        """Replace the image with the visualiser."""
+        if self.snapshot is not None:
+            self.widget.setGeometry(self.snapshot.geometry())
+            self.widget.show()
+            self.closeSnapshot()
+        else:
+            self.widget.show()
+
+    def closeSnapshot(self):
+        """Close the image of the last session, if it is shown."""
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
+    def reportImportFailed(self, message):
+        """Report a visualiser which could not be imported, and quit.
+
+        Without a snapshot no window is open, so the event loop would
+        otherwise never return.
+        """
+        message = "Could not start the visualiser: {}".format(message)
+        logger.error(message)
+        QMessageBox.critical(self.snapshot, WINDOW_TITLE, message)
+        self.closeSnapshot()
+        QApplication.exit(1)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from PyQt5.QtGui import QPixmap, QPainter, QPen, QColor, QPolygonF
+from PyQt5.QtCore import Qt, QPointF, QRectF
+
+# StatsBomb ids of shot outcomes and body parts
+GOAL_OUTCOME = 97
+BLOCKED_OUTCOME = 96
+SAVED_OUTCOMES = (100, 116)
+HEAD_BODY_PART = 37
+OTHER_BODY_PART = 70
+
+# Marker colours by outcome class: goal, saved, blocked and missed.
+OUTCOME_COLORS = ("#ffd700", "#3399ff", "#aaaaaa", "#ff3333")
+
+# Marker shapes by body part class: foot, head and other.
+SHAPES = ('circle', 'square', 'diamond')
+
+# Number of marker sizes in the atlas; the xG of a shot is rounded to one
+# of them.
+SIZE_STEPS = 16
+
+def outcomeClass(outcome):
+    """Map shot outcome ids to rows of OUTCOME_COLORS."""
+    return np.select([outcome == GOAL_OUTCOME,
+                      np.isin(outcome, SAVED_OUTCOMES),
+                      outcome == BLOCKED_OUTCOME], [0, 1, 2], 3)
+
+def shapeClass(body_part):
+    """Map body part ids to entries of SHAPES."""
+    return np.select([body_part == HEAD_BODY_PART,
+                      body_part == OTHER_BODY_PART], [1, 2], 0)
+
+def sizeStep(xg):
+    """Round xG values to marker sizes, with the area growing with xG.
+
+    Args:
+        xg (numpy.ndarray): The xG values; missing values get the smallest
+        marker.
+
+    Returns:
+        numpy.ndarray: Indices into the sizes of the atlas.
+    """
+    xg = np.nan_to_num(np.clip(xg, 0.0, 1.0), nan=0.0)
+    return np.round(np.sqrt(xg)*(SIZE_STEPS-1)).astype(np.int64)
+
+def markerRadii(min_radius, max_radius):
+    """Return the radius of the marker of every size step."""
+    return min_radius + (max_radius-min_radius)*np.linspace(0.0, 1.0,
+                                                            SIZE_STEPS)
+
+class ShotAtlas:
+    """Pre-rendered markers of every shape, colour and size in one pixmap.
+
+    The markers lie on a grid, with a row per shape and colour and a column
+    per size.
+    """
+    def __init__(self, min_radius, max_radius, ratio):
+        """Render the atlas.
+
+        Args:
+            min_radius (float): Radius of the marker of zero xG, in pixels.
+            max_radius (float): Radius of the marker of an xG of one.
+            ratio (float): The device pixel ratio.
+        """
+        self.ratio = ratio
+        self.radii = markerRadii(min_radius, max_radius)
+        # cells in device pixels, with room for the outline
+        self.cell = int(np.ceil((2*max_radius+4)*ratio))
+        rows = len(SHAPES)*len(OUTCOME_COLORS)
+
+        self.pixmap = QPixmap(self.cell*SIZE_STEPS, self.cell*rows)
+        self.pixmap.fill(Qt.transparent)
+        painter = QPainter(self.pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.scale(ratio, ratio)
+        pen = QPen(QColor("#000000"))
+        pen.setWidthF(1.0)
+        painter.setPen(pen)
+        half = self.cell/ratio/2
+        for shape in range(len(SHAPES)):
+            for color in range(len(OUTCOME_COLORS)):
+                painter.setBrush(QColor(OUTCOME_COLORS[color]))
+                row = shape*len(OUTCOME_COLORS)+color
+                for step, r in enumerate(self.radii):
+                    center = QPointF((step*self.cell)/ratio + half,
+                                     (row*self.cell)/ratio + half)
+                    self.drawMarker(painter, SHAPES[shape], center, r)
+        painter.end()
+
+        # the source rectangles of all markers, indexed by row and size
+        c = float(self.cell)
+        self.sources = [ QRectF(step*c, row*c, c, c) for row in range(rows)
+                         for step in range(SIZE_STEPS) ]
+
+    @staticmethod
+    def drawMarker(painter, shape, center, r):
+        """Draw one marker."""
+        if shape == 'circle':
+            painter.drawEllipse(center, r, r)
+        elif shape == 'square':
+            painter.drawRect(QRectF(center.x()-r, center.y()-r, 2*r, 2*r))
+        else:
+            painter.drawPolygon(QPolygonF([
+                center + QPointF(0, -r), center + QPointF(r, 0),
+                center + QPointF(0, r), center + QPointF(-r, 0)]))
+
+    def fragments(self, x, y, shape, color, step):
+        """Build the fragments drawing markers at pixel positions.
+
+        Args:
+            x (numpy.ndarray): x-coordinates of the markers in pixels.
+            y (numpy.ndarray): y-coordinates of the markers in pixels.
+            shape (numpy.ndarray): Shape classes of the markers.
+            color (numpy.ndarray): Outcome classes of the markers.
+            step (numpy.ndarray): Size steps of the markers.
+
+        Returns:
+            list: QPainter.PixmapFragment for drawPixmapFragments.
+        """
+        sprite = ((shape*len(OUTCOME_COLORS)+color)*SIZE_STEPS+step).tolist()
+        sources = self.sources
+        create = QPainter.PixmapFragment.create
+        if self.ratio == 1.0:
+            return [ create(QPointF(px, py), sources[i])
+                     for px, py, i in zip(x.tolist(), y.tolist(), sprite) ]
+        # the source is in device pixels, so it is scaled back to the
+        # logical size of the target
+        scale = 1.0/self.ratio
+        return [ create(QPointF(px, py), sources[i], scale, scale)
+                 for px, py, i in zip(x.tolist(), y.tolist(), sprite) ]
+
+def shotOrder(xg):
+    """Order shots so that the markers of high xG are drawn on top."""
+    return np.argsort(np.nan_to_num(xg, nan=0.0), kind='stable')
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# Average number of points per cell the grid is sized for.
+CELL_OCCUPANCY = 4
+
+class GridIndex:
+    """A uniform grid over points, for nearest neighbour and rectangle
+    queries.
+
+    The points are sorted by cell, so the points of a cell, and of a run of
+    cells along a row, form one contiguous slice.
+    """
+    def __init__(self, x, y, cell_size = None):
+        """Build the index.
+
+        Args:
+            x (numpy.ndarray): x-coordinates of the points.
+            y (numpy.ndarray): y-coordinates of the points.
+            cell_size (float, optional): Side of a cell. By default it is
+            chosen so a cell holds CELL_OCCUPANCY points on average.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self.n = len(x)
+        if self.n == 0:
+            x = y = np.zeros(1)
+
+        self.x0, self.y0 = x.min(), y.min()
+        w = max(x.max()-self.x0, 1e-9)
+        h = max(y.max()-self.y0, 1e-9)
+        if cell_size is None:
+            cell_size = np.sqrt(w*h*CELL_OCCUPANCY/max(self.n, 1))
+        self.cell = max(cell_size, 1e-9)
+        self.cols = int(w // self.cell) + 1
+        self.rows = int(h // self.cell) + 1
+
+        cells = self.cellOf(x, y)
+        self.order = np.argsort(cells, kind='stable')
+        self.x = x[self.order]
+        self.y = y[self.order]
+        self.starts = np.searchsorted(cells[self.order],
+                                      np.arange(self.rows*self.cols+1))
+        if self.n == 0:
+            self.starts[:] = 0
+
+    def cellOf(self, x, y):
+        """Return the cell ids of points, clamped to the grid."""
+        cx = np.clip(((x-self.x0)//self.cell).astype(np.int64),
+                     0, self.cols-1)
+        cy = np.clip(((y-self.y0)//self.cell).astype(np.int64),
+                     0, self.rows-1)
+        return cy*self.cols+cx
+
+    def rowSlices(self, cx0, cx1, cy0, cy1):
+        """Return the positions of the points in a block of cells.
+
+        Args:
+            cx0 (int): First column, clamped to the grid.
+            cx1 (int): Last column, clamped to the grid.
+            cy0 (int): First row, clamped to the grid.
+            cy1 (int): Last row, clamped to the grid.
+
+        Returns:
+            numpy.ndarray: Positions into the sorted points.
+        """
+        cx0, cx1 = max(cx0, 0), min(cx1, self.cols-1)
+        cy0, cy1 = max(cy0, 0), min(cy1, self.rows-1)
+        if cx0 > cx1 or cy0 > cy1:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(cy0, cy1+1)*self.cols
+        begin = self.starts[rows+cx0]
+        lengths = self.starts[rows+cx1+1] - begin
+        # concatenate the ranges of all rows without a Python loop
+        offsets = np.repeat(begin - np.cumsum(lengths) + lengths, lengths)
+        return offsets + np.arange(lengths.sum())
+
+    def nearest(self, px, py, max_distance = np.inf):
+        """Find the point nearest to a query point.
+
+        The search grows outwards ring by ring from the cells around the
+        query, and stops once no unvisited cell can hold a nearer point.
+
+        Args:
+            px (float): x-coordinate of the query.
+            py (float): y-coordinate of the query.
+            max_distance (float, optional): Ignore points further away.
+            Defaults to no limit.
+
+        Returns:
+            int: Index of the nearest point, or None if there is none.
+        """
+        if self.n == 0:
+            return None
+        cx = int(np.clip((px-self.x0)//self.cell, 0, self.cols-1))
+        cy = int(np.clip((py-self.y0)//self.cell, 0, self.rows-1))
+
+        best, best_d2 = None, max_distance**2
+        r = 1
+        while True:
+            if r == 1:
+                # the cell of the query and its neighbours
+                pos = self.rowSlices(cx-1, cx+1, cy-1, cy+1)
+            else:
+                # top and bottom rows of the ring, then its sides
+                pos = np.concatenate([
+                    self.rowSlices(cx-r, cx+r, cy-r, cy-r),
+                    self.rowSlices(cx-r, cx+r, cy+r, cy+r),
+                    self.rowSlices(cx-r, cx-r, cy-r+1, cy+r-1),
+                    self.rowSlices(cx+r, cx+r, cy-r+1, cy+r-1)])
+            if len(pos):
+                d2 = (self.x[pos]-px)**2 + (self.y[pos]-py)**2
+                i = np.argmin(d2)
+                if d2[i] < best_d2:
+                    best, best_d2 = int(self.order[pos[i]]), d2[i]
+
+            # points beyond this ring are at least r cells away
+            reach = r*self.cell
+            if reach**2 >= best_d2:
+                break
+            if (cx-r <= 0 and cy-r <= 0 and cx+r >= self.cols-1
+                    and cy+r >= self.rows-1):
+                break
+            r += 1
+        return best
+
+    def rect(self, x0, y0, x1, y1):
+        """Find the points inside a rectangle.
+
+        Args:
+            x0 (float): Left edge of the rectangle.
+            y0 (float): Top edge of the rectangle.
+            x1 (float): Right edge of the rectangle.
+            y1 (float): Bottom edge of the rectangle.
+
+        Returns:
+            numpy.ndarray: Sorted indices of the points.
+        """
+        if self.n == 0:
+            return np.empty(0, dtype=np.int64)
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        pos = self.rowSlices(int((x0-self.x0)//self.cell),
+                             int((x1-self.x0)//self.cell),
+                             int((y0-self.y0)//self.cell),
+                             int((y1-self.y0)//self.cell))
+        inside = ((self.x[pos] >= x0) & (self.x[pos] <= x1) &
+                  (self.y[pos] >= y0) & (self.y[pos] <= y1))
+        return np.sort(self.order[pos[inside]])
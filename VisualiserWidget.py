@@ -3,22 +3,89 @@ from PyQt5.QtWidgets import (
     QWidget,
     QHBoxLayout,
     QCheckBox,
-    QButtonGroup
+    QButtonGroup,
+    QShortcut,
+    QComboBox,
+    QCompleter,
+    QPushButton,
+    QSlider,
+    QLabel,
+    QStatusBar
 )
-from PyQt5.QtGui import QColor
+from PyQt5.QtGui import QColor, QKeySequence
+from PyQt5.QtCore import Qt, QRunnable, QThreadPool, pyqtSignal
 from PitchWidget import PitchWidget
+from MatchLoader import MatchLoader
+from MetadataIndex import MetadataIndex, IndexUpdater
+from Aggregation import Aggregator
+from EventFilter import CODE_FILTERS, MINUTE_FILTER
+from Playback import PlaybackController, matchClock
+from MatchGrid import MatchGrid
+from PassNetwork import FIRST_SUBSTITUTION
 import json
+import logging
+import sqlite3
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Last minute selectable in the minute range, covering extra time.
+MAX_MINUTE = 130
+
+# Playback speeds offered, in match seconds per second.
+PLAYBACK_SPEEDS = (1, 2, 5, 10, 30, 60)
+
+# How long an error is shown in the status bar, in ms.
+STATUS_TIMEOUT = 10000
+
+# Labels of the filter pickers.
+FILTER_LABELS = { 'team' : "All teams", 'player' : "All players",
+                  'period' : "All periods", 'type' : "All types",
+                  'outcome' : "All outcomes" }
+
+class AggregateTask(QRunnable):
+    """Aggregates matches on a thread of the pool, which in turn spreads the
+    matches over a pool of processes."""
+    def __init__(self, widget, request, match_ids, bins, team, player,
+                 flow_zones):
+        super().__init__()
+        self.widget = widget
+        self.request = request
+        self.match_ids = match_ids
+        self.bins = bins
+        self.team = team
+        self.player = player
+        self.flow_zones = flow_zones
+
+    def run(self):
+        try:
+            aggregate = self.widget.aggregator.aggregate(
+                self.match_ids, self.bins, self.team, self.player,
+                self.flow_zones)
+        except Exception as e:
+            self.widget.aggregateFailed.emit(self.request, str(e))
+        else:
+            self.widget.aggregated.emit(self.request, aggregate)
 
 class VisualiserWidget(QWidget):
     """A widget containing the pitch and visualiser options."""
+    # request id, the merged results of an aggregation
+    aggregated = pyqtSignal(int, object)
+    # request id, error message
+    aggregateFailed = pyqtSignal(int, str)
     
-    def __init__(self, config,parent = None):
+    def __init__(self, config,parent = None, data_config = None,
+                 session = None):
         """Constructs a VisualiserWidget using configurations.
 
         Args:
             config (dict): a dictionary of configurations
             parent (PyQt5.QWidgets.QWidget, optional): Parent widget. 
             Defaults to None.
+            data_config (dict, optional): The StatsBomb configurations.
+            Without them no matches can be loaded. Defaults to None.
+            session (Session, optional): Where the state of the widget is
+            saved when it is closed. Defaults to None.
         """
         super().__init__(parent=parent)
 
@@ -31,20 +98,152 @@ class VisualiserWidget(QWidget):
         passes = QCheckBox("Passes")
         shots = QCheckBox("Shots")
         heatmap = QCheckBox("Heatmap")
+        network = QCheckBox("Network")
         self.modeButtons.addButton(passes, id=0)
         self.modeButtons.addButton(shots, id=1)
         self.modeButtons.addButton(heatmap, id=2)
+        self.modeButtons.addButton(network, id=3)
         self.modeButtons.setExclusive(False)
         self.modeButtons.buttonClicked.connect(self.boxChecked)
+        self.networkWindowBox = QComboBox()
+        self.networkWindowBox.addItem("Whole match", None)
+        self.networkWindowBox.addItem("Before first substitution",
+                                      FIRST_SUBSTITUTION)
+        self.networkWindowBox.activated.connect(
+            lambda i: self.pitch.setNetworkWindow(
+                self.networkWindowBox.itemData(i)))
         hLayout.addWidget(passes)
         hLayout.addWidget(shots)
         hLayout.addWidget(heatmap)
+        hLayout.addWidget(network)
+        hLayout.addWidget(self.networkWindowBox)
+
+        # create match pickers
+        pickerLayout = QHBoxLayout()
+        self.competitionBox = QComboBox()
+        self.competitionBox.activated.connect(self.competitionPicked)
+        self.playerBox = QComboBox()
+        self.playerBox.setEditable(True)
+        self.playerBox.setInsertPolicy(QComboBox.NoInsert)
+        self.playerBox.completer().setFilterMode(Qt.MatchContains)
+        self.playerBox.completer().setCompletionMode(QCompleter.PopupCompletion)
+        self.playerBox.activated.connect(self.playerPicked)
+        self.matchBox = QComboBox()
+        self.matchBox.activated.connect(self.matchPicked)
+        pickerLayout.addWidget(self.competitionBox)
+        pickerLayout.addWidget(self.playerBox)
+        pickerLayout.addWidget(self.matchBox, 1)
+        self.aggregateButton = QPushButton("All matches")
+        self.aggregateButton.setToolTip(
+            "Show the matches in the list together, for the picked player")
+        self.aggregateButton.clicked.connect(self.aggregateMatches)
+        pickerLayout.addWidget(self.aggregateButton)
+        gridButton = QPushButton("Grid")
+        gridButton.setToolTip("Show the matches in the list side by side")
+        gridButton.clicked.connect(self.showGrid)
+        pickerLayout.addWidget(gridButton)
+
+        # create filters
+        filterLayout = QHBoxLayout()
+        self.filterBoxes = {}
+        for name in CODE_FILTERS:
+            box = QComboBox()
+            box.addItem(FILTER_LABELS[name], None)
+            box.activated.connect(lambda i, name=name: self.filterPicked(name))
+            filterLayout.addWidget(box)
+            self.filterBoxes[name] = box
+        self.minuteFrom = QSlider(Qt.Horizontal)
+        self.minuteTo = QSlider(Qt.Horizontal)
+        for slider, value in ((self.minuteFrom, 0), (self.minuteTo, MAX_MINUTE)):
+            slider.setRange(0, MAX_MINUTE)
+            slider.setValue(value)
+            slider.valueChanged.connect(self.minutesChanged)
+            filterLayout.addWidget(slider)
+        self.minuteLabel = QLabel()
+        filterLayout.addWidget(self.minuteLabel)
+
+        # create playback controls
+        playbackLayout = QHBoxLayout()
+        self.playback = PlaybackController(self)
+        self.playButton = QPushButton("Play")
+        self.playButton.clicked.connect(self.playback.toggle)
+        self.speedBox = QComboBox()
+        for speed in PLAYBACK_SPEEDS:
+            self.speedBox.addItem("{}x".format(speed), speed)
+        self.speedBox.currentIndexChanged.connect(
+            lambda i: self.playback.setSpeed(self.speedBox.itemData(i)))
+        self.timeSlider = QSlider(Qt.Horizontal)
+        self.timeSlider.sliderMoved.connect(self.playback.seek)
+        self.timeLabel = QLabel("0:00")
+        stopButton = QPushButton("Show all")
+        stopButton.clicked.connect(self.stopPlayback)
+        self.playback.timeChanged.connect(self.playbackTimeChanged)
+        self.playback.playingChanged.connect(
+            lambda playing: self.playButton.setText("Pause" if playing
+                                                    else "Play"))
+        playbackLayout.addWidget(self.playButton)
+        playbackLayout.addWidget(self.speedBox)
+        playbackLayout.addWidget(self.timeSlider, 1)
+        playbackLayout.addWidget(self.timeLabel)
+        playbackLayout.addWidget(stopButton)
 
         # create pitch widget
         self.pitch = PitchWidget(config["Pitch"])
+        self.networkWindowBox.setCurrentIndex(
+            max(self.networkWindowBox.findData(self.pitch.network_window), 0))
+        self.minutesChanged()
         
         vLayout.addLayout(hLayout)
-        vLayout.addWidget(self.pitch)
+        vLayout.addLayout(pickerLayout)
+        vLayout.addLayout(filterLayout)
+        vLayout.addLayout(playbackLayout)
+        vLayout.addWidget(self.pitch, 1)
+        self.statusBar = QStatusBar()
+        self.statusBar.setSizeGripEnabled(False)
+        vLayout.addWidget(self.statusBar)
+
+        # matches are loaded on a thread pool, so the window never blocks
+        # on disk
+        self.loader = MatchLoader(data_config, self) if data_config else None
+        self.match_id = None
+        if self.loader is not None:
+            self.loader.batchLoaded.connect(self.batchLoaded)
+            self.loader.matchLoaded.connect(self.matchLoaded)
+            self.loader.loadFailed.connect(self.loadFailed)
+
+        self.grid_config = config["Grid"]
+        self.pitch_config = config["Pitch"]
+        self.data_config = data_config
+        self.grid = None
+        self.session = session
+
+        self.aggregator = Aggregator(data_config) if data_config else None
+        # results of an aggregation overtaken by a newer one, or by loading
+        # a match, are dropped by their request id
+        self.aggregate_request = 0
+        self.aggregated.connect(self.showAggregate)
+        self.aggregateFailed.connect(self.reportAggregateFailed)
+
+        # the pickers query the metadata index, which is brought up to date
+        # with the files on disk in the background
+        self.index = None
+        self.competition = None
+        if data_config:
+            try:
+                self.index = MetadataIndex(data_config)
+            except (OSError, KeyError, sqlite3.Error) as e:
+                # start without the pickers rather than not at all
+                self.reportError("Could not open the match index: {}"
+                                 .format(e))
+        if self.index is not None:
+            self.indexUpdater = IndexUpdater(data_config, self)
+            self.indexUpdater.updated.connect(self.indexUpdated)
+            self.indexUpdater.failed.connect(self.indexFailed)
+            self.indexUpdater.start()
+            self.fillCompetitions()
+
+        QShortcut(QKeySequence(Qt.Key_PageDown), self, self.nextMatch)
+        QShortcut(QKeySequence(Qt.Key_PageUp), self, self.previousMatch)
 
     def boxChecked(self,object):
         """Toggles options in the pitch widget, based on
@@ -59,5 +258,353 @@ class VisualiserWidget(QWidget):
             self.pitch.showShots = False if self.pitch.showShots else True
         if self.modeButtons.id(object) == 2:
             self.pitch.showHeatmap = False if self.pitch.showHeatmap else True
+        if self.modeButtons.id(object) == 3:
+            self.pitch.showNetwork = False if self.pitch.showNetwork else True
         
         self.pitch.update()
+        self.checkHeatmap()
+
+    def setCompetition(self, competition_id, season_id):
+        """Select a competition season, whose matches are stepped through
+        and prefetched.
+
+        Args:
+            competition_id (int): The StatsBomb competition id.
+            season_id (int): The StatsBomb season id.
+        """
+        self.competition = (competition_id, season_id)
+        i = self.competitionIndex(self.competition)
+        if i >= 0:
+            self.competitionBox.setCurrentIndex(i)
+        self.fillPlayers()
+        self.fillMatches()
+
+    def competitionIndex(self, competition):
+        """Return the index of a competition season in the competition
+        picker, or -1 if it is not there.
+
+        The items hold tuples, which findData only finds by identity, so the
+        items are compared by value.
+
+        Args:
+            competition ((int,int)): The competition and season id.
+        """
+        for i in range(self.competitionBox.count()):
+            if self.competitionBox.itemData(i) == competition:
+                return i
+        return -1
+
+    def indexUpdated(self, changed):
+        """Refresh the pickers after files were added to the index."""
+        if changed:
+            self.fillCompetitions()
+
+    def indexFailed(self, message):
+        """Report an index which could not be updated."""
+        self.reportError("Could not update the match index: {}"
+                         .format(message))
+
+    def fillCompetitions(self):
+        """Fill the competition picker from the index."""
+        self.competitionBox.clear()
+        for competition_id, season_id, name, season in self.index.competitions():
+            self.competitionBox.addItem("{} {}".format(name, season),
+                                        (competition_id, season_id))
+        if self.competition is None and self.competitionBox.count():
+            self.competition = self.competitionBox.itemData(0)
+        if self.competition is not None:
+            self.setCompetition(*self.competition)
+
+    def fillPlayers(self):
+        """Fill the player picker with the players of the selected season."""
+        self.playerBox.clear()
+        self.playerBox.addItem("All players", None)
+        for player_id, name in self.index.players(*self.competition):
+            self.playerBox.addItem(name, player_id)
+
+    def fillMatches(self):
+        """Fill the match picker with the matches of the selected season and
+        player, which are also the matches stepped through."""
+        matches = self.index.matches(*self.competition,
+                                     player_id=self.playerBox.currentData())
+        self.matchBox.clear()
+        for m in matches:
+            self.matchBox.addItem("{} {} {}-{} {}".format(m[3], m[6], m[9],
+                                                         m[10], m[8]), m[0])
+        self.loader.setMatchList([m[0] for m in matches])
+        self.selectMatch(self.match_id)
+
+    def selectMatch(self, match_id):
+        """Show a match as the current item of the match picker."""
+        i = self.matchBox.findData(match_id)
+        self.matchBox.setCurrentIndex(i)
+
+    def competitionPicked(self, i):
+        """Select the competition season picked by the user."""
+        self.setCompetition(*self.competitionBox.itemData(i))
+
+    def playerPicked(self, i):
+        """Restrict the match picker to the matches of the picked player."""
+        self.fillMatches()
+
+    def matchPicked(self, i):
+        """Load the match picked by the user."""
+        self.loadMatch(self.matchBox.itemData(i))
+
+    def fillFilters(self):
+        """Fill the filter pickers with the codes of the shown events,
+        keeping the picked codes."""
+        events = self.pitch.all_events
+        for name, box in self.filterBoxes.items():
+            if name == 'period':
+                items = [ (p, "Period {}".format(p))
+                          for p in np.unique(events['period']) if p > 0 ]
+            else:
+                # the name table is shared by all loaded matches, so the
+                # codes are taken from the events
+                items = sorted(((c, events.name(name, c))
+                                for c in np.unique(events[name]).tolist()
+                                if events.name(name, c) is not None),
+                               key=lambda c: c[1])
+            # the filter may have been restored before the codes were known
+            codes = self.pitch.filter.get(name)
+            picked = codes[0] if codes else None
+            box.clear()
+            box.addItem(FILTER_LABELS[name], None)
+            for code, label in items:
+                box.addItem(label, int(code))
+            i = box.findData(picked)
+            box.setCurrentIndex(max(i, 0))
+            if i < 0 and picked is not None:
+                self.pitch.setFilter(name, None)
+
+    def filterPicked(self, name):
+        """Filter the events by the code picked in a filter picker."""
+        self.pitch.setFilter(name, self.filterBoxes[name].currentData())
+        self.checkHeatmap()
+
+    def checkHeatmap(self):
+        """Say why the heatmap is not shown, if it can not be drawn."""
+        if self.pitch.showHeatmap and not self.pitch.heatmapAvailable():
+            self.statusBar.showMessage(
+                "The heatmap of all matches is hidden while a filter is set",
+                STATUS_TIMEOUT)
+
+    def minutesChanged(self):
+        """Filter the events by the minute range of the sliders."""
+        first = self.minuteFrom.value()
+        last = self.minuteTo.value()
+        if first > last:
+            # the sliders push each other
+            if self.sender() is self.minuteFrom:
+                self.minuteTo.setValue(first)
+            else:
+                self.minuteFrom.setValue(last)
+            return
+        self.minuteLabel.setText("{}'-{}'".format(first, last))
+        full = first == 0 and last == MAX_MINUTE
+        self.pitch.setFilter(MINUTE_FILTER, None if full else (first, last))
+        self.checkHeatmap()
+
+    def updatePlaybackEnd(self):
+        """Fit the playback range to the shown events."""
+        events = self.pitch.all_events
+        clock = matchClock(events) if events is not None else []
+        end = float(clock[-1]) if len(clock) else 0.0
+        self.playback.setEnd(end)
+        self.timeSlider.setRange(0, int(end))
+
+    def playbackTimeChanged(self, seconds):
+        """Show the events up to the match time of the playback."""
+        self.pitch.setPlaybackTime(seconds)
+        if not self.timeSlider.isSliderDown():
+            self.timeSlider.setValue(int(seconds))
+        self.timeLabel.setText("{}:{:02d}".format(int(seconds)//60,
+                                                 int(seconds)%60))
+
+    def stopPlayback(self):
+        """Stop the playback and show all events."""
+        self.playback.pause()
+        self.pitch.setPlaybackTime(None)
+
+    def showGrid(self):
+        """Show the matches of the match picker side by side, with the
+        first overlay switched on."""
+        if self.data_config is None:
+            return
+        if self.grid is None:
+            self.grid = MatchGrid(self.grid_config, self.pitch_config,
+                                  self.data_config)
+            self.grid.setWindowTitle("Matches")
+            self.grid.resize(1040, 760)
+            self.grid.matchActivated.connect(self.loadMatch)
+        overlays = [ o for o,shown in (('passes', self.pitch.showPasses),
+                                       ('shots', self.pitch.showShots),
+                                       ('heatmap', self.pitch.showHeatmap))
+                     if shown ]
+        self.grid.setOverlay(overlays[0] if overlays else 'passes')
+        self.grid.setMatches(
+            [ self.matchBox.itemData(i) for i in range(self.matchBox.count()) ],
+            { self.matchBox.itemData(i) : self.matchBox.itemText(i)
+              for i in range(self.matchBox.count()) })
+        self.grid.show()
+        self.grid.raise_()
+
+    def aggregateMatches(self):
+        """Aggregate the matches of the match picker in the background, for
+        the picked player."""
+        match_ids = [ self.matchBox.itemData(i)
+                      for i in range(self.matchBox.count()) ]
+        if self.aggregator is None or not match_ids:
+            return
+        self.aggregateButton.setEnabled(False)
+        self.aggregate_request += 1
+        QThreadPool.globalInstance().start(AggregateTask(
+            self, self.aggregate_request, match_ids, self.pitch.heatmap_bins, None,
+            self.playerBox.currentData(), self.pitch.pass_flow_zones))
+
+    def cancelAggregate(self):
+        """Drop the results of a running aggregation."""
+        self.aggregate_request += 1
+        self.aggregateButton.setEnabled(True)
+
+    def showAggregate(self, request, aggregate):
+        """Show aggregated matches on the pitch."""
+        if request != self.aggregate_request:
+            return
+        self.aggregateButton.setEnabled(True)
+        # a match loading meanwhile would replace the aggregate
+        self.loader.cancel()
+        self.match_id = None
+        self.selectMatch(None)
+        self.pitch.setAggregate(aggregate)
+        self.fillFilters()
+        self.updatePlaybackEnd()
+        self.checkHeatmap()
+
+    def reportAggregateFailed(self, request, message):
+        """Report matches which could not be aggregated."""
+        if request != self.aggregate_request:
+            return
+        self.aggregateButton.setEnabled(True)
+        self.reportError("Could not aggregate the matches: {}"
+                         .format(message))
+
+    def reportError(self, message):
+        """Log an error and show it in the status bar.
+
+        Args:
+            message (str): The error message.
+        """
+        logger.error(message)
+        self.statusBar.showMessage(message, STATUS_TIMEOUT)
+
+    def loadMatch(self, match_id):
+        """Load the events of a match and show them on the pitch.
+
+        Args:
+            match_id (int): The StatsBomb match id.
+        """
+        self.match_id = match_id
+        self.selectMatch(match_id)
+        self.cancelAggregate()
+        self.pitch.clearEvents()
+        self.loader.load(match_id)
+
+    def nextMatch(self):
+        """Load the next match of the selected competition season."""
+        self.stepMatch(1)
+
+    def previousMatch(self):
+        """Load the previous match of the selected competition season."""
+        self.stepMatch(-1)
+
+    def stepMatch(self, step):
+        """Load the match step places away in the selected season."""
+        if self.loader is None:
+            return
+        match_id = self.loader.adjacentMatch(self.match_id, step)
+        if match_id is not None:
+            self.loadMatch(match_id)
+
+    def batchLoaded(self, request, batch):
+        """Show a batch of the loading match on the pitch."""
+        if request == self.loader.request:
+            self.pitch.appendEvents(batch)
+
+    def matchLoaded(self, request, events):
+        """Show the fully loaded match on the pitch."""
+        if request == self.loader.request:
+            self.pitch.setEvents(events)
+            self.fillFilters()
+            self.updatePlaybackEnd()
+
+    def loadFailed(self, request, match_id, message):
+        """Report a match which could not be loaded."""
+        if request == self.loader.request:
+            self.reportError("Could not load match {}: {}"
+                             .format(match_id, message))
+
+    def sessionState(self):
+        """Return the state of the pickers, filters and overlays.
+
+        Returns:
+            dict: The state, which can be saved as JSON.
+        """
+        return {
+            "size" : [self.width(), self.height()],
+            "competition" : (list(self.competition)
+                             if self.competition is not None else None),
+            "player" : self.playerBox.currentData(),
+            "match" : self.match_id,
+            "filters" : { name : self.filterBoxes[name].currentData()
+                          for name in CODE_FILTERS },
+            "minutes" : [self.minuteFrom.value(), self.minuteTo.value()],
+            "modes" : { str(self.modeButtons.id(b)) : b.isChecked()
+                        for b in self.modeButtons.buttons() },
+            "network_window" : self.networkWindowBox.currentData(),
+        }
+
+    def restoreSession(self, state):
+        """Restore a state returned by sessionState and load its match.
+
+        Competitions, players and matches which are no longer in the index
+        are skipped.
+
+        Args:
+            state (dict): The state.
+        """
+        for button_id, checked in state["modes"].items():
+            button = self.modeButtons.button(int(button_id))
+            if button is not None and button.isChecked() != checked:
+                button.click()
+        i = self.networkWindowBox.findData(state["network_window"])
+        if i >= 0:
+            self.networkWindowBox.setCurrentIndex(i)
+            self.pitch.setNetworkWindow(state["network_window"])
+        self.minuteFrom.setValue(state["minutes"][0])
+        self.minuteTo.setValue(state["minutes"][1])
+        # the filter pickers are filled once the match is loaded
+        for name, code in state["filters"].items():
+            self.pitch.setFilter(name, code)
+
+        if self.index is None or state["competition"] is None:
+            return
+        if self.competitionIndex(tuple(state["competition"])) < 0:
+            return
+        self.setCompetition(*state["competition"])
+        i = self.playerBox.findData(state["player"])
+        if i > 0:
+            self.playerBox.setCurrentIndex(i)
+            self.fillMatches()
+        if self.matchBox.findData(state["match"]) >= 0:
+            self.loadMatch(state["match"])
+
+    def closeEvent(self, event):
+        """Save the state and an image of the widget for the next start."""
+        if self.session is not None:
+            try:
+                self.session.save(self.sessionState(), self.grab())
+            except OSError as e:
+                self.reportError("Could not save the session: {}".format(e))
+        super().closeEvent(event)
@@ -2,9 +2,8 @@
 # -*- coding: utf-8 -*-
 
 import json
-from VisualiserWidget import VisualiserWidget
-from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QApplication
+from Session import WarmStart
 import sys
 
 def main(argv):
@@ -12,12 +11,13 @@ def main(argv):
         config = json.load(f)
 
     app = QApplication(sys.argv)
-    w = VisualiserWidget(config["Visualiser"])
-
-    w.show()
+    # the visualiser is imported in the background, behind an image of the
+    # last session
+    start = WarmStart(config)
+    start.start()
     app.exec()
 
 
 
 if __name__=='__main__':
-    main(sys.argv)
\ No newline at end of file
+    main(sys.argv)
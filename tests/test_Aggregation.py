@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import numpy as np
+import pytest
+from Benchmark import syntheticEvents
+from EventStore import MatchEvents, PASS_TYPE
+from Heatmap import eventHistogram
+from Aggregation import (
+    Aggregate, Aggregator, KEPT_TYPES, passFlow, passZoneCounts
+)
+
+BINS = (12, 8)
+ZONES = (6, 4)
+
+def partial(events, match_id):
+    """Compute the partial result of a match, as computePartial does."""
+    return Aggregate(eventHistogram(events['x'], events['y'], BINS),
+                     passZoneCounts(events, ZONES), passFlow(events, ZONES),
+                     ZONES, events.select(np.isin(events['type'], KEPT_TYPES)),
+                     [match_id])
+
+def statsbombEvents(n, seed):
+    """Generate StatsBomb events as parsed from an events file."""
+    rng = np.random.default_rng(seed)
+    events = []
+    for i in range(n):
+        event = {
+            "minute" : int(i*90//n), "second" : int(rng.integers(0, 60)),
+            "period" : 1 if i < n//2 else 2,
+            "team" : { "id" : int(rng.integers(1, 3)), "name" : "Team" },
+            "player" : { "id" : int(rng.integers(1, 23)), "name" : "Player" },
+            "location" : [float(rng.uniform(0, 120)),
+                          float(rng.uniform(0, 80))],
+        }
+        if rng.random() < 0.6:
+            event["type"] = { "id" : PASS_TYPE, "name" : "Pass" }
+            event["pass"] = { "end_location" : [float(rng.uniform(0, 120)),
+                                                float(rng.uniform(0, 80))] }
+        else:
+            event["type"] = { "id" : 43, "name" : "Carry" }
+        events.append(event)
+    return events
+
+def test_merge_equals_the_concatenated_events():
+    matches = [ syntheticEvents(n, seed) for seed, n in enumerate((300, 1, 800)) ]
+    merged = Aggregate.merge([ partial(e, i) for i, e in enumerate(matches) ])
+    combined = MatchEvents.concatenate(matches)
+    expected = partial(combined, None)
+
+    np.testing.assert_array_equal(merged.histogram, expected.histogram)
+    np.testing.assert_array_equal(merged.pass_zones, expected.pass_zones)
+    np.testing.assert_allclose(merged.pass_flow, expected.pass_flow)
+    for k in combined.columns:
+        np.testing.assert_array_equal(merged.events[k], expected.events[k])
+    assert merged.matches == [0, 1, 2]
+
+def test_merged_events_split_by_match():
+    matches = [ syntheticEvents(n, seed) for seed, n in enumerate((200, 500)) ]
+    merged = Aggregate.merge([ partial(e, i) for i, e in enumerate(matches) ])
+    for (match_id, events), original in zip(merged.matchEvents(), matches):
+        kept = np.isin(original['type'], KEPT_TYPES)
+        np.testing.assert_array_equal(events['x'], original['x'][kept])
+        assert events.key == match_id
+
+def test_merge_needs_parts():
+    with pytest.raises(ValueError):
+        Aggregate.merge([])
+
+def test_aggregator_uses_cached_partials(tmp_path):
+    events_path = tmp_path / "events"
+    events_path.mkdir()
+    match_ids = [1, 2]
+    for match_id in match_ids:
+        with open(events_path / "{}.json".format(match_id), "w") as f:
+            json.dump(statsbombEvents(400, match_id), f)
+    config = { "events_path" : str(events_path),
+               "lineups_path" : str(tmp_path / "lineups"),
+               "cache_path" : str(tmp_path / "cache"),
+               "aggregate_zones" : list(ZONES), "aggregate_workers" : 1 }
+
+    aggregator = Aggregator(config)
+    first = aggregator.aggregate(match_ids, BINS, team=1)
+    expected = MatchEvents.concatenate(
+        [ aggregator.store.load(m) for m in match_ids ])
+    expected = expected.select(expected['team'] == 1)
+    np.testing.assert_array_equal(
+        first.histogram, eventHistogram(expected['x'], expected['y'], BINS))
+    np.testing.assert_allclose(first.pass_flow, passFlow(expected, ZONES))
+
+    query = aggregator.query(BINS, team=1)
+    assert all(aggregator.readPartial(m, query) is not None
+               for m in match_ids)
+    second = Aggregator(config).aggregate(match_ids, BINS, team=1)
+    np.testing.assert_array_equal(second.histogram, first.histogram)
+    np.testing.assert_array_equal(second.pass_zones, first.pass_zones)
+    np.testing.assert_allclose(second.pass_flow, first.pass_flow)
+
+def test_pass_flow_sums_match_brute_force():
+    events = syntheticEvents(3000)
+    flow = passFlow(events, ZONES)
+    assert flow.shape == (ZONES[0]*ZONES[1], 3)
+    zone_length, zone_width = 120/ZONES[0], 80/ZONES[1]
+    for i in range(len(events)):
+        if events['type'][i] != PASS_TYPE:
+            continue
+        # remove each pass from the sums of its zone
+        zx = min(int(events['x'][i]//zone_length), ZONES[0]-1)
+        zy = min(int(events['y'][i]//zone_width), ZONES[1]-1)
+        zone = zy*ZONES[0]+zx
+        flow[zone] -= (1, events['end_x'][i]-events['x'][i],
+                       events['end_y'][i]-events['y'][i])
+    np.testing.assert_allclose(flow, 0, atol=1e-3)
+
+def test_pass_flow_skips_other_events_and_missing_locations():
+    events = syntheticEvents(10)
+    events.columns['type'][:] = PASS_TYPE
+    events.columns['type'][0] = 43
+    events.columns['end_x'][1] = np.nan
+    events.columns['x'][2] = np.nan
+    flow = passFlow(events, ZONES)
+    assert flow[:,0].sum() == 7
+
+def test_pass_flow_clamps_the_edges_of_the_pitch():
+    events = syntheticEvents(2)
+    events.columns['type'][:] = PASS_TYPE
+    events.columns['x'][:] = (0.0, 120.0)
+    events.columns['y'][:] = (0.0, 80.0)
+    flow = passFlow(events, ZONES)
+    assert flow[0,0] == 1
+    assert flow[-1,0] == 1
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+from Benchmark import syntheticEvents
+from EventFilter import EventFilter
+
+@pytest.fixture
+def events():
+    return syntheticEvents(5000)
+
+def test_no_filter_returns_the_events(events):
+    f = EventFilter()
+    assert f.mask() is None
+    assert f.apply(events) is events
+
+def test_code_filters_match_brute_force(events):
+    f = EventFilter()
+    f.set('team', 1)
+    f.set('player', [3, 7, 11])
+    f.apply(events)
+    expected = ((events['team'] == 1)
+                & np.isin(events['player'], [3, 7, 11]))
+    np.testing.assert_array_equal(f.mask(), expected)
+
+def test_minute_range_is_inclusive(events):
+    f = EventFilter()
+    f.set('minute', (10, 20))
+    f.apply(events)
+    expected = (events['minute'] >= 10) & (events['minute'] <= 20)
+    np.testing.assert_array_equal(f.mask(), expected)
+
+def test_minute_range_on_unsorted_minutes(events):
+    order = np.random.default_rng(0).permutation(len(events))
+    shuffled = events.select(order)
+    f = EventFilter()
+    f.set('minute', (30, 45))
+    f.set('type', 30)
+    f.apply(shuffled)
+    expected = ((shuffled['minute'] >= 30) & (shuffled['minute'] <= 45)
+                & (shuffled['type'] == 30))
+    np.testing.assert_array_equal(f.mask(), expected)
+
+def test_changing_the_range_keeps_the_code_filters(events):
+    f = EventFilter()
+    f.set('team', 2)
+    f.set('minute', (0, 45))
+    f.apply(events)
+    f.set('minute', (46, 90))
+    expected = ((events['team'] == 2) & (events['minute'] >= 46)
+                & (events['minute'] <= 90))
+    np.testing.assert_array_equal(f.mask(), expected)
+
+def test_clearing_a_filter(events):
+    f = EventFilter()
+    f.set('team', 1)
+    f.set('period', 2)
+    f.apply(events)
+    f.set('team', None)
+    np.testing.assert_array_equal(f.mask(), events['period'] == 2)
+    f.set('period', None)
+    assert not f.isActive()
+    assert f.mask() is None
+
+def test_applied_events_are_keyed_by_the_filter(events):
+    f = EventFilter()
+    f.set('team', 1)
+    a = f.apply(events)
+    f.set('team', 2)
+    b = f.apply(events)
+    assert a.key != b.key
+    assert np.all(a['team'] == 1) and np.all(b['team'] == 2)
+
+def test_unknown_filter():
+    with pytest.raises(ValueError):
+        EventFilter().set('colour', 1)
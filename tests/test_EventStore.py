@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import copy
+import json
+import os
+import pickle
+import threading
+from unittest import mock
+import numpy as np
+import pytest
+from Benchmark import syntheticEvents
+from EventStore import (
+    EventBuffer, EventStore, MatchEvents, NameTable, PASS_TYPE, namesSize,
+    iterEventBatches
+)
+
+def statsbombEvents(n):
+    """Generate StatsBomb events as parsed from an events file."""
+    return [ { "minute" : i//60, "second" : i%60, "period" : 1,
+               "type" : { "id" : PASS_TYPE, "name" : "Pass" },
+               "team" : { "id" : i%2+1, "name" : "Team {}".format(i%2+1) },
+               "location" : [i%120, i%80],
+               "pass" : { "end_location" : [(i+7)%120, (i+3)%80] } }
+             for i in range(n) ]
+
+@pytest.fixture
+def store(tmp_path):
+    events_path = tmp_path / "events"
+    events_path.mkdir()
+    with open(events_path / "1.json", "w") as f:
+        json.dump(statsbombEvents(5000), f)
+    return EventStore({ "events_path" : str(events_path),
+                        "lineups_path" : str(tmp_path / "lineups"),
+                        "cache_path" : str(tmp_path / "cache") })
+
+def writeText(tmp_path, text):
+    path = tmp_path / "events.json"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+@pytest.mark.parametrize("chunk_size", [7, 64, 1 << 16])
+def test_batches_equal_the_parsed_file(tmp_path, chunk_size):
+    events = statsbombEvents(300)
+    path = writeText(tmp_path, json.dumps(events, indent=1))
+    batches = list(iterEventBatches(path, batch_size=128,
+                                    chunk_size=chunk_size))
+    assert [ len(b) for b in batches ] == [128, 128, 44]
+    assert [ e for b in batches for e in b ] == events
+
+@pytest.mark.parametrize("text", ['[{"a":1} {"b":2}]', '[{"a":1},,{"b":2}]',
+                                  '[,{"a":1}]', '[{"a":1}:{"b":2}]'])
+def test_batches_need_separators(tmp_path, text):
+    with pytest.raises(ValueError):
+        list(iterEventBatches(writeText(tmp_path, text), chunk_size=4))
+
+def test_batches_of_an_empty_array(tmp_path):
+    assert list(iterEventBatches(writeText(tmp_path, " [ ] "))) == []
+
+def test_invalid_event_stops_reading(tmp_path):
+    events = json.dumps(statsbombEvents(5000))
+    path = writeText(tmp_path, '[{"a" 1},' + events[1:])
+    f = open(path, encoding="utf-8")
+    read = f.read
+    reads = []
+    def countingRead(n):
+        reads.append(n)
+        return read(n)
+    f.read = countingRead
+
+    with mock.patch("EventStore.open", lambda *args, **kwargs: f,
+                    create=True):
+        with pytest.raises(ValueError, match="character 6"):
+            list(iterEventBatches(path, chunk_size=256, max_event_size=1024))
+    # the reader gives up once the buffer holds max_event_size characters
+    assert sum(reads) <= 1024 + 256 < len(events)
+
+def test_buffer_equals_concatenation():
+    parts = [ syntheticEvents(n, seed) for seed, n in
+              enumerate((1000, 5000, 0, 3000)) ]
+    buffer = EventBuffer('match')
+    lengths = []
+    for part in parts:
+        buffer.append(part)
+        lengths.append(len(buffer.events()))
+    expected = MatchEvents.concatenate(parts)
+    events = buffer.events()
+    for k in expected.columns:
+        np.testing.assert_array_equal(events[k], expected[k])
+    assert lengths == [1000, 6000, 6000, 9000]
+    assert events.key == 'match'
+
+def test_buffer_leaves_earlier_events_unchanged():
+    buffer = EventBuffer()
+    buffer.append(syntheticEvents(3000, 0))
+    earlier = buffer.events()
+    x = earlier['x'].copy()
+    buffer.append(syntheticEvents(5000, 1))
+    np.testing.assert_array_equal(earlier['x'], x)
+
+def test_streamed_cache_equals_parsed_events(store):
+    streamed = EventBuffer(1)
+    for batch in store.stream(1, 700):
+        streamed.append(batch)
+    expected = MatchEvents.fromEvents(statsbombEvents(5000))
+    cached = store.load(1)
+    assert store.isCached(1)
+    for k in expected.columns:
+        np.testing.assert_array_equal(cached[k], expected[k])
+        np.testing.assert_array_equal(streamed.events()[k], expected[k])
+    assert cached.name('team', 2) == "Team 2"
+
+def test_unfinished_stream_leaves_no_cache(store):
+    stream = store.stream(1, 100)
+    next(stream)
+    stream.close()
+    assert not store.isCached(1)
+    directory = store.cacheDirectory(1)
+    assert not any(f.endswith(".tmp") for f in os.listdir(directory))
+
+def test_name_table_is_shared_between_threads():
+    table = NameTable()
+    def intern(offset):
+        for code in range(offset, offset+2000):
+            table.intern('player', code, "Player {}".format(code))
+    threads = [ threading.Thread(target=intern, args=(i*1000,))
+                for i in range(4) ]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        namesSize(table)
+    for t in threads:
+        t.join()
+    assert len(table['player']) == 5000
+
+    copy = pickle.loads(pickle.dumps(table))
+    assert copy['player'] == table['player']
+    copy.intern('team', 1, "Team")
+
+def test_event_view_checks_the_index():
+    events = syntheticEvents(3)
+    assert events.event(-1).minute == events['minute'][2]
+    with pytest.raises(IndexError):
+        events.event(3)
+
+def test_event_view_copies_and_pickles():
+    events = syntheticEvents(5)
+    view = events.event(3)
+    copied = copy.copy(view)
+    assert copied.index == 3 and copied.minute == view.minute
+    unpickled = pickle.loads(pickle.dumps(view))
+    assert unpickled.index == 3 and unpickled.x == view.x
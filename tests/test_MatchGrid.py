@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import pytest
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage
+from MatchGrid import MatchGrid
+
+@pytest.fixture
+def grid(tmp_path):
+    app = QApplication.instance() or QApplication([])
+    with open("config.json") as f:
+        config = json.load(f)
+    data_config = dict(config["StatsBomb"], events_path=str(tmp_path),
+                       lineups_path=str(tmp_path), cache_path=str(tmp_path))
+    grid = MatchGrid(config["Visualiser"]["Grid"],
+                     config["Visualiser"]["Pitch"], data_config)
+    yield grid
+    grid.pool.waitForDone()
+
+def test_failed_cells_are_tried_again(grid):
+    key = grid.cellKey(1)
+    grid.request(key)
+    grid.pool.waitForDone()
+    QApplication.processEvents()
+    assert key in grid.failed and key not in grid.pending
+    grid.setOverlay('shots')
+    assert not grid.failed
+    grid.failed.add(key)
+    grid.setCellSize(200, 140)
+    assert not grid.failed
+
+def test_results_of_cancelled_renders_keep_the_pending_render(grid):
+    grid.pool.setMaxThreadCount(1)
+    key = grid.cellKey(1)
+    # the cell scrolled away and back while its first render was running
+    grid.request(key)
+    stale = grid.pending[key].request
+    grid.cancelExcept(set())
+    grid.request(key)
+    grid.pool.waitForDone()
+
+    grid.cellFailed(stale, key, "cancelled")
+    assert key not in grid.failed
+    grid.cellRendered(stale, key, QImage())
+    assert key in grid.pending
+    assert key in grid.images
+
+def test_pitch_has_the_ratio_of_the_grid(grid):
+    assert grid.template.pitchPixmap(2.0).devicePixelRatio() == 2.0
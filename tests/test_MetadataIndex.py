@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import pytest
+from MetadataIndex import MetadataIndex
+
+def writeJson(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+def match(match_id, home, away, date):
+    return { "match_id" : match_id, "match_date" : date, "kick_off" : "15:00",
+             "home_team" : { "home_team_id" : home,
+                             "home_team_name" : "Team {}".format(home) },
+             "away_team" : { "away_team_id" : away,
+                             "away_team_name" : "Team {}".format(away) },
+             "home_score" : 1, "away_score" : 0 }
+
+def lineup(team, players):
+    return { "team_id" : team, "team_name" : "Team {}".format(team),
+             "lineup" : [ { "player_id" : p,
+                            "player_name" : "Player {}".format(p),
+                            "jersey_number" : p } for p in players ] }
+
+@pytest.fixture
+def config(tmp_path):
+    config = { "competitions_path" : str(tmp_path/"competitions.json"),
+               "matches_path" : str(tmp_path/"matches"),
+               "lineups_path" : str(tmp_path/"lineups"),
+               "index_path" : str(tmp_path/"index"/"index.sqlite") }
+    writeJson(config["competitions_path"], [
+        { "competition_id" : 11, "season_id" : 1,
+          "competition_name" : "League", "season_name" : "2020/2021" }])
+    writeJson(os.path.join(config["matches_path"], "11", "1.json"),
+              [ match(100, 1, 2, "2020-09-01"), match(101, 2, 1, "2020-09-08") ])
+    writeJson(os.path.join(config["lineups_path"], "100.json"),
+              [ lineup(1, [10, 11]), lineup(2, [20]) ])
+    return config
+
+def test_update_reads_the_files(config):
+    index = MetadataIndex(config)
+    assert index.update() == 3
+    assert index.errors == []
+    assert index.competitions() == [(11, 1, "League", "2020/2021")]
+    assert [ m[0] for m in index.matches(11, 1) ] == [100, 101]
+    assert [ m[0] for m in index.matches(player_id=20) ] == [100]
+    assert index.players(11, 1, team_id=1) == [(10, "Player 10"),
+                                                (11, "Player 11")]
+    # nothing changed, so nothing is read again
+    assert index.update() == 0
+    index.close()
+
+def test_update_skips_bad_files(config):
+    bad = os.path.join(config["lineups_path"], "101.json")
+    with open(bad, "w", encoding="utf-8") as f:
+        f.write("[{")
+    writeJson(os.path.join(config["matches_path"], "11", "2.json"),
+              [ { "match_id" : 102 } ])
+
+    index = MetadataIndex(config)
+    assert index.update() == 3
+    assert sorted(p for p, _ in index.errors) == sorted(
+        [bad, os.path.join(config["matches_path"], "11", "2.json")])
+    # the good files are committed
+    assert [ m[0] for m in index.matches() ] == [100, 101]
+    assert [ m[0] for m in index.matches(player_id=10) ] == [100]
+    index.close()
+
+    # the bad file is read once it is fixed
+    writeJson(bad, [ lineup(2, [21]) ])
+    index = MetadataIndex(config)
+    assert index.update() == 1
+    assert [ m[0] for m in index.matches(player_id=21) ] == [101]
+    index.close()
+
+def test_bad_changed_file_keeps_its_rows(config):
+    index = MetadataIndex(config)
+    index.update()
+    path = os.path.join(config["lineups_path"], "100.json")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("not json at all")
+    assert index.update() == 0
+    assert [ p for p, _ in index.errors ] == [path]
+    assert [ m[0] for m in index.matches(player_id=20) ] == [100]
+    index.close()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+from unittest import mock
+import PaintProfiler
+from PaintProfiler import PaintProfiler as Profiler, createProfiler
+
+def record(profiler, frames):
+    for _ in range(frames):
+        with profiler.frame():
+            with profiler.layer("passes"):
+                pass
+
+def test_readout_is_computed_once_per_interval():
+    profiler = Profiler()
+    assert profiler.readout() == []
+    record(profiler, 3)
+    with mock.patch.object(profiler, "stats", wraps=profiler.stats) as stats:
+        lines = profiler.readout()
+        assert profiler.readout() is lines
+        # new frames within the interval keep the readout
+        record(profiler, 1)
+        assert profiler.readout() is lines
+        assert stats.call_count == 1
+        profiler._readout_time -= PaintProfiler.READOUT_INTERVAL
+        assert profiler.readout() is not lines
+        assert stats.call_count == 2
+
+def test_each_profiler_dumps_to_its_own_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(PaintProfiler, "_dumped", {})
+    monkeypatch.delenv(PaintProfiler.PROFILE_ENV, raising=False)
+    monkeypatch.delenv(PaintProfiler.PROFILE_OUTPUT_ENV, raising=False)
+    output = str(tmp_path/"profile.json")
+    config = { "profile_paint" : True, "profile_output" : output }
+    with mock.patch("atexit.register") as register:
+        profilers = [ createProfiler(config) for _ in range(3) ]
+    assert register.call_count == 1
+
+    for i, profiler in enumerate(profilers):
+        record(profiler, i+1)
+    PaintProfiler.dumpProfilers()
+    for i, name in enumerate(["profile.json", "profile.1.json",
+                              "profile.2.json"]):
+        with open(tmp_path/name) as f:
+            assert json.load(f)["frame"]["count"] == i+1
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from math import pi
+import numpy as np
+import pytest
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPainterPath, QImage, QPainter, QPen, QColor, QBrush
+from PyQt5.QtWidgets import QApplication
+from PaintingUtilities import (
+    arrayToPath, arrowHeads, arrowPath, headPaths, drawArrow, drawArrows,
+    MOVE_TO, LINE_TO
+)
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+def elements(path):
+    """Return the types and points of the elements of a path."""
+    return [ (path.elementAt(i).type, path.elementAt(i).x, path.elementAt(i).y)
+             for i in range(path.elementCount()) ]
+
+def test_array_path_equals_the_built_path():
+    x = np.array([0.0, 10.0, 10.0, 5.0, 20.0])
+    y = np.array([0.0, 0.0, 8.0, 2.5, 3.0])
+    types = np.array([MOVE_TO, LINE_TO, LINE_TO, MOVE_TO, LINE_TO])
+    expected = QPainterPath()
+    expected.moveTo(0, 0)
+    expected.lineTo(10, 0)
+    expected.lineTo(10, 8)
+    expected.moveTo(5, 2.5)
+    expected.lineTo(20, 3)
+
+    path = arrayToPath(x, y, types)
+    assert elements(path) == elements(expected)
+    assert path.fillRule() == Qt.WindingFill
+    # the path stays usable after deserialization
+    path.lineTo(0, 0)
+    assert path.elementCount() == 6
+
+def test_empty_array_path():
+    assert arrayToPath(np.empty(0), np.empty(0), np.empty(0)).isEmpty()
+
+def test_arrow_path_contents():
+    x0, y0 = np.array([0.0, 50.0]), np.array([0.0, 50.0])
+    x1, y1 = np.array([100.0, 50.0]), np.array([0.0, 10.0])
+    heads = arrowHeads(x0, y0, x1, y1, 10.0)
+    path = arrowPath(x0, y0, x1, y1, heads)
+    assert path.elementCount() == 12
+    for i in range(2):
+        e = elements(path)[6*i:6*i+6]
+        assert [ t for t, _, _ in e ] == [MOVE_TO, LINE_TO,
+                                          MOVE_TO, LINE_TO, LINE_TO, LINE_TO]
+        # the shaft, then the head closed at the tip
+        assert e[0][1:] == (x0[i], y0[i])
+        assert e[1][1:] == e[2][1:] == e[5][1:] == (x1[i], y1[i])
+        np.testing.assert_allclose([e[3][1:], e[4][1:]], heads[i])
+    # the head of the first arrow points along it, 10 pixels back
+    np.testing.assert_allclose(heads[0, :, 0], 100 - 10*np.cos(pi/6))
+    np.testing.assert_allclose(sorted(heads[0, :, 1]), [-5, 5])
+
+def test_head_paths_are_chunked():
+    n = 10
+    x0, y0 = np.zeros(n), np.zeros(n)
+    x1, y1 = np.arange(1.0, n+1)*10, np.full(n, 5.0)
+    heads = arrowHeads(x0, y0, x1, y1, 4.0)
+    paths = list(headPaths(x1, y1, heads, chunk=4))
+    assert [ p.elementCount() for p in paths ] == [12, 12, 6]
+    single = list(headPaths(x1, y1, heads, chunk=None))
+    assert len(single) == 1
+    assert elements(single[0]) == sum((elements(p) for p in paths), [])
+
+def render(draw):
+    image = QImage(120, 80, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.transparent)
+    painter = QPainter(image)
+    painter.setPen(QPen(QColor("#ff0000"), 1.0))
+    painter.setBrush(QBrush(QColor("#ff0000")))
+    draw(painter)
+    painter.end()
+    return image
+
+def test_bulk_arrows_cover_the_single_arrows(app):
+    rng = np.random.default_rng(0)
+    x0, x1 = rng.uniform(10, 110, 2), rng.uniform(10, 110, 2)
+    y0, y1 = rng.uniform(10, 70, 2), rng.uniform(10, 70, 2)
+
+    def single(painter):
+        for i in range(len(x0)):
+            drawArrow(painter, x0[i], y0[i], x1[i], y1[i], 8)
+    expected = render(single)
+    bulk = render(lambda painter: drawArrows(painter, x0, y0, x1, y1, 8))
+
+    def covered(image):
+        return { (x, y) for x in range(image.width())
+                 for y in range(image.height())
+                 if image.pixelColor(x, y).alpha() > 128 }
+    a, b = covered(expected), covered(bulk)
+    assert a
+    # the same pixels up to antialiasing at the edges
+    assert len(a ^ b) <= 0.1*len(a)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from Benchmark import syntheticEvents
+from PassNetwork import (
+    PassNetwork, completedPasses, widthGroups, NETWORK_WIDTH_STEPS
+)
+
+def test_width_groups_span_the_real_range():
+    groups = widthGroups(np.array([7, 3, 11, 5]))
+    np.testing.assert_array_equal(groups, [2, 0, 4, 1])
+
+def test_width_groups_of_equal_counts():
+    np.testing.assert_array_equal(widthGroups(np.array([4, 4, 4])), [0, 0, 0])
+
+def test_width_groups_of_no_edges():
+    groups = widthGroups(np.array([], dtype=np.int64))
+    assert groups.shape == (0,)
+
+def test_width_groups_stay_in_range():
+    count = np.random.default_rng(0).integers(1, 50, 200)
+    groups = widthGroups(count)
+    assert groups.min() == 0
+    assert groups.max() == NETWORK_WIDTH_STEPS-1
+    assert np.all(np.diff(groups[np.argsort(count)]) >= 0)
+
+def test_network_counts_the_completed_passes():
+    events = syntheticEvents(2000, 3)
+    network = PassNetwork.fromEvents(events, 1)
+    assert network.passes.sum() == completedPasses(events, 1).sum()
+    i, j, count = network.edges(1)
+    assert count.sum() == network.passes.sum()
+
+def test_merge_adds_up_the_networks():
+    parts = [ PassNetwork.fromEvents(syntheticEvents(n, seed), 1)
+              for seed, n in enumerate((500, 800)) ]
+    merged = PassNetwork.merge(parts)
+    assert merged.passes.sum() == sum(p.passes.sum() for p in parts)
+    assert merged.pos_count.sum() == sum(p.pos_count.sum() for p in parts)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import numpy as np
+import pytest
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QColor
+from PitchTransform import PitchTransform, STATSBOMB_LENGTH, STATSBOMB_WIDTH
+from PitchWidget import PitchWidget
+
+REL_DIM = { "PITCH_LENGTH" : 1.0, "PITCH_WIDTH" : 68/105,
+            "PENALTY_SPOT" : 11/105, "PENALTY_SPOT_RADIUS" : 0.11/105 }
+
+@pytest.fixture
+def app():
+    return QApplication.instance() or QApplication([])
+
+@pytest.fixture
+def pitch(app):
+    with open("config.json") as f:
+        config = json.load(f)["Visualiser"]["Pitch"]
+    pitch = PitchWidget(config)
+    pitch.resize(1100, 740)
+    return pitch
+
+def test_measurements_are_scaled():
+    transform = PitchTransform(1050, (25, 30), REL_DIM)
+    assert transform.abs_meas["PITCH_LENGTH"] == pytest.approx(1050)
+    assert transform.abs_meas["PENALTY_SPOT"] == pytest.approx(110)
+    assert transform.rect.getRect() == pytest.approx((25, 30, 1050, 680))
+
+def test_penalty_spot_stays_visible():
+    small = PitchTransform(200, (0, 0), REL_DIM)
+    assert small.abs_meas["PENALTY_SPOT_RADIUS"] == 1
+    large = PitchTransform(210000, (0, 0), REL_DIM)
+    assert large.abs_meas["PENALTY_SPOT_RADIUS"] == pytest.approx(220)
+
+def test_map_round_trip():
+    transform = PitchTransform(1050, (25, 30), REL_DIM)
+    x = np.array([0, STATSBOMB_LENGTH, 60.5])
+    y = np.array([0, STATSBOMB_WIDTH, 12.25])
+    px, py = transform.map(x, y)
+    np.testing.assert_allclose(px[:2], [25, 1075])
+    np.testing.assert_allclose(py[:2], [30, 710])
+    np.testing.assert_allclose(transform.inverseMap(px, py), [x, y])
+
+def isMarking(image, x, y, color):
+    """Whether a pixel next to a point has the marking color."""
+    return any(image.pixelColor(int(round(x))+dx, int(round(y))+dy) == color
+               for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+
+def test_markings_match_the_event_coordinates(pitch):
+    """The penalty spots and the arcs are drawn where the events on them
+    are mapped to."""
+    transform = pitch.pitch_transform
+    image = pitch.pitchPixmap(1.0).toImage()
+    marking = QColor(pitch.marking_color)
+    meas = transform.abs_meas
+    # the penalty spots in StatsBomb coordinates
+    spot = STATSBOMB_LENGTH*meas["PENALTY_SPOT"]/meas["PITCH_LENGTH"]
+    x, y = transform.map([spot, STATSBOMB_LENGTH-spot],
+                         [STATSBOMB_WIDTH/2]*2)
+    radius = meas["PENALTY_KICK_CIRCLE"]
+
+    for sx, sy, side in zip(x, y, (1, -1)):
+        assert isMarking(image, sx, sy, marking)
+        # the arc is outside the penalty box, towards the centre
+        assert isMarking(image, sx+side*radius, sy, marking)
+        assert not isMarking(image, sx+side*radius/2, sy, marking)
+        assert not isMarking(image, sx-side*radius, sy, marking)
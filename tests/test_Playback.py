@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+from PyQt5.QtCore import QSize
+from PyQt5.QtWidgets import QApplication
+from Playback import AccumulationLayer
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+class Recorder:
+    """Records the ranges of events drawn."""
+    def __init__(self):
+        self.ranges = []
+
+    def __call__(self, painter, start, stop):
+        self.ranges.append((start, stop))
+
+    def drawn(self):
+        return sum(stop-start for start, stop in self.ranges)
+
+def test_keyframes_are_bounded(app):
+    layer = AccumulationLayer(QSize(40, 30), 1.0, 10, 4)
+    draw = Recorder()
+    layer.advance(1000, draw)
+    assert draw.drawn() == 1000
+    assert len(layer.keyframes) <= 4
+    # the kept keyframes are spread over the events
+    assert max(layer.keyframes) > 500
+
+def test_seeking_back_restores_the_nearest_keyframe(app):
+    layer = AccumulationLayer(QSize(40, 30), 1.0, 10, 4)
+    layer.advance(1000, Recorder())
+    draw = Recorder()
+    layer.advance(700, draw)
+    nearest = max(k for k in layer.keyframes if k <= 700)
+    assert draw.ranges[0][0] == nearest
+    assert draw.drawn() == 700-nearest
+
+def test_seeking_before_the_first_keyframe_starts_empty(app):
+    layer = AccumulationLayer(QSize(40, 30), 1.0, 10, 4)
+    layer.advance(100, Recorder())
+    draw = Recorder()
+    layer.advance(5, draw)
+    assert draw.ranges == [(0, 5)]
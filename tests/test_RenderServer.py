@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import RenderServer
+from RenderServer import RenderServer as Server
+
+class FakeRender:
+    """Renders in a thread instead of a worker process, counting the
+    renders."""
+    def __init__(self, delay = 0.1, error = None):
+        self.delay = delay
+        self.error = error
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, match_id, overlay, filters, size):
+        with self.lock:
+            self.calls.append((match_id, overlay))
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return "{} {} {}".format(match_id, overlay, size).encode()
+
+@pytest.fixture
+def config(tmp_path):
+    with open("config.json") as f:
+        config = json.load(f)
+    events_path = tmp_path/"events"
+    events_path.mkdir()
+    (events_path/"1.json").write_text("[]")
+    config["StatsBomb"] = dict(config["StatsBomb"],
+                               events_path=str(events_path),
+                               lineups_path=str(tmp_path),
+                               cache_path=str(tmp_path/"cache"))
+    return config
+
+def makeServer(config, render, monkeypatch):
+    monkeypatch.setattr(RenderServer, "renderImage", render)
+    server = Server(config, 1)
+    server.pool.shutdown()
+    server.pool = ThreadPoolExecutor(4)
+    return server
+
+def request(server):
+    return server.image(1, "passes", {}, (200, 100))
+
+def test_parse_request(config, monkeypatch):
+    server = makeServer(config, FakeRender(), monkeypatch)
+    assert server.parseRequest({ "match" : ["7"], "team" : ["3,1"],
+                                 "minute" : ["10-45"] }) == (
+        7, "passes", { "team" : [1, 3], "minute" : [10, 45] },
+        tuple(config["Server"]["default_size"]))
+    for query in ({}, { "match" : ["x"] },
+                  { "match" : ["1"], "overlay" : ["arrows"] },
+                  { "match" : ["1"], "width" : ["100000"] },
+                  { "match" : ["1"], "minute" : ["10"] }):
+        with pytest.raises(ValueError):
+            server.parseRequest(query)
+
+def test_identical_requests_share_the_render(config, monkeypatch):
+    render = FakeRender()
+    server = makeServer(config, render, monkeypatch)
+
+    async def run():
+        images = await asyncio.gather(*[ request(server) for _ in range(5) ])
+        assert not server.pending
+        # cached in memory
+        assert await request(server) == images[0]
+        return images
+
+    images = asyncio.run(run())
+    assert len(set(images)) == 1
+    assert len(render.calls) == 1
+
+    # a new server reads the image from disk
+    render = FakeRender()
+    server = makeServer(config, render, monkeypatch)
+    assert asyncio.run(request(server)) == images[0]
+    assert render.calls == []
+
+def test_failed_render_reaches_every_request(config, monkeypatch):
+    render = FakeRender(error=RuntimeError("render failed"))
+    server = makeServer(config, render, monkeypatch)
+
+    async def run():
+        return await asyncio.gather(*[ request(server) for _ in range(3) ],
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(render.calls) == 1
+    assert not server.pending and not server.images
+    # the failure is not cached
+    render.error = None
+    asyncio.run(request(server))
+    assert len(render.calls) == 2
+
+def respond(server, data):
+    """Answer a raw request, returning the response."""
+    class Writer:
+        def __init__(self):
+            self.data = b""
+        def write(self, data):
+            self.data += data
+        async def drain(self):
+            pass
+        def close(self):
+            pass
+
+    async def run():
+        reader = asyncio.StreamReader(limit=RenderServer.MAX_HEAD)
+        reader.feed_data(data)
+        reader.feed_eof()
+        writer = Writer()
+        await server.handle(reader, writer)
+        return writer.data
+
+    head, body = asyncio.run(run()).split(b"\r\n\r\n", 1)
+    return int(head.split(b" ")[1]), body
+
+def test_http_errors(config, monkeypatch):
+    server = makeServer(config, FakeRender(delay=0), monkeypatch)
+    assert respond(server, b"GET /render?match=1 HTTP/1.1\r\n\r\n")[0] == 200
+    assert respond(server, b"GET /render?match=2 HTTP/1.1\r\n\r\n") == (
+        404, b"Unknown match")
+    assert respond(server, b"GET /render?match=1&overlay=x HTTP/1.1"
+                           b"\r\n\r\n")[0] == 400
+    assert respond(server, b"POST /render HTTP/1.1\r\n\r\n")[0] == 405
+    assert respond(server, b"GET /other HTTP/1.1\r\n\r\n")[0] == 404
+    assert respond(server, b"GET /render\r\n")[0] == 400
+
+    server = makeServer(config, FakeRender(delay=0, error=OSError("broken")),
+                        monkeypatch)
+    # not the size rendered above, which is cached on disk
+    assert respond(server, b"GET /render?match=1&width=300 HTTP/1.1"
+                           b"\r\n\r\n") == (500, b"broken")
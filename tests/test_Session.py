@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+from unittest import mock
+import pytest
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QPixmap, QColor
+from Session import Session, WarmStart, SESSION_VERSION
+
+@pytest.fixture
+def app():
+    return QApplication.instance() or QApplication([])
+
+@pytest.fixture
+def config(tmp_path):
+    with open("config.json") as f:
+        config = json.load(f)
+    config["Visualiser"]["Session"] = { "path" : str(tmp_path/"session"),
+                                        "warm_start" : True }
+    config["StatsBomb"] = None
+    return config
+
+def test_save_and_read(app, tmp_path):
+    session = Session({ "path" : str(tmp_path/"session"),
+                        "warm_start" : True })
+    assert session.read() is None
+    pixmap = QPixmap(40, 30)
+    pixmap.setDevicePixelRatio(2.0)
+    pixmap.fill(QColor("#336699"))
+    session.save({ "size" : [20, 15], "match" : 7 }, pixmap)
+
+    state = session.read()
+    assert state["size"] == [20, 15] and state["match"] == 7
+    assert state["version"] == SESSION_VERSION
+    image = session.image(state)
+    assert image.size() == pixmap.size()
+    assert image.devicePixelRatio() == 2.0
+    assert image.toImage().pixelColor(0, 0) == QColor("#336699")
+
+def test_stale_state_is_not_read(app, tmp_path):
+    session = Session({ "path" : str(tmp_path), "warm_start" : True })
+    with open(session.stateFile(), "w") as f:
+        json.dump({ "version" : SESSION_VERSION-1 }, f)
+    assert session.read() is None
+
+def test_widget_state_round_trip(app, config):
+    from VisualiserWidget import VisualiserWidget
+    widget = VisualiserWidget(config["Visualiser"])
+    widget.modeButtons.button(1).click()
+    widget.minuteFrom.setValue(15)
+    widget.minuteTo.setValue(60)
+    state = json.loads(json.dumps(widget.sessionState()))
+
+    restored = VisualiserWidget(config["Visualiser"])
+    restored.resize(*state["size"])
+    restored.restoreSession(state)
+    assert restored.sessionState() == state
+
+def test_unrestorable_session_shows_the_widget(app, config):
+    warm = WarmStart(config)
+    warm.state = { "size" : [300, 200] }
+    warm.createWidget()
+    assert warm.widget.isVisible()
+    assert "Could not restore" in warm.widget.statusBar.currentMessage()
+    warm.widget.session = None
+    warm.widget.close()
+
+def test_failed_widget_is_reported(app, config):
+    warm = WarmStart(config)
+    with mock.patch("VisualiserWidget.VisualiserWidget",
+                    side_effect=RuntimeError("broken")), \
+            mock.patch("Session.QMessageBox.critical") as critical, \
+            mock.patch("Session.QApplication.exit") as exit:
+        warm.createWidget()
+    assert "broken" in critical.call_args[0][2]
+    exit.assert_called_once_with(1)
+    assert warm.widget is None
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+from SpatialIndex import GridIndex
+
+def bruteNearest(x, y, px, py, max_distance = np.inf):
+    d2 = (x-px)**2 + (y-py)**2
+    i = int(np.argmin(d2))
+    return i if d2[i] <= max_distance**2 else None
+
+def bruteRect(x, y, x0, y0, x1, y1):
+    x0, x1 = min(x0, x1), max(x0, x1)
+    y0, y1 = min(y0, y1), max(y0, y1)
+    return np.flatnonzero((x >= x0) & (x <= x1) & (y >= y0) & (y <= y1))
+
+@pytest.mark.parametrize("n, cell_size", [(1, None), (50, None),
+                                          (2000, None), (500, 3.0)])
+def test_nearest_matches_brute_force(n, cell_size):
+    rng = np.random.default_rng(n)
+    x, y = rng.uniform(0, 120, n), rng.uniform(0, 80, n)
+    index = GridIndex(x, y, cell_size)
+    # queries inside and well outside the points
+    for px, py in rng.uniform(-40, 160, (200, 2)):
+        i = index.nearest(px, py)
+        j = bruteNearest(x, y, px, py)
+        assert np.isclose((x[i]-px)**2 + (y[i]-py)**2,
+                          (x[j]-px)**2 + (y[j]-py)**2)
+
+def test_nearest_respects_max_distance():
+    rng = np.random.default_rng(1)
+    x, y = rng.uniform(0, 120, 300), rng.uniform(0, 80, 300)
+    index = GridIndex(x, y)
+    for px, py in rng.uniform(0, 120, (200, 2)):
+        expected = bruteNearest(x, y, px, py, 2.0)
+        found = index.nearest(px, py, 2.0)
+        assert (found is None) == (expected is None)
+
+def test_nearest_with_duplicate_points():
+    x = np.array([5.0, 5.0, 5.0, 80.0])
+    y = np.array([5.0, 5.0, 5.0, 40.0])
+    assert GridIndex(x, y).nearest(5.1, 5.1) in (0, 1, 2)
+
+@pytest.mark.parametrize("n", [1, 100, 3000])
+def test_rect_matches_brute_force(n):
+    rng = np.random.default_rng(n)
+    x, y = rng.uniform(0, 120, n), rng.uniform(0, 80, n)
+    index = GridIndex(x, y)
+    for x0, y0, x1, y1 in rng.uniform(-20, 140, (100, 4)):
+        np.testing.assert_array_equal(index.rect(x0, y0, x1, y1),
+                                      bruteRect(x, y, x0, y0, x1, y1))
+
+def test_rect_includes_points_on_the_edges():
+    x = np.array([0.0, 10.0, 20.0])
+    y = np.array([0.0, 10.0, 20.0])
+    np.testing.assert_array_equal(GridIndex(x, y).rect(0, 0, 10, 10), [0, 1])
+
+def test_empty_index():
+    index = GridIndex(np.empty(0), np.empty(0))
+    assert index.nearest(1.0, 1.0) is None
+    assert len(index.rect(0, 0, 10, 10)) == 0